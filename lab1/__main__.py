@@ -0,0 +1,9 @@
+import os
+import sys
+
+# The lab modules import each other by their plain names, as in the tests.
+sys.path.insert(0, os.path.dirname(__file__))
+
+import cli  # noqa: E402
+
+sys.exit(cli.main())
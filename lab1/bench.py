@@ -0,0 +1,295 @@
+"""Throughput benchmarks for the lab1 ciphers.
+
+Measures MB/s for the Caesar and Vigenere engines, operations per second
+for RSA key generation, encryption and decryption at several key sizes, and
+cracks per second for :func:`hack.hack` across input sizes.  Every result
+is compared with a stored baseline, and anything more than ``--tolerance``
+slower is flagged as a regression in the report.
+
+    python lab1/bench.py                    # full run, report + history
+    python lab1/bench.py --quick -k caesar  # small inputs, Caesar only
+    python lab1/bench.py --update-baseline  # accept the current numbers
+    python lab1/bench.py --check            # exit with status 1 on a regression
+
+Baseline rates are absolute, so they only mean something on the machine
+that recorded them: after moving to other hardware, record a baseline
+there first (``--update-baseline``, or ``--baseline`` to keep one file per
+machine).  For the same reason regressions only affect the exit status
+with ``--check``.  Each benchmark prepares its inputs, such as RSA keys,
+only when it is selected, so ``-k`` also skips their setup.
+
+Quick runs have their own names (``caesar.encrypt str (quick)``), so they
+are compared with, and ``--update-baseline`` only replaces, quick entries.
+The report goes to ``bench_output.txt`` and each run is appended to the
+JSON history in ``bench_history.json`` (both at the repository root and
+ignored by git); the baseline is ``bench_baseline.json`` next to this file.
+Rates are the best of ``--repeat`` timed rounds, each at least
+``--min-time`` seconds long.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from collections import namedtuple
+from datetime import datetime, timezone
+
+import caesar
+import hack
+import rsa
+import vigenere
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+OUTPUT_PATH = os.path.join(ROOT, 'bench_output.txt')
+HISTORY_PATH = os.path.join(ROOT, 'bench_history.json')
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_baseline.json')
+
+MIN_TIME = 0.2
+REPEAT = 3
+TOLERANCE = 0.25
+HISTORY_LIMIT = 200
+
+PAYLOAD_SIZE = 4 << 20
+RSA_BITS = (1024, 2048, 4096)
+KEYGEN_BITS = (1024, 2048)
+HACK_SIZES = (100, 1000, 10000, 100000)
+
+QUICK_PAYLOAD_SIZE = 64 << 10
+QUICK_RSA_BITS = (512, 1024)
+QUICK_HACK_SIZES = (100, 1000)
+# Quick results measure other sizes, so they are kept apart in the baseline.
+QUICK_SUFFIX = ' (quick)'
+
+TEXT = ("It was the best of times, it was the worst of times, it was the age of "
+        "wisdom, it was the age of foolishness, it was the epoch of belief, it was "
+        "the epoch of incredulity, it was the season of Light, it was the season "
+        "of Darkness, it was the spring of hope, it was the winter of despair.\n")
+
+# ``setup()`` prepares the inputs and returns the function to time; ``work``
+# is what one call of it amounts to in ``unit`` (MB or 1 op).
+Benchmark = namedtuple('Benchmark', 'name unit work setup')
+Result = namedtuple('Result', 'name unit value baseline ratio regression')
+
+
+def _text(size):
+    return (TEXT * (size // len(TEXT) + 1))[:size]
+
+
+def _mb(size):
+    return size / 1e6
+
+
+def cipher_benchmarks(size):
+    def setup(func, key, kind):
+        def prepare():
+            data = _text(size)
+            if kind != 'str':
+                data = data.encode('ascii')
+            if kind == 'buffer':
+                data = bytearray(data)
+            return lambda: func(data, key)
+        return prepare
+
+    return [
+        Benchmark('caesar.encrypt str', 'MB/s', _mb(size), setup(caesar.encrypt, 17, 'str')),
+        Benchmark('caesar.encrypt bytes', 'MB/s', _mb(size),
+                  setup(caesar.encrypt, 17, 'bytes')),
+        Benchmark('caesar.encrypt_inplace', 'MB/s', _mb(size),
+                  setup(caesar.encrypt_inplace, 17, 'buffer')),
+        Benchmark('vigenere.encrypt str', 'MB/s', _mb(size),
+                  setup(vigenere.encrypt, "LEMON", 'str')),
+        Benchmark('vigenere.encrypt bytes', 'MB/s', _mb(size),
+                  setup(vigenere.encrypt, "LEMON", 'bytes')),
+        Benchmark('vigenere.encrypt_inplace', 'MB/s', _mb(size),
+                  setup(vigenere.encrypt_inplace, "LEMON", 'buffer')),
+    ]
+
+
+def rsa_benchmarks(rsa_bits, keygen_bits):
+    keys = {}
+
+    def keypair(bits):
+        # Shared by the encrypt and decrypt benchmarks of one size.
+        if bits not in keys:
+            keys[bits] = rsa.generate_keypair(bits=bits, crt=True)
+        return keys[bits]
+
+    def message(bits):
+        # One block of message bytes, so every call is one modular exponentiation.
+        return _text(rsa.block_size(keypair(bits)[0][1]))
+
+    def encrypt_setup(bits):
+        public_key, m = keypair(bits)[0], message(bits)
+        return lambda: rsa.encrypt(public_key, m, mode=rsa.BLOCK_MODE)
+
+    def decrypt_setup(bits):
+        public_key, private_key = keypair(bits)
+        ciphertext = rsa.encrypt(public_key, message(bits), mode=rsa.BLOCK_MODE)
+        return lambda: rsa.decrypt(private_key, ciphertext)
+
+    result = []
+    for bits in keygen_bits:
+        result.append(Benchmark(
+            f'rsa.generate_keypair {bits}', 'ops/s', 1,
+            lambda bits=bits: lambda: rsa.generate_keypair(bits=bits, crt=True)))
+    for bits in rsa_bits:
+        result.append(Benchmark(f'rsa.encrypt block {bits}', 'ops/s', 1,
+                                lambda bits=bits: encrypt_setup(bits)))
+        result.append(Benchmark(f'rsa.decrypt block {bits}', 'ops/s', 1,
+                                lambda bits=bits: decrypt_setup(bits)))
+    return result
+
+
+def hack_benchmarks(sizes):
+    def setup(size):
+        ciphertext = caesar.encrypt(_text(size), 42)
+        return lambda: hack.hack(ciphertext)
+
+    return [Benchmark(f'hack.hack {size}', 'cracks/s', 1, lambda size=size: setup(size))
+            for size in sizes]
+
+
+def benchmarks(quick=False):
+    """Return the benchmark list.
+
+    ``quick`` uses small inputs and keys, and names every benchmark with
+    :data:`QUICK_SUFFIX` so its results never meet full-size baselines.
+    """
+    if quick:
+        return [bench._replace(name=bench.name + QUICK_SUFFIX)
+                for bench in (cipher_benchmarks(QUICK_PAYLOAD_SIZE)
+                              + rsa_benchmarks(QUICK_RSA_BITS, QUICK_RSA_BITS[:1])
+                              + hack_benchmarks(QUICK_HACK_SIZES))]
+    return (cipher_benchmarks(PAYLOAD_SIZE)
+            + rsa_benchmarks(RSA_BITS, KEYGEN_BITS)
+            + hack_benchmarks(HACK_SIZES))
+
+
+def measure(bench, min_time=MIN_TIME, repeat=REPEAT):
+    """Return the best rate of ``bench`` over ``repeat`` timed rounds.
+
+    ``bench.setup()`` runs once, before the first round.
+    """
+    func = bench.setup()
+    best = 0.0
+    for _ in range(repeat):
+        calls = 0
+        start = time.perf_counter()
+        while True:
+            func()
+            calls += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+        best = max(best, bench.work * calls / elapsed)
+    return best
+
+
+def run(selected=(), quick=False, min_time=MIN_TIME, repeat=REPEAT):
+    """Measure every benchmark whose name contains one of ``selected``.
+
+    Only the selected benchmarks are set up.  Returns ``{name: (value, unit)}`` in benchmark order.
+    """
+    result = {}
+    for bench in benchmarks(quick):
+        if selected and not any(pattern in bench.name for pattern in selected):
+            continue
+        result[bench.name] = (measure(bench, min_time, repeat), bench.unit)
+    return result
+
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """Return a :data:`Result` per measurement, flagging slowdowns.
+
+    A measurement regresses when it falls below ``1 - tolerance`` times its
+    baseline; names missing from ``baseline`` are never flagged.
+    """
+    rows = []
+    for name, (value, unit) in results.items():
+        reference = baseline.get(name)
+        ratio = value / reference if reference else None
+        rows.append(Result(name, unit, value, reference, ratio,
+                           ratio is not None and ratio < 1 - tolerance))
+    return rows
+
+
+def format_report(rows, tolerance=TOLERANCE):
+    lines = [f"{'benchmark':<36} {'result':>18} {'baseline':>12} {'change':>8}"]
+    for row in rows:
+        baseline = f"{row.baseline:12.2f}" if row.baseline else f"{'-':>12}"
+        change = f"{row.ratio - 1:+8.1%}" if row.ratio is not None else f"{'-':>8}"
+        flag = "  REGRESSION" if row.regression else ""
+        lines.append(f"{row.name:<36} {row.value:10.2f} {row.unit:<7} {baseline} {change}{flag}")
+    regressions = sum(row.regression for row in rows)
+    lines.append(f"{regressions} regression(s) beyond {tolerance:.0%} of baseline")
+    return '\n'.join(lines) + '\n'
+
+
+def load_json(path, default):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+
+
+def write_json(path, data):
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def append_history(path, results, limit=HISTORY_LIMIT):
+    """Append this run to the JSON history at ``path``, keeping ``limit`` runs."""
+    history = load_json(path, [])
+    history.append({
+        'time': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'results': {name: {'value': value, 'unit': unit}
+                    for name, (value, unit) in results.items()},
+    })
+    write_json(path, history[-limit:])
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='bench', description=__doc__.split('\n')[0])
+    parser.add_argument('-k', '--filter', action='append', default=[],
+                        help="only run benchmarks whose name contains this (repeatable)")
+    parser.add_argument('--quick', action='store_true', help="small inputs and keys")
+    parser.add_argument('--min-time', type=float, default=MIN_TIME)
+    parser.add_argument('--repeat', type=int, default=REPEAT)
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE,
+                        help="allowed slowdown against the baseline (default: 0.25)")
+    parser.add_argument('--output', default=OUTPUT_PATH)
+    parser.add_argument('--history', default=HISTORY_PATH)
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--update-baseline', action='store_true',
+                        help="store these results as the new baseline")
+    parser.add_argument('--check', action='store_true',
+                        help="exit with status 1 if a benchmark regressed (the baseline "
+                             "must come from this machine)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    results = run(args.filter, args.quick, args.min_time, args.repeat)
+    baseline = load_json(args.baseline, {})
+    rows = compare(results, baseline, args.tolerance)
+    report = format_report(rows, args.tolerance)
+    with open(args.output, 'w') as f:
+        f.write(report)
+    sys.stdout.write(report)
+    append_history(args.history, results)
+    if args.update_baseline:
+        baseline.update({name: value for name, (value, _) in results.items()})
+        write_json(args.baseline, baseline)
+        return 0
+    return 1 if args.check and any(row.regression for row in rows) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,184 @@
+"""Caesar cipher over the printable ASCII range (32-126).
+
+Characters inside the range are rotated by ``shift`` positions with
+wraparound; everything else is passed through unchanged.  The work is done
+with precomputed translation tables (one per effective shift, cached), so
+``str``, ``bytes``, ``bytearray`` and ``memoryview`` inputs are all handled
+by a single C-level ``translate`` call instead of a per-character loop.
+
+The ``*_into`` and ``*_inplace`` functions write into a caller-supplied
+writable buffer (``bytearray``, ``memoryview``, writable ``mmap``) instead
+of returning a new object.  With NumPy installed the table lookup goes
+straight from the source buffer into the destination; otherwise the work is
+done in ``CHUNK_SIZE`` pieces, so the extra memory stays bounded whatever
+the buffer size.
+"""
+
+from functools import lru_cache
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+FIRST = 32
+LAST = 126
+RANGE = LAST - FIRST + 1  # 95 printable characters
+
+CHUNK_SIZE = 1 << 16
+
+
+def _shift_char(ch, shift):
+    """Reference per-character implementation (used to build the tables)."""
+    code = ord(ch)
+    if FIRST <= code <= LAST:
+        return chr((code - FIRST + shift) % RANGE + FIRST)
+    return ch
+
+
+def _encrypt_chars(text, shift):
+    """Slow per-character path, kept as the reference for tests and benchmarks."""
+    return ''.join(_shift_char(ch, shift) for ch in text)
+
+
+@lru_cache(maxsize=RANGE)
+def byte_table(shift):
+    """Return the 256-byte translation table for ``shift`` (normalised mod 95)."""
+    shift %= RANGE
+    table = bytearray(range(256))
+    for code in range(FIRST, LAST + 1):
+        table[code] = (code - FIRST + shift) % RANGE + FIRST
+    return bytes(table)
+
+
+@lru_cache(maxsize=RANGE)
+def _str_table(shift):
+    return {code: new for code, new in enumerate(byte_table(shift)) if code != new}
+
+
+def translate(data, shift):
+    """Shift ``data`` by ``shift`` and return a result of the same kind.
+
+    ``str`` gives ``str``, ``bytearray`` gives ``bytearray`` and any other
+    bytes-like object (``bytes``, ``memoryview``, ``mmap``) gives ``bytes``.
+    """
+    shift %= RANGE
+    if isinstance(data, str):
+        if shift == 0:
+            return data
+        if data.isascii():
+            return data.encode('ascii').translate(byte_table(shift)).decode('ascii')
+        return data.translate(_str_table(shift))
+    if isinstance(data, bytearray):
+        return data.translate(byte_table(shift))
+    if not isinstance(data, bytes):
+        data = bytes(data)
+    return data.translate(byte_table(shift))
+
+
+def encrypt(text, shift):
+    """Encrypt ``text`` (``str`` or bytes-like) with a Caesar shift."""
+    return translate(text, shift)
+
+
+def decrypt(text, shift):
+    """Decrypt ``text`` (``str`` or bytes-like) encrypted with ``shift``."""
+    return translate(text, -shift)
+
+
+def _buffers(src, dst):
+    """Return flat byte views of ``src`` and ``dst`` after checking ``dst``."""
+    src = memoryview(src).cast('B')
+    dst = memoryview(dst).cast('B')
+    if dst.readonly:
+        raise TypeError("destination buffer must be writable")
+    if len(dst) < len(src):
+        raise ValueError(f"destination buffer too small: {len(dst)} < {len(src)} bytes")
+    return src, dst
+
+
+@lru_cache(maxsize=RANGE)
+def _numpy_table(shift):
+    return np.frombuffer(byte_table(shift), dtype=np.uint8)
+
+
+def translate_into(src, dst, shift, chunk_size=CHUNK_SIZE):
+    """Write ``src`` shifted by ``shift`` into the start of ``dst``.
+
+    ``src`` is any bytes-like object and ``dst`` a writable buffer at least
+    as long; they may be the same buffer.  Returns the number of bytes
+    written.
+    """
+    src, dst = _buffers(src, dst)
+    size = len(src)
+    shift %= RANGE
+    if np is not None:
+        # Elementwise lookup, so an aliased source and destination is safe.
+        # np.take widens its indices to intp, eight bytes per input byte, so
+        # it too goes a chunk at a time to keep the extra memory bounded.
+        table = _numpy_table(shift)
+        source = np.frombuffer(src, dtype=np.uint8)
+        target = np.frombuffer(dst, dtype=np.uint8)
+        for start in range(0, size, chunk_size):
+            end = min(start + chunk_size, size)
+            np.take(table, source[start:end], out=target[start:end], mode='clip')
+        return size
+    table = byte_table(shift)
+    for start in range(0, size, chunk_size):
+        end = min(start + chunk_size, size)
+        dst[start:end] = src[start:end].tobytes().translate(table)
+    return size
+
+
+def encrypt_into(src, dst, shift):
+    """Encrypt bytes-like ``src`` into the writable buffer ``dst``."""
+    return translate_into(src, dst, shift)
+
+
+def decrypt_into(src, dst, shift):
+    """Decrypt bytes-like ``src`` into the writable buffer ``dst``."""
+    return translate_into(src, dst, -shift)
+
+
+def encrypt_inplace(buf, shift):
+    """Encrypt the writable buffer ``buf`` in place; returns its length."""
+    return translate_into(buf, buf, shift)
+
+
+def decrypt_inplace(buf, shift):
+    """Decrypt the writable buffer ``buf`` in place; returns its length."""
+    return translate_into(buf, buf, -shift)
+
+
+def binary_stream(stream):
+    """Return the binary layer of ``stream`` (e.g. ``sys.stdin.buffer``)."""
+    return getattr(stream, 'buffer', stream)
+
+
+def _translate_stream(src, dst, shift, chunk_size):
+    src = binary_stream(src)
+    dst = binary_stream(dst)
+    table = byte_table(shift)
+    total = 0
+    while True:
+        chunk = src.read(chunk_size)
+        if not chunk:
+            break
+        dst.write(chunk.translate(table))
+        total += len(chunk)
+    return total
+
+
+def encrypt_stream(src, dst, shift, chunk_size=CHUNK_SIZE):
+    """Encrypt everything read from ``src`` into ``dst`` in constant memory.
+
+    Both arguments are file objects; text streams such as ``sys.stdin`` are
+    accessed through their binary buffer.  Returns the number of bytes
+    processed.
+    """
+    return _translate_stream(src, dst, shift, chunk_size)
+
+
+def decrypt_stream(src, dst, shift, chunk_size=CHUNK_SIZE):
+    """Decrypt ``src`` into ``dst`` chunk by chunk; see :func:`encrypt_stream`."""
+    return _translate_stream(src, dst, -shift, chunk_size)
@@ -0,0 +1,313 @@
+"""Command-line pipeline for the lab1 ciphers: ``python -m lab1 ...``.
+
+Every subcommand streams from a file (memory-mapped) or stdin to a file or
+stdout in fixed-size chunks, so memory use does not depend on the input
+size.  Results are identical to the library functions applied to the whole
+text: input is treated as UTF-8 wherever a cipher works per character
+(Vigenere key positions, RSA character mode), and bytes that are not valid
+UTF-8 are carried through unchanged.
+
+    python -m lab1 caesar -s 3 in.txt -o out.txt
+    python -m lab1 vigenere -k LEMON -d out.txt
+    python -m lab1 rsa keygen --bits 2048 -o key.json
+    python -m lab1 rsa encrypt --key-file key.json --block in.txt > in.rsa
+    python -m lab1 hack --stats in.enc
+"""
+
+import argparse
+import codecs
+import json
+import mmap
+import os
+import sys
+import time
+
+import caesar
+import hack
+import rsa
+import vigenere
+
+CHUNK_SIZE = caesar.CHUNK_SIZE
+RSA_BATCH = 4096
+ERRORS = 'surrogateescape'
+
+
+class MappedReader:
+    """File-like ``read(size)`` over a read-only memory map of ``path``.
+
+    Pages that have been read are released again where the platform allows
+    it, so the mapping does not grow the resident set with the file size.
+    """
+
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._pos = 0
+        self._released = 0
+
+    def read(self, size=-1):
+        end = len(self._map) if size < 0 else min(self._pos + size, len(self._map))
+        chunk = self._map[self._pos:end]
+        self._pos = end
+        self._release()
+        return chunk
+
+    def _release(self):
+        done = self._pos - self._pos % mmap.PAGESIZE
+        if done > self._released and hasattr(mmap, 'MADV_DONTNEED'):
+            self._map.madvise(mmap.MADV_DONTNEED, self._released, done - self._released)
+            self._released = done
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+class Counting:
+    """Wrap a binary reader or writer and count the bytes passing through."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.count = 0
+
+    def read(self, size=-1):
+        chunk = self.stream.read(size)
+        self.count += len(chunk)
+        return chunk
+
+    def write(self, data):
+        self.count += len(data)
+        return self.stream.write(data)
+
+
+def open_input(path):
+    """Return a binary reader for ``path`` (``-`` is stdin)."""
+    if path == '-':
+        return sys.stdin.buffer
+    if os.path.getsize(path) == 0:
+        return open(path, 'rb')
+    return MappedReader(path)
+
+
+def open_output(path):
+    """Return a binary writer for ``path`` (``-`` is stdout)."""
+    if path == '-':
+        return sys.stdout.buffer
+    return open(path, 'wb')
+
+
+def read_chunks(reader, chunk_size):
+    while True:
+        chunk = reader.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def text_pieces(chunks):
+    """Yield ASCII chunks as ``bytes`` and everything else as decoded ``str``.
+
+    ASCII runs keep the fast byte path; the incremental decoder makes sure
+    multi-byte characters split across chunks are reassembled first.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')(ERRORS)
+    for chunk in chunks:
+        if not decoder.getstate()[0] and chunk.isascii():
+            yield chunk
+        else:
+            yield decoder.decode(chunk)
+    tail = decoder.decode(b'', final=True)
+    if tail:
+        yield tail
+
+
+def _encode(piece):
+    return piece if isinstance(piece, bytes) else piece.encode('utf-8', ERRORS)
+
+
+def run_caesar(args, reader, writer):
+    table = caesar.byte_table(-args.shift if args.decrypt else args.shift)
+    for chunk in read_chunks(reader, args.chunk_size):
+        writer.write(chunk.translate(table))
+
+
+def run_vigenere(args, reader, writer):
+    stream = vigenere.VigenereStream(args.key, decrypt=args.decrypt)
+    _run_vigenere_stream(stream, read_chunks(reader, args.chunk_size), writer)
+
+
+def _run_vigenere_stream(stream, chunks, writer):
+    for piece in text_pieces(chunks):
+        writer.write(_encode(stream.update(piece)))
+
+
+def load_key(args, private):
+    """Return the key from ``--key EXP,N`` or ``--key-file``."""
+    if args.key:
+        exponent, n = (int(part) for part in args.key.split(','))
+        return (exponent, n)
+    if not args.key_file:
+        raise SystemExit("rsa: one of --key or --key-file is required")
+    with open(args.key_file) as f:
+        data = json.load(f)
+    if not private:
+        return (data['e'], data['n'])
+    if 'p' in data and 'q' in data:
+        return rsa.PrivateKey(data['d'], data['n'], data['p'], data['q'])
+    return (data['d'], data['n'])
+
+
+def run_rsa_keygen(args, reader, writer):
+    public_key, private_key = rsa.generate_keypair(bits=args.bits, crt=True)
+    key = {'e': public_key[0], 'd': private_key[0], 'n': public_key[1],
+           'p': private_key.p, 'q': private_key.q}
+    writer.write((json.dumps(key, indent=2) + '\n').encode('ascii'))
+
+
+def _write_ints(writer, values):
+    if values:
+        writer.write(('\n'.join(map(str, values)) + '\n').encode('ascii'))
+
+
+def run_rsa_encrypt(args, reader, writer):
+    e, n = load_key(args, private=False)
+    if args.block:
+        # Every chunk becomes one self-describing frame of whole blocks.
+        size = rsa.block_size(n)
+        chunk_size = max(size, args.chunk_size // max(size, 1) * size)
+        for chunk in read_chunks(reader, chunk_size):
+            _write_ints(writer, rsa._encrypt_blocks(e, n, chunk))
+        return
+    for piece in text_pieces(read_chunks(reader, args.chunk_size)):
+        text = piece.decode('ascii') if isinstance(piece, bytes) else piece
+        _write_ints(writer, rsa.encrypt((e, n), text))
+
+
+def read_ints(chunks):
+    """Yield the whitespace-separated integers of a chunked text stream."""
+    partial = b''
+    for chunk in chunks:
+        tokens = (partial + chunk).split()
+        if not chunk[-1:].isspace() and tokens:
+            partial = tokens.pop()
+        else:
+            partial = b''
+        yield from map(int, tokens)
+    if partial:
+        yield int(partial)
+
+
+def run_rsa_decrypt(args, reader, writer):
+    private_key = load_key(args, private=True)
+    n = private_key[1]
+    size = rsa.block_size(n)
+    values = read_ints(read_chunks(reader, args.chunk_size))
+    batch = []
+
+    def flush():
+        if batch:
+            writer.write(rsa.decrypt(private_key, batch).encode('utf-8', ERRORS))
+            batch.clear()
+
+    for value in values:
+        if value < n:
+            batch.append(value)
+            if len(batch) >= RSA_BATCH:
+                flush()
+            continue
+        flush()
+        frame = [value]
+        for _ in range(-(-(value - n) // size)):
+            try:
+                frame.append(next(values))
+            except StopIteration:
+                raise ValueError("truncated block-mode frame") from None
+        writer.write(rsa._decrypt_block_data(private_key, frame))
+    flush()
+
+
+def run_hack(args, reader, writer):
+    if args.vigenere:
+        prefix = reader.read(hack.KEY_LENGTH_SAMPLE)
+        _, key = hack.hack_vigenere(prefix.decode('utf-8', ERRORS))
+        print(f"hack: key {key}", file=sys.stderr)
+        stream = vigenere.VigenereStream(key, decrypt=True)
+        chunks = read_chunks(reader, args.chunk_size)
+        _run_vigenere_stream(stream, _prepend(prefix, chunks), writer)
+        return
+    result = hack.hack_stream(reader, chunk_size=args.chunk_size)
+    state = "decided" if result.decided else "best guess"
+    print(f"hack: shift {result.shift} ({state} after {result.bytes_examined} bytes)",
+          file=sys.stderr)
+    result.write_to(writer)
+
+
+def _prepend(first, chunks):
+    if first:
+        yield first
+    yield from chunks
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m lab1', description=__doc__.split('\n')[0])
+    outputs = argparse.ArgumentParser(add_help=False)
+    outputs.add_argument('-o', '--output', default='-', help="output file (default: stdout)")
+    outputs.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    outputs.add_argument('--stats', action='store_true',
+                         help="print a throughput summary to stderr")
+    common = argparse.ArgumentParser(add_help=False, parents=[outputs])
+    common.add_argument('input', nargs='?', default='-', help="input file (default: stdin)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    p = commands.add_parser('caesar', parents=[common], help="Caesar cipher")
+    p.add_argument('-s', '--shift', type=int, required=True)
+    p.add_argument('-d', '--decrypt', action='store_true')
+    p.set_defaults(run=run_caesar)
+
+    p = commands.add_parser('vigenere', parents=[common], help="Vigenere cipher")
+    p.add_argument('-k', '--key', required=True)
+    p.add_argument('-d', '--decrypt', action='store_true')
+    p.set_defaults(run=run_vigenere)
+
+    p = commands.add_parser('hack', parents=[common], help="recover Caesar or Vigenere plaintext")
+    p.add_argument('--vigenere', action='store_true', help="crack a Vigenere key instead")
+    p.set_defaults(run=run_hack)
+
+    p = commands.add_parser('rsa', help="textbook RSA")
+    actions = p.add_subparsers(dest='action', required=True)
+    keygen = actions.add_parser('keygen', parents=[outputs], help="write a JSON key file")
+    keygen.add_argument('--bits', type=int, default=rsa.DEFAULT_BITS)
+    keygen.set_defaults(run=run_rsa_keygen)
+    for name, run in [('encrypt', run_rsa_encrypt), ('decrypt', run_rsa_decrypt)]:
+        action = actions.add_parser(name, parents=[common])
+        action.add_argument('--key', help="EXPONENT,N")
+        action.add_argument('--key-file', help="JSON key file from 'rsa keygen'")
+        action.set_defaults(run=run)
+    encrypt = actions.choices['encrypt']
+    encrypt.add_argument('--block', action='store_true', help="use block-packed mode")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    name = args.command if args.command != 'rsa' else f"rsa {args.action}"
+    source = open_input(args.input) if 'input' in args else None
+    target = open_output(args.output)
+    reader = Counting(source) if source is not None else None
+    writer = Counting(target)
+    start = time.perf_counter()
+    try:
+        args.run(args, reader, writer)
+    finally:
+        target.flush()
+        if source is not None and source is not sys.stdin.buffer:
+            source.close()
+        if target is not sys.stdout.buffer:
+            target.close()
+    elapsed = time.perf_counter() - start
+    if args.stats:
+        read = reader.count if reader is not None else 0
+        rate = read / elapsed / 1e6 if elapsed else 0.0
+        print(f"{name}: read {read} bytes, wrote {writer.count} bytes "
+              f"in {elapsed:.3f} s ({rate:.1f} MB/s)", file=sys.stderr)
+    return 0
@@ -0,0 +1,398 @@
+"""Break the printable-range Caesar cipher by frequency analysis.
+
+The ciphertext is reduced to one histogram over the 95 printable
+characters.  Every candidate shift is scored by rotating that histogram
+against an English character model with a chi-squared statistic, so the
+cost is O(n + 95 * 95) instead of decrypting the text 95 times; only the
+winning shift is decrypted.
+
+:func:`hack_vigenere` extends this to the Vigenere cipher: the key length
+is estimated from the index of coincidence of the text's columns, and each
+column is then solved as a Caesar cipher from its own histogram.
+
+The scoring state lives in an :class:`EnglishModel` built once at import;
+:func:`hack_many` shares it with a process pool to crack batches of
+messages and reports a confidence for every result.
+
+:func:`hack_stream` cracks a stream incrementally and stops reading as soon
+as one shift is clearly more likely than all others.
+"""
+
+import math
+from array import array
+from collections import Counter, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import caesar
+import vigenere
+
+# Relative letter frequencies in English text (percent).
+LETTER_FREQUENCIES = {
+    'a': 8.17, 'b': 1.49, 'c': 2.78, 'd': 4.25, 'e': 12.70, 'f': 2.23,
+    'g': 2.02, 'h': 6.09, 'i': 6.97, 'j': 0.15, 'k': 0.77, 'l': 4.03,
+    'm': 2.41, 'n': 6.75, 'o': 7.51, 'p': 1.93, 'q': 0.10, 'r': 5.99,
+    's': 6.33, 't': 9.06, 'u': 2.76, 'v': 0.98, 'w': 2.36, 'x': 0.15,
+    'y': 1.97, 'z': 0.07,
+}
+
+# Share of each character class in running English text.
+SPACE_SHARE = 0.17
+LOWER_SHARE = 0.74
+UPPER_SHARE = 0.03
+PUNCTUATION = {',': 0.012, '.': 0.011, "'": 0.004, '"': 0.003, '-': 0.002,
+               '!': 0.001, '?': 0.001, ';': 0.0005, ':': 0.0005, '\n': 0.0}
+DIGIT_SHARE = 0.004
+# Floor for every other printable character, so chi-squared stays finite.
+RARE_SHARE = 0.0002
+
+COMMON_WORDS = (
+    'the of and to a in is it you that he was for on are with as i his they '
+    'be at one have this from or had by not word but what some we can out '
+    'other were all there when up use your how said an each she which do '
+    'their time if will way about many then them write would like so these '
+    'her long make thing see him two has look more day could go come did '
+    'number no most people my over know water than call first who may down '
+    'side been now find any new work part take get place made live where '
+    'after back little only round man year came show every good me give our '
+    'under name very through just form great think say help low line before '
+    'turn cause same mean differ move right boy old too does tell sentence '
+    'set three want air well also play small end put home read hand large '
+    'spell add even land here must big high such follow act why ask men '
+    'change went light kind off need house picture try us again animal point '
+    'mother world near build self earth father'
+).split()
+
+
+def _english_distribution():
+    """Return the 95 expected character probabilities, indexed by code - 32."""
+    weights = [RARE_SHARE] * caesar.RANGE
+    total = sum(LETTER_FREQUENCIES.values())
+    for letter, freq in LETTER_FREQUENCIES.items():
+        weights[ord(letter) - caesar.FIRST] += LOWER_SHARE * freq / total
+        weights[ord(letter.upper()) - caesar.FIRST] += UPPER_SHARE * freq / total
+    weights[0] += SPACE_SHARE
+    for ch, share in PUNCTUATION.items():
+        if caesar.FIRST <= ord(ch) <= caesar.LAST:
+            weights[ord(ch) - caesar.FIRST] += share
+    for digit in '0123456789':
+        weights[ord(digit) - caesar.FIRST] += DIGIT_SHARE / 10
+    scale = sum(weights)
+    return [weight / scale for weight in weights]
+
+
+ENGLISH = _english_distribution()
+
+CrackResult = namedtuple('CrackResult', 'plaintext shift confidence')
+
+# Number of decrypted characters checked against the word list.
+WORD_SAMPLE = 2048
+PARALLEL_MIN_ITEMS = 64
+PARALLEL_CHUNK_SIZE = 16
+
+# Stop streaming once the best shift's log-likelihood beats the runner-up by
+# this many nats (odds of about e**20 to one), or after STREAM_MAX_BYTES.
+STREAM_MARGIN = 20.0
+STREAM_MAX_BYTES = 1 << 20
+
+MAX_KEY_LENGTH = 20
+# A key length is accepted once its columns reach this fraction of the best
+# index of coincidence seen; multiples of the true length score as high.
+IOC_ACCEPT = 0.85
+KEY_SHIFTS = range(26)
+# The index of coincidence settles long before this many characters.
+KEY_LENGTH_SAMPLE = 1 << 16
+
+
+def _as_bytes(text):
+    if isinstance(text, str):
+        return text.encode('ascii', 'ignore')
+    return bytes(text)
+
+
+def _aligned_bytes(text):
+    """Like :func:`_as_bytes` but one byte per character, so key phases line up."""
+    if isinstance(text, str) and not text.isascii():
+        return bytes(ord(ch) if ord(ch) < 128 else 0 for ch in text)
+    return _as_bytes(text)
+
+
+def _sample(data, sample_size, windows=16):
+    """Return ``data`` or, if it is longer than ``sample_size``, evenly spaced windows of it."""
+    if sample_size is None or len(data) <= sample_size:
+        return data
+    width = max(1, sample_size // windows)
+    step = (len(data) - width) // max(1, windows - 1)
+    return b''.join(data[i * step:i * step + width] for i in range(windows))
+
+
+def histogram(text):
+    """Return the counts of the 95 printable characters in ``text``."""
+    counts = Counter(_as_bytes(text))
+    return [counts.get(code, 0) for code in range(caesar.FIRST, caesar.LAST + 1)]
+
+
+class EnglishModel:
+    """Precomputed English scoring state in compact arrays.
+
+    ``expected`` holds the 95 character probabilities, ``inverse`` their
+    reciprocals (so a chi-squared score is one pass of multiply-adds) and
+    ``log_expected`` their logarithms for likelihood scoring; ``words`` is
+    the common-word set used to judge a decryption.  Models are small and
+    picklable, so one can be shipped to every pool worker.
+    """
+
+    __slots__ = ('expected', 'inverse', 'log_expected', 'words')
+
+    def __init__(self, distribution=ENGLISH, words=COMMON_WORDS):
+        self.expected = array('d', distribution)
+        self.inverse = array('d', (1.0 / p for p in distribution))
+        self.log_expected = array('d', map(math.log, distribution))
+        self.words = frozenset(words)
+
+    def __getstate__(self):
+        return (self.expected, self.inverse, self.log_expected, self.words)
+
+    def __setstate__(self, state):
+        self.expected, self.inverse, self.log_expected, self.words = state
+
+    def chi_squared(self, hist, shift):
+        """Chi-squared distance between English and ``hist`` decrypted by ``shift``.
+
+        Uses sum((o - e)**2 / e) == sum(o**2 / e) - total.
+        """
+        total = sum(hist)
+        if not total:
+            return 0.0
+        rotated = hist[shift:] + hist[:shift]
+        weighted = sum(o * o * inv for o, inv in zip(rotated, self.inverse))
+        return weighted / total - total
+
+    def score_shifts(self, hist, shifts=range(caesar.RANGE)):
+        """Return ``[(score, shift), ...]`` for every candidate shift."""
+        return [(self.chi_squared(hist, shift), shift) for shift in shifts]
+
+    def log_likelihood(self, hist, shift):
+        """Log-probability of ``hist`` decrypted by ``shift`` under the model."""
+        rotated = hist[shift:] + hist[:shift]
+        return sum(o * log_p for o, log_p in zip(rotated, self.log_expected))
+
+    def best_shift(self, hist, shifts=range(caesar.RANGE)):
+        """Return the shift whose decryption of ``hist`` looks most like English."""
+        return min(self.score_shifts(hist, shifts))[1]
+
+    def word_fraction(self, text):
+        """Fraction of the words at the start of ``text`` that are common English."""
+        tokens = text[:WORD_SAMPLE].lower().split()
+        if not tokens:
+            return 0.0
+        hits = sum(token.strip('.,;:!?"\'()-') in self.words for token in tokens)
+        return hits / len(tokens)
+
+    def crack(self, ciphertext, sample_size=None):
+        """Return a :data:`CrackResult` for a Caesar ``ciphertext``.
+
+        ``confidence`` (0 to 1) averages how clearly the best shift beats
+        the runner-up and how many decrypted words are common English.
+        """
+        hist = histogram(_sample(_as_bytes(ciphertext), sample_size))
+        scores = sorted(self.score_shifts(hist))
+        best, shift = scores[0]
+        plaintext = caesar.decrypt(ciphertext, shift)
+        runner_up = scores[1][0]
+        margin = 1.0 - best / runner_up if runner_up > 0 else 0.0
+        if isinstance(plaintext, str):
+            words = self.word_fraction(plaintext)
+        else:
+            words = self.word_fraction(plaintext[:WORD_SAMPLE].decode('ascii', 'replace'))
+        return CrackResult(plaintext, shift, (max(margin, 0.0) + words) / 2)
+
+
+MODEL = EnglishModel()
+
+
+def chi_squared(hist, shift):
+    """Chi-squared score of ``hist`` decrypted by ``shift`` (see :class:`EnglishModel`)."""
+    return MODEL.chi_squared(hist, shift)
+
+
+def score_shifts(hist, shifts=range(caesar.RANGE)):
+    """Return ``[(score, shift), ...]`` for every candidate shift."""
+    return MODEL.score_shifts(hist, shifts)
+
+
+def best_shift(hist, shifts=range(caesar.RANGE)):
+    """Return the shift whose decryption of ``hist`` looks most like English."""
+    return MODEL.best_shift(hist, shifts)
+
+
+def hack(ciphertext, sample_size=None):
+    """Recover ``(plaintext, shift)`` from a Caesar ``ciphertext``.
+
+    With ``sample_size`` set, the shift is chosen from at most that many
+    characters (evenly spaced windows) of a longer input; the whole text is
+    still decrypted.
+    """
+    shift = MODEL.best_shift(histogram(_sample(_as_bytes(ciphertext), sample_size)))
+    return caesar.decrypt(ciphertext, shift), shift
+
+
+_worker_model = None
+
+
+def _init_worker(model):
+    global _worker_model
+    _worker_model = model
+
+
+def _crack_in_worker(ciphertext):
+    return _worker_model.crack(ciphertext)
+
+
+def hack_many(ciphertexts, workers=None, model=None,
+              chunk_size=PARALLEL_CHUNK_SIZE, min_items=PARALLEL_MIN_ITEMS):
+    """Crack a batch of Caesar ciphertexts; returns CrackResults in input order.
+
+    The model (by default the preloaded :data:`MODEL`) is sent to each pool
+    worker once.  Batches smaller than ``min_items``, or ``workers=1``, are
+    cracked serially.  Results whose ``confidence`` is low can be routed to
+    slower verification by the caller.
+    """
+    model = model or MODEL
+    ciphertexts = list(ciphertexts)
+    if workers == 1 or len(ciphertexts) < min_items:
+        return [model.crack(ciphertext) for ciphertext in ciphertexts]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(model,)) as pool:
+        return list(pool.map(_crack_in_worker, ciphertexts, chunksize=chunk_size))
+
+
+class StreamCrack:
+    """Result of :func:`hack_stream`: the shift plus a lazy decryption.
+
+    ``bytes_examined`` is how much of the stream was read before the shift
+    was chosen, and ``decided`` tells whether the likelihood margin was
+    reached (False means the shift was forced by the read limit or the end
+    of the stream).  :meth:`chunks` decrypts the buffered prefix and then
+    the rest of the source as it is read.
+    """
+
+    def __init__(self, shift, bytes_examined, decided, buffered, src, chunk_size):
+        self.shift = shift
+        self.bytes_examined = bytes_examined
+        self.decided = decided
+        self._buffered = buffered
+        self._src = src
+        self._chunk_size = chunk_size
+
+    def chunks(self):
+        """Yield the decrypted stream chunk by chunk (only once)."""
+        table = caesar.byte_table(-self.shift)
+        buffered, self._buffered = self._buffered, []
+        for chunk in buffered:
+            yield chunk.translate(table)
+        while True:
+            chunk = self._src.read(self._chunk_size)
+            if not chunk:
+                return
+            yield chunk.translate(table)
+
+    def write_to(self, dst):
+        """Write the decrypted stream to ``dst``; returns the byte count."""
+        dst = caesar.binary_stream(dst)
+        total = 0
+        for chunk in self.chunks():
+            dst.write(chunk)
+            total += len(chunk)
+        return total
+
+
+def hack_stream(src, chunk_size=caesar.CHUNK_SIZE, margin=STREAM_MARGIN,
+                max_bytes=STREAM_MAX_BYTES, model=None):
+    """Crack a Caesar-encrypted stream without reading all of it first.
+
+    Chunks are folded into one running histogram; after each chunk every
+    shift gets a log-likelihood under the English model.  Reading stops
+    when the best shift leads the runner-up by ``margin`` nats, or once
+    ``max_bytes`` have been read, so memory stays bounded by ``max_bytes``.
+    """
+    model = model or MODEL
+    src = caesar.binary_stream(src)
+    hist = [0] * caesar.RANGE
+    buffered = []
+    examined = 0
+    decided = False
+    shift = 0
+    while examined < max_bytes:
+        chunk = src.read(chunk_size)
+        if not chunk:
+            break
+        buffered.append(chunk)
+        examined += len(chunk)
+        counts = Counter(chunk)
+        for j in range(caesar.RANGE):
+            hist[j] += counts.get(caesar.FIRST + j, 0)
+        scores = sorted((model.log_likelihood(hist, s), s) for s in range(caesar.RANGE))
+        shift = scores[-1][1]
+        if scores[-1][0] - scores[-2][0] >= margin:
+            decided = True
+            break
+    return StreamCrack(shift, examined, decided, buffered, src, chunk_size)
+
+
+def index_of_coincidence(hist):
+    """Probability that two characters drawn from ``hist`` are equal."""
+    total = sum(hist)
+    if total < 2:
+        return 0.0
+    return sum(count * (count - 1) for count in hist) / (total * (total - 1))
+
+
+def _column_histograms(data, length):
+    return [histogram(data[i::length]) for i in range(length)]
+
+
+def key_length(ciphertext, max_length=MAX_KEY_LENGTH):
+    """Estimate the Vigenere key length from column indices of coincidence."""
+    data = _aligned_bytes(ciphertext)[:KEY_LENGTH_SAMPLE]
+    max_length = max(1, min(max_length, len(data) // 2))
+    scores = []
+    for length in range(1, max_length + 1):
+        columns = _column_histograms(data, length)
+        scores.append(sum(map(index_of_coincidence, columns)) / length)
+    best = max(scores)
+    for length, score in enumerate(scores, 1):
+        if score >= IOC_ACCEPT * best:
+            return length
+    return 1
+
+
+def _shortest_period(key):
+    for length in range(1, len(key)):
+        if len(key) % length == 0 and key == key[:length] * (len(key) // length):
+            return key[:length]
+    return key
+
+
+def hack_vigenere(ciphertext, max_key_length=MAX_KEY_LENGTH, sample_size=None):
+    """Recover ``(plaintext, key)`` from a Vigenere ``ciphertext``.
+
+    The key is returned in upper case.  ``sample_size`` bounds the number
+    of characters examined; unlike :func:`hack` the sample is a prefix, so
+    the key phase of every column is preserved.
+    """
+    data = _aligned_bytes(ciphertext)[:sample_size]
+    length = key_length(data, max_key_length)
+    key = ''.join(chr(ord('A') + best_shift(hist, KEY_SHIFTS))
+                  for hist in _column_histograms(data, length))
+    key = _shortest_period(key)
+    return vigenere.decrypt(ciphertext, key), key
+
+
+def _hack_by_decryption(ciphertext):
+    """Reference cracker that decrypts the full text once per candidate shift."""
+    scores = []
+    for shift in range(caesar.RANGE):
+        candidate = caesar.decrypt(ciphertext, shift)
+        scores.append((MODEL.chi_squared(histogram(candidate), 0), shift))
+    shift = min(scores)[1]
+    return caesar.decrypt(ciphertext, shift), shift
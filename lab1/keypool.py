@@ -0,0 +1,244 @@
+"""Pre-generated RSA keypairs served from a background process pool.
+
+Finding two large primes is what makes :func:`rsa.generate_keypair` slow
+(about a third of a second for 2048 bits, several seconds for 4096).  A
+:class:`KeyPool` moves that work off the request path: it searches for
+primes in a process pool, pairs them into keypairs as they arrive and keeps
+up to ``size`` ready keypairs per modulus size.  :meth:`KeyPool.get_keypair`
+pops a ready keypair when there is one (the warm path, microseconds) and
+only waits for the workers when the pool has run dry (the cold path); every
+call triggers a refill in the background.
+
+The two primes of one keypair are searched for by separate tasks, so even a
+cold request is spread over two workers.
+
+    with KeyPool(size=4, prefill=(2048,)) as pool:
+        public_key, private_key = pool.get_keypair(2048)
+        print(pool.latency())
+"""
+
+import atexit
+import os
+import threading
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import primes
+import rsa
+
+DEFAULT_POOL_SIZE = 4
+LATENCY_SAMPLES = 10000
+# Below this a modulus size can have a single prime of each half size
+# (7 for 6 bits, 13 for 8), so no two distinct primes would ever pair up.
+MIN_BITS = 10
+
+LatencyStats = namedtuple('LatencyStats', 'count p50 p90 p99 max')
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted, non-empty sequence."""
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def latency_stats(samples):
+    """Summarise latencies in seconds as a :data:`LatencyStats`."""
+    if not samples:
+        return LatencyStats(0, 0.0, 0.0, 0.0, 0.0)
+    values = sorted(samples)
+    return LatencyStats(len(values), percentile(values, 0.50), percentile(values, 0.90),
+                        percentile(values, 0.99), values[-1])
+
+
+class _Reserve:
+    """Ready keypairs and prime-search bookkeeping for one modulus size."""
+
+    __slots__ = ('sizes', 'ready', 'spare', 'pending', 'waiting')
+
+    def __init__(self, bits):
+        self.sizes = (bits // 2, bits - bits // 2)
+        self.ready = deque()
+        self.spare = {size: [] for size in self.sizes}
+        self.pending = {size: 0 for size in self.sizes}
+        self.waiting = 0
+
+    def pair(self):
+        """Yield ``(p, q)`` for every pair of distinct spare primes."""
+        a, b = self.sizes
+        while len(self.spare[a]) >= (2 if a == b else 1) and self.spare[b]:
+            p = self.spare[a].pop()
+            q = self.spare[b].pop()
+            if p == q:
+                self.spare[a].append(p)
+                continue
+            yield p, q
+
+
+class KeyPool:
+    """Bounded pool of ready RSA keypairs, refilled by a process pool.
+
+    ``size`` keypairs are kept ready per modulus size that has been asked
+    for; ``prefill`` lists the sizes to start generating straight away.
+    ``workers`` defaults to the number of CPUs.  Keypairs are built with
+    ``crt`` like :func:`rsa.generate_keypair` and are never handed out
+    twice; each is linked in the character-mode cache by the thread that
+    gets it.  A failed prime search is raised to the callers waiting at the
+    time, not to later ones.  Sizes below :data:`MIN_BITS` raise ``ValueError``.
+    """
+
+    def __init__(self, size=DEFAULT_POOL_SIZE, workers=None, crt=True,
+                 prefill=(rsa.DEFAULT_BITS,)):
+        if size < 0:
+            raise ValueError("size must not be negative")
+        self.size = size
+        self.crt = crt
+        self._executor = ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1)
+        self._lock = threading.Condition(threading.RLock())
+        self._reserves = {}
+        # The last failed prime search, and how many have failed so far:
+        # a caller only sees failures from while it was waiting.
+        self._error = None
+        self._failures = 0
+        self._closed = False
+        self._latency = {'warm': deque(maxlen=LATENCY_SAMPLES),
+                         'cold': deque(maxlen=LATENCY_SAMPLES)}
+        with self._lock:
+            for bits in prefill:
+                self._refill(self._reserve(bits))
+
+    def _reserve(self, bits):
+        reserve = self._reserves.get(bits)
+        if reserve is None:
+            if bits < MIN_BITS:
+                raise ValueError(f"bits must be at least {MIN_BITS}")
+            reserve = self._reserves[bits] = _Reserve(bits)
+        return reserve
+
+    def _refill(self, reserve):
+        """Submit prime searches until ``size`` keypairs (plus one per waiting
+        caller) are ready or on their way.  Called with the lock held."""
+        if self._closed:
+            return
+        keys = self.size + reserve.waiting - len(reserve.ready)
+        for prime_bits in set(reserve.sizes):
+            wanted = keys * reserve.sizes.count(prime_bits)
+            missing = wanted - len(reserve.spare[prime_bits]) - reserve.pending[prime_bits]
+            for _ in range(missing):
+                reserve.pending[prime_bits] += 1
+                future = self._executor.submit(primes.random_prime, prime_bits)
+                future.add_done_callback(
+                    lambda f, r=reserve, b=prime_bits: self._prime_done(r, b, f))
+
+    def _prime_done(self, reserve, prime_bits, future):
+        with self._lock:
+            reserve.pending[prime_bits] -= 1
+            if future.cancelled():
+                return
+            error = future.exception()
+            if error is not None:
+                self._error = error
+                self._failures += 1
+            else:
+                reserve.spare[prime_bits].append(future.result())
+                for p, q in reserve.pair():
+                    reserve.ready.append(rsa._keypair(p, q, self.crt))
+                self._refill(reserve)
+            self._lock.notify_all()
+
+    def get_keypair(self, bits=rsa.DEFAULT_BITS, timeout=None):
+        """Return ``(public_key, private_key)`` with a modulus of ``bits`` bits.
+
+        Blocks until a keypair is available; raises ``TimeoutError`` after
+        ``timeout`` seconds, ``RuntimeError`` once the pool is closed, and
+        the error of a prime search that failed while it was waiting.
+        """
+        start = time.perf_counter()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("key pool is closed")
+            reserve = self._reserve(bits)
+            path = 'warm' if reserve.ready else 'cold'
+            if not reserve.ready:
+                failures = self._failures
+                reserve.waiting += 1
+                try:
+                    self._refill(reserve)
+                    done = self._lock.wait_for(
+                        lambda: (reserve.ready or self._failures != failures
+                                 or self._closed), timeout)
+                finally:
+                    reserve.waiting -= 1
+                if not reserve.ready and self._failures != failures:
+                    raise self._error
+                if self._closed:
+                    raise RuntimeError("key pool is closed")
+                if not done:
+                    raise TimeoutError(f"no {bits}-bit keypair within {timeout} s")
+            keypair = reserve.ready.popleft()
+            self._refill(reserve)
+            self._latency[path].append(time.perf_counter() - start)
+        # Linked here rather than in the done callbacks, so that only keys
+        # in use take slots in the cache.
+        rsa._cache.link(*keypair)
+        return keypair
+
+    def ready(self, bits=rsa.DEFAULT_BITS):
+        """Number of keypairs of ``bits`` bits that can be served warm."""
+        with self._lock:
+            reserve = self._reserves.get(bits)
+            return len(reserve.ready) if reserve is not None else 0
+
+    def wait_ready(self, bits=rsa.DEFAULT_BITS, count=None, timeout=None):
+        """Block until ``count`` (default: ``size``) keypairs are ready.
+
+        Returns whether they became ready within ``timeout`` seconds.
+        """
+        count = self.size if count is None else count
+        with self._lock:
+            reserve = self._reserve(bits)
+            failures = self._failures
+            self._refill(reserve)
+            self._lock.wait_for(
+                lambda: (len(reserve.ready) >= count or self._failures != failures
+                         or self._closed), timeout)
+            return len(reserve.ready) >= count
+
+    def latency(self):
+        """Return ``{'warm': LatencyStats, 'cold': LatencyStats}`` in seconds."""
+        with self._lock:
+            return {path: latency_stats(samples) for path, samples in self._latency.items()}
+
+    def close(self):
+        """Stop generating keys and shut the worker processes down."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._lock.notify_all()
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+_default_pool = None
+_default_lock = threading.Lock()
+
+
+def default_pool():
+    """Return the shared :class:`KeyPool`, starting it on first use."""
+    global _default_pool
+    with _default_lock:
+        if _default_pool is None:
+            _default_pool = KeyPool()
+            atexit.register(_default_pool.close)
+        return _default_pool
+
+
+def get_keypair(bits=rsa.DEFAULT_BITS, timeout=None):
+    """Return a fresh keypair of ``bits`` bits from the shared pool."""
+    return default_pool().get_keypair(bits, timeout)
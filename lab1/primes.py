@@ -0,0 +1,162 @@
+"""Primality testing and prime generation for the RSA module.
+
+``is_prime`` first runs trial division by a cached table of small primes,
+then Miller-Rabin: with a fixed set of bases that is deterministic for every
+``n`` below 3.3e24 (which covers all 64-bit inputs), and with random bases
+above that.  ``next_prime`` and ``random_prime`` sieve a window of
+candidates by the small primes before any Miller-Rabin round is spent.
+"""
+
+import secrets
+from functools import lru_cache
+
+SMALL_PRIME_LIMIT = 2048
+
+# Miller-Rabin with the first 13 primes as bases is exact below this bound.
+DETERMINISTIC_BASES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+DETERMINISTIC_LIMIT = 3317044064679887385961981
+
+DEFAULT_ROUNDS = 40
+
+# Candidate windows are sieved with a larger table than trial division uses:
+# striking a multiple costs far less than a Miller-Rabin round.
+SIEVE_PRIME_LIMIT = 1 << 15
+SIEVE_WINDOW = 4096
+
+
+@lru_cache(maxsize=None)
+def small_primes(limit=SMALL_PRIME_LIMIT):
+    """Return a tuple of all primes below ``limit`` (sieve of Eratosthenes)."""
+    sieve = bytearray([1]) * limit
+    sieve[:2] = b'\x00\x00'
+    for i in range(2, int(limit ** 0.5) + 1):
+        if sieve[i]:
+            sieve[i * i::i] = bytes(len(range(i * i, limit, i)))
+    return tuple(i for i, flag in enumerate(sieve) if flag)
+
+
+def _is_prime_trial(n):
+    """Naive trial division, kept as the reference for tests and benchmarks."""
+    if n < 2:
+        return False
+    if n % 2 == 0:
+        return n == 2
+    i = 3
+    while i * i <= n:
+        if n % i == 0:
+            return False
+        i += 2
+    return True
+
+
+def _miller_rabin(n, bases):
+    """Return False if any base proves ``n`` (odd, > 3) composite."""
+    d = n - 1
+    s = (d & -d).bit_length() - 1
+    d >>= s
+    for a in bases:
+        a %= n
+        if a < 2:
+            continue
+        x = pow(a, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def _random_bases(n, rounds):
+    return [secrets.randbelow(n - 3) + 2 for _ in range(rounds)]
+
+
+def mr_rounds(bits):
+    """Miller-Rabin rounds for a *randomly chosen* candidate of ``bits`` bits.
+
+    These follow FIPS 186-4 (table C.2) and give an error probability below
+    2**-100 for random candidates; adversarial inputs should go through
+    :func:`is_prime`, which defaults to :data:`DEFAULT_ROUNDS`.
+    """
+    if bits >= 1536:
+        return 4
+    if bits >= 1024:
+        return 5
+    if bits >= 512:
+        return 8
+    return DEFAULT_ROUNDS
+
+
+def is_prime(n, rounds=DEFAULT_ROUNDS):
+    """Return True if ``n`` is prime.
+
+    Exact for ``n`` below :data:`DETERMINISTIC_LIMIT`; above it ``rounds``
+    random Miller-Rabin bases are used (error probability at most 4**-rounds).
+    """
+    if n < 2:
+        return False
+    for p in small_primes():
+        if n % p == 0:
+            return n == p
+    if n < SMALL_PRIME_LIMIT * SMALL_PRIME_LIMIT:
+        return True
+    if n < DETERMINISTIC_LIMIT:
+        return _miller_rabin(n, DETERMINISTIC_BASES)
+    return _probable_prime(n, rounds)
+
+
+def _probable_prime(n, rounds):
+    return _miller_rabin(n, (2,)) and _miller_rabin(n, _random_bases(n, rounds))
+
+
+def _sieved_candidates(start, window):
+    """Yield numbers in ``[start, start + window)`` with no small factor."""
+    flags = bytearray([1]) * window
+    for p in small_primes(SIEVE_PRIME_LIMIT):
+        first = (-start) % p
+        if start + first == p:
+            first += p
+        flags[first::p] = bytes(len(range(first, window, p)))
+    for i, flag in enumerate(flags):
+        if flag:
+            yield start + i
+
+
+def next_prime(n, rounds=None):
+    """Return the smallest prime strictly greater than ``n``.
+
+    ``rounds`` defaults to :func:`mr_rounds` for the size of ``n``.
+    """
+    if n < 2:
+        return 2
+    if rounds is None:
+        rounds = mr_rounds(n.bit_length())
+    start = n + 1
+    while True:
+        for candidate in _sieved_candidates(start, SIEVE_WINDOW):
+            if candidate < DETERMINISTIC_LIMIT:
+                if is_prime(candidate):
+                    return candidate
+            elif _probable_prime(candidate, rounds):
+                return candidate
+        start += SIEVE_WINDOW
+
+
+def random_prime(bits, rng=None):
+    """Return a random prime of exactly ``bits`` bits.
+
+    The two top bits are set, so the product of two such primes has exactly
+    ``2 * bits`` bits.  ``rng`` may be a ``random.Random`` instance for
+    reproducible output; by default the ``secrets`` module is used.
+    """
+    if bits < 3:
+        raise ValueError("bits must be at least 3")
+    randbits = rng.getrandbits if rng is not None else secrets.randbits
+    top = 0b11 << (bits - 2)
+    while True:
+        prime = next_prime((randbits(bits) | top) - 1)
+        if prime.bit_length() == bits:
+            return prime
@@ -0,0 +1,462 @@
+"""Textbook RSA over Python integers.
+
+By default messages are encrypted one character at a time: every code point
+becomes one ciphertext integer, so the modulus has to be larger than the
+largest code point in the text.
+
+The opt-in block mode encodes the text as UTF-8 and packs as many bytes as
+fit below ``n`` into each integer.  Its ciphertext starts with a header
+integer ``n + length`` (``length`` being the number of message bytes).
+A character-mode ciphertext value is always below ``n``, so the header is
+enough for :func:`decrypt` to tell the two framings apart.  Several frames
+in a row decrypt to their messages joined together, which is how the
+command line encrypts a stream one chunk at a time.
+
+Private keys are ``(d, n)`` tuples.  :func:`generate_keypair` can also
+return a :class:`PrivateKey`, which still unpacks as ``(d, n)`` but carries
+the Chinese Remainder Theorem parameters that make decryption about three
+times faster.
+
+Character mode always maps a symbol to the same integer under a given key,
+so both directions go through a bounded LRU cache of per-key lookup tables
+(see :class:`KeyTableCache`); repeated characters cost a dictionary lookup
+instead of a modular exponentiation.
+
+:func:`encrypt_many` and :func:`decrypt_many` spread long messages over a
+process pool for CPU-bound work on real key sizes.
+"""
+
+import threading
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import primes
+
+DEFAULT_EXPONENT = 65537
+DEFAULT_BITS = 2048
+
+CHAR_MODE = 'char'
+BLOCK_MODE = 'block'
+
+DEFAULT_CACHE_KEYS = 32
+DEFAULT_CACHE_SYMBOLS = 1 << 16
+
+# Below this many integers a process pool costs more than it saves.
+PARALLEL_MIN_ITEMS = 256
+PARALLEL_CHUNK_SIZE = 64
+
+
+def is_prime(n):
+    """Return True if ``n`` is prime (see :func:`primes.is_prime`)."""
+    return primes.is_prime(n)
+
+
+def gcd(a, b):
+    """Greatest common divisor of ``a`` and ``b`` (Euclid's algorithm)."""
+    while b:
+        a, b = b, a % b
+    return abs(a)
+
+
+def multiplicative_inverse(a, m):
+    """Return ``x`` with ``a * x % m == 1`` (extended Euclidean algorithm)."""
+    old_r, r = a % m, m
+    old_x, x = 1, 0
+    while r:
+        q = old_r // r
+        old_r, r = r, old_r - q * r
+        old_x, x = x, old_x - q * x
+    if old_r != 1:
+        raise ValueError(f"{a} has no inverse modulo {m}")
+    return old_x % m
+
+
+def choose_exponent(phi):
+    """Pick the public exponent: 65537 when possible, else the smallest valid one."""
+    if DEFAULT_EXPONENT < phi and gcd(DEFAULT_EXPONENT, phi) == 1:
+        return DEFAULT_EXPONENT
+    for e in range(3, phi, 2):
+        if gcd(e, phi) == 1:
+            return e
+    raise ValueError("no valid public exponent for these primes")
+
+
+class PrivateKey(tuple):
+    """Private key ``(d, n)`` extended with the CRT parameters.
+
+    Unpacks, indexes and compares as the 2-tuple ``(d, n)``.  The extra
+    attributes follow PKCS #1: ``p`` and ``q``, ``dp = d mod (p - 1)``,
+    ``dq = d mod (q - 1)`` and ``qinv = q**-1 mod p``.
+    """
+
+    def __new__(cls, d, n, p, q):
+        if p * q != n:
+            raise ValueError("p * q must equal n")
+        self = super().__new__(cls, (d, n))
+        self.p = p
+        self.q = q
+        self.dp = d % (p - 1)
+        self.dq = d % (q - 1)
+        self.qinv = multiplicative_inverse(q, p)
+        return self
+
+    def __getnewargs__(self):
+        return (self[0], self[1], self.p, self.q)
+
+
+def _private_pow(private_key, c):
+    """Return ``c ** d mod n``, using CRT recombination when available."""
+    if isinstance(private_key, PrivateKey):
+        m1 = pow(c, private_key.dp, private_key.p)
+        m2 = pow(c, private_key.dq, private_key.q)
+        h = private_key.qinv * (m1 - m2) % private_key.p
+        return m2 + h * private_key.q
+    d, n = private_key
+    return pow(c, d, n)
+
+
+CacheInfo = namedtuple('CacheInfo', 'hits misses max_keys keys max_symbols symbols')
+
+
+class _SymbolTable:
+    """Code point -> ciphertext table of one keypair, with its inverse."""
+
+    __slots__ = ('encrypt', 'decrypt')
+
+    def __init__(self):
+        self.encrypt = {}
+        self.decrypt = {}
+
+
+class KeyTableCache:
+    """Bounded LRU cache of per-key character-mode lookup tables.
+
+    Tables are keyed by ``('encrypt', e, n)`` or ``('decrypt', d, n)`` and
+    filled lazily: each newly seen symbol costs one ``pow`` and is stored
+    together with its inverse.  The two keys of a pair made by
+    :func:`generate_keypair` share one table, so text encrypted in this
+    process decrypts without any further exponentiation.  At most
+    ``max_keys`` keys and ``max_symbols`` entries per table are kept;
+    symbols beyond that are computed but not stored.  The index of tables
+    is guarded by a lock, so keys can be linked and looked up from several
+    threads at once.
+    """
+
+    def __init__(self, max_keys=DEFAULT_CACHE_KEYS, max_symbols=DEFAULT_CACHE_SYMBOLS):
+        self.max_keys = max_keys
+        self.max_symbols = max_symbols
+        self.hits = 0
+        self.misses = 0
+        self._tables = OrderedDict()
+        self._lock = threading.RLock()
+
+    def _table(self, role, key):
+        cache_key = (role, key[0], key[1])
+        with self._lock:
+            table = self._tables.get(cache_key)
+            if table is None:
+                table = self._store(cache_key, _SymbolTable())
+            else:
+                self._tables.move_to_end(cache_key)
+            return table
+
+    def _store(self, cache_key, table):
+        """Add ``table`` under ``cache_key``.  Called with the lock held."""
+        self._tables[cache_key] = table
+        self._tables.move_to_end(cache_key)
+        while len(self._tables) > self.max_keys:
+            self._tables.popitem(last=False)
+        return table
+
+    def link(self, public_key, private_key):
+        """Make the two keys of a pair share one table."""
+        table = _SymbolTable()
+        with self._lock:
+            self._store(('encrypt', public_key[0], public_key[1]), table)
+            self._store(('decrypt', private_key[0], private_key[1]), table)
+
+    def _translate(self, symbols, forward, inverse, compute, n):
+        missing = set(symbols).difference(forward)
+        # A value outside [0, n) would store a wrong inverse in the table
+        # the two keys of a pair share.
+        for symbol in missing:
+            if not 0 <= symbol < n:
+                raise ValueError(f"{symbol} is out of range for the modulus")
+        room = self.max_symbols - len(forward)
+        overflow = {}
+        for symbol in missing:
+            value = compute(symbol)
+            if room > 0:
+                forward[symbol] = value
+                inverse[value] = symbol
+                room -= 1
+            else:
+                overflow[symbol] = value
+        self.misses += len(missing)
+        self.hits += len(symbols) - len(missing)
+        if overflow:
+            return [forward[x] if x in forward else overflow[x] for x in symbols]
+        return list(map(forward.__getitem__, symbols))
+
+    def encrypt(self, public_key, codes):
+        """Return the ciphertext integers for the code points ``codes``."""
+        e, n = public_key
+        table = self._table('encrypt', public_key)
+        return self._translate(codes, table.encrypt, table.decrypt,
+                               lambda code: pow(code, e, n), n)
+
+    def decrypt(self, private_key, ciphertext):
+        """Return the code points for the ciphertext integers.
+
+        Raises ``ValueError`` for an integer outside ``[0, n)``.
+        """
+        table = self._table('decrypt', private_key)
+        return self._translate(ciphertext, table.decrypt, table.encrypt,
+                               lambda c: _private_pow(private_key, c), private_key[1])
+
+    def info(self):
+        """Return a :data:`CacheInfo` snapshot of the counters and sizes."""
+        with self._lock:
+            symbols = sum(len(table.encrypt) for table in set(self._tables.values()))
+            return CacheInfo(self.hits, self.misses, self.max_keys, len(self._tables),
+                             self.max_symbols, symbols)
+
+    def set_limits(self, max_keys=None, max_symbols=None):
+        """Change the limits; surplus keys are evicted immediately."""
+        if max_symbols is not None:
+            self.max_symbols = max_symbols
+        if max_keys is not None:
+            with self._lock:
+                self.max_keys = max_keys
+                while len(self._tables) > max_keys:
+                    self._tables.popitem(last=False)
+
+    def clear(self):
+        """Drop every table and reset the counters."""
+        with self._lock:
+            self._tables.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+_cache = KeyTableCache()
+
+
+def cache_info():
+    """Return hit/miss counters and sizes of the character-mode cache."""
+    return _cache.info()
+
+
+def cache_clear():
+    """Empty the character-mode cache and reset its counters."""
+    _cache.clear()
+
+
+def set_cache_limits(max_keys=None, max_symbols=None):
+    """Change the memory limits of the character-mode cache."""
+    _cache.set_limits(max_keys, max_symbols)
+
+
+def generate_keypair(p=None, q=None, bits=DEFAULT_BITS, crt=False):
+    """Return ``((e, n), (d, n))`` for the primes ``p`` and ``q``.
+
+    When ``p`` and ``q`` are omitted, two random primes of ``bits // 2``
+    bits each are generated, giving a modulus of exactly ``bits`` bits.
+    With ``crt=True`` the private key is a :class:`PrivateKey`.
+    """
+    if p is None and q is None:
+        p = primes.random_prime(bits // 2)
+        q = primes.random_prime(bits - bits // 2)
+        while q == p:
+            q = primes.random_prime(bits - bits // 2)
+    elif p is None or q is None:
+        raise ValueError("either both primes or neither must be given")
+    elif not (is_prime(p) and is_prime(q)):
+        raise ValueError("both p and q must be prime")
+    elif p == q:
+        raise ValueError("p and q must be different")
+    public_key, private_key = _keypair(p, q, crt)
+    _cache.link(public_key, private_key)
+    return public_key, private_key
+
+
+def _keypair(p, q, crt):
+    """Build the keypair for two distinct, known primes.
+
+    The keys are not linked in the character-mode cache; callers do that on
+    their own thread when the keys are handed out.
+    """
+    n = p * q
+    phi = (p - 1) * (q - 1)
+    e = choose_exponent(phi)
+    d = multiplicative_inverse(e, phi)
+    public_key = (e, n)
+    private_key = PrivateKey(d, n, p, q) if crt else (d, n)
+    return public_key, private_key
+
+
+def block_size(n):
+    """Number of message bytes packed into one block for the modulus ``n``."""
+    return (n.bit_length() - 1) // 8
+
+
+def _encrypt_blocks(e, n, data):
+    size = block_size(n)
+    if size < 1:
+        raise ValueError("modulus is too small for block mode")
+    result = [n + len(data)]
+    for start in range(0, len(data), size):
+        block = data[start:start + size].ljust(size, b'\x00')
+        result.append(pow(int.from_bytes(block, 'big'), e, n))
+    return result
+
+
+def _frames(n, ciphertext):
+    """Yield ``(length, blocks)`` for each block-mode frame of ``ciphertext``."""
+    size = block_size(n)
+    if size < 1:
+        raise ValueError("modulus is too small for block mode")
+    start = 0
+    while start < len(ciphertext):
+        length = ciphertext[start] - n
+        if length < 0:
+            raise ValueError("expected a block-mode frame header")
+        count = -(-length // size)
+        blocks = ciphertext[start + 1:start + 1 + count]
+        if len(blocks) < count:
+            raise ValueError("truncated block-mode frame")
+        yield length, blocks
+        start += 1 + count
+
+
+def _unpack(n, frames, values):
+    """Join the message bytes of ``frames`` from their decrypted ``values``."""
+    size = block_size(n)
+    values = iter(values)
+    parts = []
+    for length, blocks in frames:
+        data = b''.join(next(values).to_bytes(size, 'big') for _ in blocks)
+        parts.append(data[:length])
+    return b''.join(parts)
+
+
+def _decrypt_block_data(private_key, ciphertext):
+    """Return the raw message bytes of one or more block-mode frames."""
+    n = private_key[1]
+    frames = list(_frames(n, ciphertext))
+    values = (_private_pow(private_key, c) for _, blocks in frames for c in blocks)
+    return _unpack(n, frames, values)
+
+
+def _decrypt_blocks(private_key, ciphertext):
+    return _decrypt_block_data(private_key, ciphertext).decode('utf-8')
+
+
+def encrypt(public_key, plaintext, mode=CHAR_MODE):
+    """Encrypt ``plaintext`` into a list of integers.
+
+    ``mode`` is :data:`CHAR_MODE` (one integer per character) or
+    :data:`BLOCK_MODE` (a length header followed by packed UTF-8 blocks).
+    """
+    e, n = public_key
+    if mode == BLOCK_MODE:
+        return _encrypt_blocks(e, n, plaintext.encode('utf-8'))
+    if mode != CHAR_MODE:
+        raise ValueError(f"unknown mode {mode!r}")
+    codes = [ord(ch) for ch in plaintext]
+    if codes and max(codes) >= n:
+        ch = chr(max(codes))
+        raise ValueError(f"character {ch!r} does not fit below the modulus")
+    return _cache.encrypt(public_key, codes)
+
+
+def decrypt(private_key, ciphertext):
+    """Decrypt a list of integers produced by :func:`encrypt` in either mode."""
+    n = private_key[1]
+    if ciphertext and ciphertext[0] >= n:
+        return _decrypt_blocks(private_key, ciphertext)
+    return ''.join(map(chr, _cache.decrypt(private_key, ciphertext)))
+
+
+_worker_state = None
+
+
+def _init_worker(role, key, cached):
+    global _worker_state
+    _worker_state = (role, key, cached)
+
+
+def _pow_chunk(values):
+    role, key, cached = _worker_state
+    if role == 'encrypt':
+        if cached:
+            return _cache.encrypt(key, values)
+        e, n = key
+        return [pow(m, e, n) for m in values]
+    if cached:
+        return _cache.decrypt(key, values)
+    return [_private_pow(key, c) for c in values]
+
+
+def _parallel_pow(role, key, values, cached, workers, chunk_size):
+    """Apply ``key`` to ``values`` in a process pool, preserving order.
+
+    The key is handed to each worker once through the pool initializer;
+    only the chunks of integers travel per task.
+    """
+    chunks = [values[i:i + chunk_size] for i in range(0, len(values), chunk_size)]
+    result = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(role, key, cached)) as pool:
+        for part in pool.map(_pow_chunk, chunks):
+            result.extend(part)
+    return result
+
+
+def _serial(count, workers, min_items):
+    return workers == 1 or count < min_items
+
+
+def encrypt_many(public_key, plaintext, mode=CHAR_MODE, workers=None,
+                 chunk_size=PARALLEL_CHUNK_SIZE, min_items=PARALLEL_MIN_ITEMS):
+    """Parallel :func:`encrypt`; returns exactly the same list.
+
+    ``workers`` defaults to the number of CPUs.  Inputs with fewer than
+    ``min_items`` integers to compute are encrypted serially.
+    """
+    e, n = public_key
+    if mode == BLOCK_MODE:
+        data = plaintext.encode('utf-8')
+        size = block_size(n)
+        if size < 1 or _serial(-(-len(data) // size), workers, min_items):
+            return encrypt(public_key, plaintext, mode)
+        blocks = [int.from_bytes(data[i:i + size].ljust(size, b'\x00'), 'big')
+                  for i in range(0, len(data), size)]
+        return [n + len(data)] + _parallel_pow('encrypt', (e, n), blocks, False,
+                                               workers, chunk_size)
+    if mode != CHAR_MODE or _serial(len(plaintext), workers, min_items):
+        return encrypt(public_key, plaintext, mode)
+    codes = [ord(ch) for ch in plaintext]
+    if max(codes) >= n:
+        ch = chr(max(codes))
+        raise ValueError(f"character {ch!r} does not fit below the modulus")
+    return _parallel_pow('encrypt', (e, n), codes, True, workers, chunk_size)
+
+
+def decrypt_many(private_key, ciphertext, workers=None,
+                 chunk_size=PARALLEL_CHUNK_SIZE, min_items=PARALLEL_MIN_ITEMS):
+    """Parallel :func:`decrypt` for either framing; returns the same text.
+
+    See :func:`encrypt_many` for the meaning of the pool parameters.
+    """
+    if _serial(len(ciphertext), workers, min_items):
+        return decrypt(private_key, ciphertext)
+    n = private_key[1]
+    if ciphertext[0] >= n:
+        frames = list(_frames(n, ciphertext))
+        values = _parallel_pow('decrypt', private_key,
+                               [c for _, blocks in frames for c in blocks], False,
+                               workers, chunk_size)
+        return _unpack(n, frames, values).decode('utf-8')
+    values = _parallel_pow('decrypt', private_key, ciphertext, True, workers, chunk_size)
+    return ''.join(map(chr, values))
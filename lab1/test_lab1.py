@@ -10,6 +10,10 @@ caesar = None
 vigenere = None
 rsa = None
 hack = None
+primes = None
+cli = None
+keypool = None
+bench = None
 
 try:
     import caesar
@@ -31,6 +35,26 @@ try:
 except ImportError:
     pass
 
+try:
+    import primes
+except ImportError:
+    pass
+
+try:
+    import cli
+except ImportError:
+    pass
+
+try:
+    import keypool
+except ImportError:
+    pass
+
+try:
+    import bench
+except ImportError:
+    pass
+
 
 class TestCaesar:
     """Tests for Caesar cipher implementation."""
@@ -87,6 +111,98 @@ class TestCaesar:
         assert result == plaintext
 
 
+class TestCaesarEngine:
+    """Tests for the table-driven Caesar engine and streaming API."""
+    
+    @pytest.mark.skipif(caesar is None, reason="caesar module not found")
+    def test_table_matches_reference(self):
+        """Test that the translation tables match the per-character path."""
+        text = ''.join(chr(i) for i in range(0, 160)) + "\u00e9\u4e2d"
+        for shift in [-200, -96, -95, -1, 0, 1, 3, 94, 95, 96, 250]:
+            assert caesar.encrypt(text, shift) == caesar._encrypt_chars(text, shift)
+            assert caesar.decrypt(caesar.encrypt(text, shift), shift) == text
+    
+    @pytest.mark.skipif(caesar is None, reason="caesar module not found")
+    def test_bytes_like_inputs(self):
+        """Test Caesar cipher on bytes, bytearray and memoryview."""
+        text = "Hello, World!"
+        expected = caesar.encrypt(text, 3).encode('ascii')
+        assert caesar.encrypt(text.encode('ascii'), 3) == expected
+        result = caesar.encrypt(bytearray(text, 'ascii'), 3)
+        assert isinstance(result, bytearray) and result == expected
+        assert caesar.encrypt(memoryview(text.encode('ascii')), 3) == expected
+        assert caesar.decrypt(expected, 3) == text.encode('ascii')
+    
+    @pytest.mark.skipif(caesar is None, reason="caesar module not found")
+    def test_stream_roundtrip(self):
+        """Test chunked streaming matches the single-shot call."""
+        import io
+        data = ("The quick brown fox jumps over the lazy dog.\n" * 500).encode('ascii')
+        encrypted = io.BytesIO()
+        count = caesar.encrypt_stream(io.BytesIO(data), encrypted, 42, chunk_size=1000)
+        assert count == len(data)
+        assert encrypted.getvalue() == caesar.encrypt(data, 42)
+        decrypted = io.BytesIO()
+        caesar.decrypt_stream(io.BytesIO(encrypted.getvalue()), decrypted, 42, chunk_size=777)
+        assert decrypted.getvalue() == data
+    
+    @pytest.mark.skipif(caesar is None, reason="caesar module not found")
+    def test_encrypt_into_buffer(self):
+        """Test writing into a caller-supplied buffer and in place."""
+        data = bytes(range(256)) * 10
+        expected = caesar.encrypt(data, 42)
+        out = bytearray(len(data) + 5)
+        assert caesar.encrypt_into(data, out, 42) == len(data)
+        assert out[:len(data)] == expected and out[len(data):] == bytes(5)
+        out = bytearray(len(data))
+        assert caesar.translate_into(memoryview(data), memoryview(out), 42, chunk_size=100)
+        assert out == expected
+        buf = bytearray(data)
+        caesar.encrypt_inplace(memoryview(buf)[10:], 42)
+        assert buf == data[:10] + expected[10:]
+        caesar.decrypt_inplace(buf, 42)
+        caesar.encrypt_inplace(buf, 42)
+        caesar.decrypt_into(bytes(buf), buf, 42)
+        assert buf[10:] == data[10:]
+    
+    @pytest.mark.skipif(caesar is None, reason="caesar module not found")
+    def test_encrypt_into_mmap(self, tmp_path):
+        """Test encrypting a writable memory map in place."""
+        import mmap
+        data = b"Memory mapped payload!\n" * 1000
+        path = tmp_path / "payload.bin"
+        path.write_bytes(data)
+        with open(path, 'r+b') as f, mmap.mmap(f.fileno(), 0) as mapped:
+            caesar.encrypt_inplace(mapped, 7)
+        assert path.read_bytes() == caesar.encrypt(data, 7)
+    
+    @pytest.mark.skipif(caesar is None, reason="caesar module not found")
+    def test_encrypt_into_rejects_bad_destination(self):
+        """Test that short or read-only destinations are rejected."""
+        with pytest.raises(ValueError):
+            caesar.encrypt_into(b"hello", bytearray(4), 3)
+        with pytest.raises(TypeError):
+            caesar.encrypt_into(b"hello", b"xxxxx", 3)
+        with pytest.raises(TypeError):
+            caesar.encrypt_inplace("hello", 3)
+    
+    @pytest.mark.skipif(caesar is None or getattr(caesar, 'np', None) is None,
+                        reason="caesar module or numpy not found")
+    def test_numpy_path_matches_fallback(self, monkeypatch):
+        """Test that the NumPy lookup gives the same bytes as the chunked fallback."""
+        ciphertext = caesar.encrypt(bytes(range(256)) * 50, 42)
+        results = []
+        for np in (caesar.np, None):
+            monkeypatch.setattr(caesar, "np", np)
+            out = bytearray(len(ciphertext))
+            caesar.decrypt_into(ciphertext, out, 42)
+            buf = bytearray(ciphertext)
+            caesar.decrypt_inplace(memoryview(buf)[7:], 42)
+            results.append((out, buf))
+        assert results[0] == results[1]
+        assert results[0][0] == caesar.decrypt(ciphertext, 42)
+
+
 class TestVigenere:
     """Tests for Vigenere cipher implementation."""
     
@@ -148,6 +264,87 @@ class TestVigenere:
             pass
 
 
+class TestVigenereEngine:
+    """Tests for the batched Vigenere engine and streaming API."""
+    
+    @pytest.mark.skipif(vigenere is None, reason="vigenere module not found")
+    def test_batched_matches_reference(self):
+        """Test that the batched engine matches the per-character path."""
+        text = ''.join(chr(i) for i in range(0, 128)) * 3
+        for key in ["A", "KEY", "LEMON", "Z" * 300, "abcdefghijklmnopqrstuvwxyz" * 11]:
+            offsets = vigenere.clean_key(key)
+            assert vigenere.encrypt(text, key) == vigenere._encrypt_chars(text, offsets)
+            assert vigenere.decrypt(vigenere.encrypt(text, key), key) == text
+    
+    @pytest.mark.skipif(vigenere is None, reason="vigenere module not found")
+    def test_non_ascii_text(self):
+        """Test that non-ASCII characters pass through and consume a key position."""
+        text = "caf\u00e9 au lait"
+        encrypted = vigenere.encrypt(text, "KEY")
+        assert encrypted[3] == "\u00e9"
+        assert encrypted[4:] == vigenere.encrypt(text, "KEY")[4:]
+        assert vigenere.decrypt(encrypted, "KEY") == text
+    
+    @pytest.mark.skipif(vigenere is None, reason="vigenere module not found")
+    def test_bytes_like_inputs(self):
+        """Test Vigenere cipher on bytes, bytearray and memoryview."""
+        text = "attack at dawn"
+        expected = vigenere.encrypt(text, "LEMON").encode('ascii')
+        assert vigenere.encrypt(text.encode('ascii'), "LEMON") == expected
+        assert vigenere.encrypt(bytearray(text, 'ascii'), "LEMON") == expected
+        assert vigenere.encrypt(memoryview(text.encode('ascii')), "LEMON") == expected
+    
+    @pytest.mark.skipif(vigenere is None, reason="vigenere module not found")
+    def test_stream_carries_key_phase(self):
+        """Test that chunked streaming matches the single-shot call."""
+        import io
+        data = ("Vigenere streaming across chunk boundaries!\n" * 300).encode('ascii')
+        for chunk_size in [1, 7, 64, 1000, 100000]:
+            encrypted = io.BytesIO()
+            vigenere.encrypt_stream(io.BytesIO(data), encrypted, "LEMON", chunk_size=chunk_size)
+            assert encrypted.getvalue() == vigenere.encrypt(data, "LEMON")
+            decrypted = io.BytesIO()
+            vigenere.decrypt_stream(io.BytesIO(encrypted.getvalue()), decrypted, "LEMON",
+                                    chunk_size=chunk_size)
+            assert decrypted.getvalue() == data
+    
+    @pytest.mark.skipif(vigenere is None, reason="vigenere module not found")
+    def test_encrypt_into_carries_key_phase(self):
+        """Test that chunked writes into a buffer match the single-shot call."""
+        data = bytes(range(256)) * 12
+        offsets = vigenere.clean_key("LEMON")
+        expected = vigenere.encrypt(data, "LEMON")
+        for chunk_size in [1, 7, 100, 4096]:
+            out = bytearray(len(data))
+            vigenere.translate_into(data, out, offsets, chunk_size=chunk_size)
+            assert out == expected
+        out = bytearray(len(data))
+        assert vigenere.encrypt_into(memoryview(data), out, "LEMON") == len(data)
+        assert out == expected
+    
+    @pytest.mark.skipif(vigenere is None, reason="vigenere module not found")
+    def test_inplace_roundtrip(self):
+        """Test in-place encryption and decryption of a bytearray."""
+        data = b"attack at dawn, attack at dusk" * 100
+        buf = bytearray(data)
+        vigenere.encrypt_inplace(buf, "LEMON")
+        assert buf == vigenere.encrypt(data, "LEMON")
+        vigenere.decrypt_inplace(memoryview(buf), "LEMON")
+        assert buf == data
+        with pytest.raises(ValueError):
+            vigenere.decrypt_into(data, bytearray(10), "LEMON")
+    
+    @pytest.mark.skipif(vigenere is None or getattr(vigenere, 'np', None) is None,
+                        reason="vigenere module or numpy not found")
+    def test_numpy_engine_matches_columns(self):
+        """Test that the NumPy engine matches the column engine."""
+        data = bytes(range(256)) * 20
+        offsets = vigenere.clean_key("SOMEKEY" * 50)
+        for phase in [0, 3, 349]:
+            assert (vigenere._translate_numpy(data, offsets, phase)
+                    == vigenere._translate_columns(data, offsets, phase))
+
+
 class TestRSA:
     """Tests for RSA implementation."""
     
@@ -235,6 +432,372 @@ class TestRSA:
             assert decrypted == text, f"Failed for text: {text}"
 
 
+class TestPrimes:
+    """Tests for the primality engine behind rsa.is_prime."""
+    
+    @pytest.mark.skipif(primes is None, reason="primes module not found")
+    def test_is_prime_matches_trial_division(self):
+        """Test is_prime against trial division on small and mid-sized ranges."""
+        for start, stop in [(0, 5000), (4190000, 4200000)]:
+            for n in range(start, stop):
+                assert primes.is_prime(n) == primes._is_prime_trial(n), f"Failed for {n}"
+    
+    @pytest.mark.skipif(primes is None, reason="primes module not found")
+    def test_strong_pseudoprimes_rejected(self):
+        """Test that Carmichael numbers and strong pseudoprimes are rejected."""
+        for n in [561, 41041, 3215031751, 3825123056546413051, 318665857834031151167461]:
+            assert not primes.is_prime(n), f"{n} is composite"
+        assert primes.is_prime(2**61 - 1)
+        assert primes.is_prime(2**127 - 1)
+        assert not primes.is_prime((2**61 - 1) * (2**89 - 1))
+    
+    @pytest.mark.skipif(primes is None, reason="primes module not found")
+    def test_next_prime(self):
+        """Test next_prime returns the smallest larger prime."""
+        assert primes.next_prime(0) == 2
+        assert primes.next_prime(2) == 3
+        assert primes.next_prime(13) == 17
+        assert primes.next_prime(2046) == 2053
+        assert primes.next_prime(10**12) == 10**12 + 39
+    
+    @pytest.mark.skipif(primes is None, reason="primes module not found")
+    def test_random_prime_bit_length(self):
+        """Test random_prime returns primes of the requested size."""
+        import random
+        rng = random.Random(1234)
+        for bits in [8, 64, 256]:
+            prime = primes.random_prime(bits, rng=rng)
+            assert prime.bit_length() == bits
+            assert primes.is_prime(prime)
+    
+    @pytest.mark.skipif(rsa is None, reason="rsa module not found")
+    def test_generate_keypair_random_primes(self):
+        """Test key generation without explicit primes."""
+        public_key, private_key = rsa.generate_keypair(bits=512)
+        e, n = public_key
+        d, n2 = private_key
+        assert n == n2
+        assert n.bit_length() == 512
+        assert rsa.decrypt(private_key, rsa.encrypt(public_key, "Hello, World!")) == "Hello, World!"
+    
+    @pytest.mark.skipif(rsa is None, reason="rsa module not found")
+    def test_generate_keypair_rejects_composites(self):
+        """Test that composite or repeated primes are rejected."""
+        with pytest.raises(ValueError):
+            rsa.generate_keypair(15, 17)
+        with pytest.raises(ValueError):
+            rsa.generate_keypair(17, 17)
+
+
+class TestRSABlockMode:
+    """Tests for the block-packed RSA encryption mode."""
+    
+    @pytest.mark.skipif(rsa is None, reason="rsa module not found")
+    def test_block_roundtrip(self):
+        """Test block mode roundtrip, including non-ASCII text."""
+        public_key, private_key = rsa.generate_keypair(bits=256)
+        for text in ["", "A", "Hello, World!", "caf\u00e9 \u4e2d\u6587" * 50, "x" * 31, "x" * 32]:
+            encrypted = rsa.encrypt(public_key, text, mode=rsa.BLOCK_MODE)
+            assert rsa.decrypt(private_key, encrypted) == text, f"Failed for text: {text}"
+    
+    @pytest.mark.skipif(rsa is None, reason="rsa module not found")
+    def test_block_packing(self):
+        """Test that block mode packs many bytes into each integer."""
+        public_key, private_key = rsa.generate_keypair(bits=256)
+        e, n = public_key
+        text = "packed " * 100
+        encrypted = rsa.encrypt(public_key, text, mode=rsa.BLOCK_MODE)
+        size = rsa.block_size(n)
+        assert size == 31
+        assert encrypted[0] == n + len(text)
+        assert len(encrypted) == 1 + -(-len(text) // size)
+        assert all(c < n for c in encrypted[1:])
+    
+    @pytest.mark.skipif(rsa is None, reason="rsa module not found")
+    def test_char_mode_is_default(self):
+        """Test that character mode stays the default."""
+        public_key, private_key = rsa.generate_keypair(61, 53)
+        assert rsa.encrypt(public_key, "ABC") == rsa.encrypt(public_key, "ABC", mode=rsa.CHAR_MODE)
+        assert len(rsa.encrypt(public_key, "ABC")) == 3
+        with pytest.raises(ValueError):
+            rsa.encrypt(public_key, "ABC", mode="bogus")
+    
+    @pytest.mark.skipif(rsa is None, reason="rsa module not found")
+    def test_block_mode_needs_large_modulus(self):
+        """Test that block mode rejects moduli below one byte per block."""
+        public_key, private_key = rsa.generate_keypair(11, 13)
+        with pytest.raises(ValueError):
+            rsa.encrypt(public_key, "A", mode=rsa.BLOCK_MODE)
+
+
+class TestRSACRT:
+    """Tests for the CRT-accelerated private key."""
+    
+    @pytest.mark.skipif(rsa is None, reason="rsa module not found")
+    def test_crt_key_unpacks_as_pair(self):
+        """Test that the extended private key still behaves as (d, n)."""
+        public_key, private_key = rsa.generate_keypair(61, 53, crt=True)
+        plain_public, plain_private = rsa.generate_keypair(61, 53)
+        assert public_key == plain_public
+        assert len(private_key) == 2
+        d, n = private_key
+        assert (d, n) == plain_private
+        assert private_key == plain_private
+        assert (private_key.p, private_key.q) == (61, 53)
+        assert private_key.dp == d % 60
+        assert private_key.dq == d % 52
+        assert (private_key.qinv * 53) % 61 == 1
+    
+    @pytest.mark.skipif(rsa is None, reason="rsa module not found")
+    def test_crt_decrypt_matches_plain(self):
+        """Test CRT decryption in character and block mode."""
+        public_key, private_key = rsa.generate_keypair(bits=512, crt=True)
+        plain_key = tuple(private_key)
+        text = "Hello, CRT! caf\u00e9"
+        for mode in [rsa.CHAR_MODE, rsa.BLOCK_MODE]:
+            encrypted = rsa.encrypt(public_key, text, mode=mode)
+            assert rsa.decrypt(private_key, encrypted) == text
+            assert rsa.decrypt(plain_key, encrypted) == text
+    
+    @pytest.mark.skipif(rsa is None, reason="rsa module not found")
+    def test_crt_key_pickles(self):
+        """Test that the extended private key survives pickling."""
+        import pickle
+        public_key, private_key = rsa.generate_keypair(bits=256, crt=True)
+        restored = pickle.loads(pickle.dumps(private_key))
+        assert restored == private_key
+        assert isinstance(restored, rsa.PrivateKey)
+        assert (restored.p, restored.q, restored.qinv) == (private_key.p, private_key.q, private_key.qinv)
+
+
+class TestRSACache:
+    """Tests for the per-key character-mode lookup cache."""
+    
+    @pytest.mark.skipif(rsa is None, reason="rsa module not found")
+    def test_cached_output_matches_pow(self):
+        """Test that cached tables give the same integers as direct pow."""
+        rsa.cache_clear()
+        public_key, private_key = rsa.generate_keypair(61, 53)
+        e, n = public_key
+        text = "Hello, World! Hello again."
+        for _ in range(2):
+            encrypted = rsa.encrypt(public_key, text)
+            assert encrypted == [pow(ord(ch), e, n) for ch in text]
+            assert rsa.decrypt(private_key, encrypted) == text
+    
+    @pytest.mark.skipif(rsa is None, reason="rsa module not found")
+    def test_hit_and_miss_counters(self):
+        """Test that each distinct symbol costs one miss per key."""
+        rsa.cache_clear()
+        public_key, private_key = rsa.generate_keypair(bits=256)
+        text = "abracadabra"
+        encrypted = rsa.encrypt(public_key, text)
+        info = rsa.cache_info()
+        assert info.misses == len(set(text))
+        assert info.hits == len(text) - len(set(text))
+        # The pair shares one table, so decryption is all hits
+        assert rsa.decrypt(private_key, encrypted) == text
+        info = rsa.cache_info()
+        assert info.misses == len(set(text))
+        assert info.hits == 2 * len(text) - len(set(text))
+        assert info.symbols == len(set(text))
+    
+    @pytest.mark.skipif(rsa is None, reason="rsa module not found")
+    def test_unlinked_keys_are_cached_separately(self):
+        """Test keys that were not generated together, used in both roles."""
+        rsa.cache_clear()
+        public_key, private_key = rsa.generate_keypair(61, 53)
+        e, n = public_key
+        d, _ = private_key
+        rsa.cache_clear()
+        text = "role check"
+        encrypted = rsa.encrypt(public_key, text)
+        # Using the public key in the decrypt role must not reuse its inverse
+        assert rsa.decrypt(public_key, encrypted) == ''.join(chr(pow(c, e, n)) for c in encrypted)
+        assert rsa.decrypt((d, n), encrypted) == text
+    
+    @pytest.mark.skipif(rsa is None, reason="rsa module not found")
+    def test_out_of_range_ciphertext_leaves_tables_intact(self):
+        """Test that ciphertext outside [0, n) raises without touching the shared table."""
+        rsa.cache_clear()
+        public_key, private_key = rsa.generate_keypair(61, 53)
+        n = public_key[1]
+        encrypted = rsa.encrypt(public_key, "ab")
+        for bad in (n, n + 7, -1):
+            with pytest.raises(ValueError):
+                rsa.decrypt(private_key, encrypted + [bad])
+        assert rsa.cache_info().symbols == 2
+        assert rsa.encrypt(public_key, "ab") == encrypted
+        assert rsa.decrypt(private_key, encrypted) == "ab"
+    
+    @pytest.mark.skipif(rsa is None, reason="rsa module not found")
+    def test_memory_limits(self):
+        """Test that key and symbol limits are enforced."""
+        rsa.cache_clear()
+        try:
+            rsa.set_cache_limits(max_keys=2, max_symbols=3)
+            public_key, private_key = rsa.generate_keypair(61, 53)
+            text = "abcdefg"
+            encrypted = rsa.encrypt(public_key, text)
+            assert rsa.decrypt(private_key, encrypted) == text
+            assert rsa.cache_info().symbols == 3
+            rsa.generate_keypair(17, 19)
+            rsa.generate_keypair(11, 13)
+            assert rsa.cache_info().keys == 2
+        finally:
+            rsa.set_cache_limits(max_keys=rsa.DEFAULT_CACHE_KEYS,
+                                 max_symbols=rsa.DEFAULT_CACHE_SYMBOLS)
+            rsa.cache_clear()
+
+
+class TestRSAParallel:
+    """Tests for the process-pool encrypt_many/decrypt_many API."""
+    
+    @pytest.mark.skipif(rsa is None, reason="rsa module not found")
+    def test_parallel_char_mode_matches_serial(self):
+        """Test parallel character mode against the serial functions."""
+        public_key, private_key = rsa.generate_keypair(bits=256, crt=True)
+        text = ''.join(chr(i) for i in range(32, 600))
+        expected = rsa.encrypt(public_key, text)
+        rsa.cache_clear()
+        encrypted = rsa.encrypt_many(public_key, text, workers=2, chunk_size=50, min_items=0)
+        assert encrypted == expected
+        rsa.cache_clear()
+        assert rsa.decrypt_many(private_key, encrypted, workers=2, chunk_size=50, min_items=0) == text
+    
+    @pytest.mark.skipif(rsa is None, reason="rsa module not found")
+    def test_parallel_block_mode_matches_serial(self):
+        """Test parallel block mode keeps the blocks in order."""
+        public_key, private_key = rsa.generate_keypair(bits=256)
+        text = "Ordered blocks \u00e9 " * 200
+        expected = rsa.encrypt(public_key, text, mode=rsa.BLOCK_MODE)
+        encrypted = rsa.encrypt_many(public_key, text, mode=rsa.BLOCK_MODE,
+                                     workers=2, chunk_size=7, min_items=0)
+        assert encrypted == expected
+        assert rsa.decrypt_many(private_key, encrypted, workers=2, chunk_size=7, min_items=0) == text
+    
+    @pytest.mark.skipif(rsa is None, reason="rsa module not found")
+    def test_small_inputs_run_serially(self, monkeypatch):
+        """Test that small inputs never start a process pool."""
+        public_key, private_key = rsa.generate_keypair(61, 53)
+        
+        def fail(*args, **kwargs):
+            raise AssertionError("process pool should not be used")
+        
+        monkeypatch.setattr(rsa, "_parallel_pow", fail)
+        encrypted = rsa.encrypt_many(public_key, "Hello!")
+        assert rsa.decrypt_many(private_key, encrypted) == "Hello!"
+        assert rsa.decrypt_many(private_key, []) == ""
+        big = "x" * 1000
+        assert rsa.decrypt_many(private_key, rsa.encrypt_many(public_key, big, workers=1), workers=1) == big
+
+
+class TestKeyPool:
+    """Tests for the pre-generated keypair pool."""
+    
+    @pytest.mark.skipif(keypool is None, reason="keypool module not found")
+    def test_keypairs_are_valid_and_distinct(self):
+        """Test that pooled keypairs work and are never handed out twice."""
+        with keypool.KeyPool(size=3, workers=2, prefill=(128,)) as pool:
+            keypairs = [pool.get_keypair(128) for _ in range(6)]
+            odd_public, odd_private = pool.get_keypair(129)
+        moduli = {public_key[1] for public_key, _ in keypairs}
+        assert len(moduli) == 6
+        for public_key, private_key in keypairs + [(odd_public, odd_private)]:
+            assert isinstance(private_key, rsa.PrivateKey)
+            assert rsa.decrypt(private_key, rsa.encrypt(public_key, "pooled")) == "pooled"
+        assert all(n.bit_length() == 128 for n in moduli)
+        assert odd_public[1].bit_length() == 129
+    
+    @pytest.mark.skipif(keypool is None, reason="keypool module not found")
+    def test_warm_and_cold_latency(self):
+        """Test that the latency report separates warm and cold requests."""
+        with keypool.KeyPool(size=2, workers=2, prefill=(96,)) as pool:
+            assert pool.wait_ready(96, timeout=30)
+            assert pool.ready(96) == 2
+            pool.get_keypair(96)
+            pool.get_keypair(96)
+            pool.get_keypair(112)
+            latency = pool.latency()
+        assert latency['warm'].count == 2
+        assert latency['cold'].count == 1
+        assert latency['warm'].p50 <= latency['warm'].max
+    
+    @pytest.mark.skipif(keypool is None, reason="keypool module not found")
+    def test_closed_pool_and_bad_arguments(self):
+        """Test errors for closed pools and unusable sizes."""
+        pool = keypool.KeyPool(size=1, workers=1, prefill=())
+        with pytest.raises(ValueError):
+            pool.get_keypair(4)
+        pool.close()
+        with pytest.raises(RuntimeError):
+            pool.get_keypair(64)
+        with pytest.raises(ValueError):
+            keypool.KeyPool(size=-1, prefill=())
+    
+    @pytest.mark.skipif(keypool is None, reason="keypool module not found")
+    def test_ready_keys_stay_out_of_the_cache(self):
+        """Test that pooled keys are only linked in the cache once handed out."""
+        rsa.cache_clear()
+        with keypool.KeyPool(size=2, workers=1, prefill=(64,)) as pool:
+            assert pool.wait_ready(64, timeout=30)
+            assert rsa.cache_info().keys == 0
+            public_key, private_key = pool.get_keypair(64)
+        assert rsa.cache_info().keys == 2
+        encrypted = rsa.encrypt(public_key, "linked")
+        assert rsa.decrypt(private_key, encrypted) == "linked"
+        assert rsa.cache_info().misses == len(set("linked"))
+        rsa.cache_clear()
+    
+    @pytest.mark.skipif(keypool is None, reason="keypool module not found")
+    def test_sizes_without_two_distinct_primes_are_rejected(self):
+        """Test that sizes whose halves have a single prime raise instead of refilling forever."""
+        with keypool.KeyPool(size=1, workers=1, prefill=()) as pool:
+            for bits in (6, 8):
+                with pytest.raises(ValueError):
+                    pool.get_keypair(bits)
+            assert pool.get_keypair(keypool.MIN_BITS, timeout=30)[0][1].bit_length() == keypool.MIN_BITS
+        with pytest.raises(ValueError):
+            keypool.KeyPool(size=1, workers=1, prefill=(8,))
+    
+    @pytest.mark.skipif(keypool is None, reason="keypool module not found")
+    def test_failed_search_is_not_raised_again(self):
+        """Test that a failed prime search does not fail every later request."""
+        from concurrent.futures import Future
+        with keypool.KeyPool(size=1, workers=1, prefill=()) as pool:
+            future = Future()
+            future.set_exception(OSError("worker lost"))
+            reserve = pool._reserve(64)
+            with pool._lock:
+                reserve.pending[32] += 1
+            pool._prime_done(reserve, 32, future)
+            public_key, private_key = pool.get_keypair(64, timeout=30)
+        assert rsa.decrypt(private_key, rsa.encrypt(public_key, "recovered")) == "recovered"
+    
+    @pytest.mark.skipif(keypool is None, reason="keypool module not found")
+    def test_concurrent_callers_link_every_key(self):
+        """Test that threads taking keypairs at once each get a distinct, linked keypair."""
+        from concurrent.futures import ThreadPoolExecutor
+        rsa.cache_clear()
+        with keypool.KeyPool(size=8, workers=2, prefill=(64,)) as pool:
+            assert pool.wait_ready(64, timeout=30)
+            with ThreadPoolExecutor(max_workers=8) as threads:
+                keypairs = list(threads.map(lambda _: pool.get_keypair(64, timeout=30), range(12)))
+        assert len({public_key for public_key, _ in keypairs}) == 12
+        assert rsa.cache_info().keys == 24
+        for public_key, private_key in keypairs:
+            assert rsa.decrypt(private_key, rsa.encrypt(public_key, "threaded")) == "threaded"
+        assert rsa.cache_info().misses == 12 * len(set("threaded"))
+        rsa.cache_clear()
+    
+    @pytest.mark.skipif(keypool is None, reason="keypool module not found")
+    def test_percentiles(self):
+        """Test the nearest-rank percentile summary."""
+        stats = keypool.latency_stats([i / 100 for i in range(100, 0, -1)])
+        assert stats == keypool.LatencyStats(100, 0.5, 0.9, 0.99, 1.0)
+        assert keypool.latency_stats([]).count == 0
+
+
 class TestHack:
     """Tests for Caesar cipher hacking."""
     
@@ -282,6 +845,219 @@ class TestHack:
         assert 1 <= result[1] <= 25 or result[1] == 0
 
 
+class TestHackEngine:
+    """Tests for the histogram-based chi-squared cracker."""
+    
+    SAMPLE_TEXT = (
+        "It was the best of times, it was the worst of times, it was the age of "
+        "wisdom, it was the age of foolishness, it was the epoch of belief, it was "
+        "the epoch of incredulity, it was the season of Light, it was the season "
+        "of Darkness, it was the spring of hope, it was the winter of despair."
+    )
+    
+    @pytest.mark.skipif(hack is None, reason="hack module not found")
+    def test_histogram(self):
+        """Test the printable-range histogram."""
+        hist = hack.histogram("aab \u00e9~")
+        assert len(hist) == 95
+        assert hist[ord('a') - 32] == 2
+        assert hist[0] == 1
+        assert hist[ord('~') - 32] == 1
+        assert sum(hist) == 5
+    
+    @pytest.mark.skipif(hack is None or caesar is None, reason="hack or caesar module not found")
+    def test_all_shifts_recovered(self):
+        """Test that every shift of a paragraph is recovered."""
+        for shift in range(95):
+            ciphertext = caesar.encrypt(self.SAMPLE_TEXT, shift)
+            assert hack.hack(ciphertext) == (self.SAMPLE_TEXT, shift)
+    
+    @pytest.mark.skipif(hack is None or caesar is None, reason="hack or caesar module not found")
+    def test_matches_trial_decryption(self):
+        """Test that histogram rotation agrees with decrypting every candidate."""
+        for shift in [1, 30, 77]:
+            ciphertext = caesar.encrypt(self.SAMPLE_TEXT, shift)
+            assert hack.hack(ciphertext) == hack._hack_by_decryption(ciphertext)
+    
+    @pytest.mark.skipif(hack is None or caesar is None, reason="hack or caesar module not found")
+    def test_bounded_sample(self):
+        """Test cracking from a bounded sample of a large input."""
+        plaintext = self.SAMPLE_TEXT * 200
+        ciphertext = caesar.encrypt(plaintext, 58)
+        assert hack.hack(ciphertext, sample_size=2000) == (plaintext, 58)
+        assert hack.hack(ciphertext.encode('ascii'), sample_size=2000) == (plaintext.encode('ascii'), 58)
+
+
+class TestHackVigenere:
+    """Tests for Vigenere key recovery."""
+    
+    @pytest.mark.skipif(hack is None or vigenere is None, reason="hack or vigenere module not found")
+    def test_key_recovered(self):
+        """Test key and plaintext recovery for several key lengths."""
+        plaintext = TestHackEngine.SAMPLE_TEXT * 2
+        for key in ["A", "KEY", "LEMON", "VIGENERE", "SECRETKEYWORDX"]:
+            ciphertext = vigenere.encrypt(plaintext, key)
+            assert hack.hack_vigenere(ciphertext) == (plaintext, key)
+    
+    @pytest.mark.skipif(hack is None or vigenere is None, reason="hack or vigenere module not found")
+    def test_key_length_estimate(self):
+        """Test the index-of-coincidence key length estimate."""
+        plaintext = TestHackEngine.SAMPLE_TEXT * 2
+        assert hack.key_length(vigenere.encrypt(plaintext, "LEMON")) == 5
+        assert hack.key_length(vigenere.encrypt(plaintext, "crypto")) == 6
+        assert hack.index_of_coincidence(hack.histogram("aaaa")) == 1.0
+        assert hack.index_of_coincidence(hack.histogram("abcd")) == 0.0
+    
+    @pytest.mark.skipif(hack is None or vigenere is None, reason="hack or vigenere module not found")
+    def test_sample_and_non_ascii(self):
+        """Test prefix sampling and non-ASCII characters in the ciphertext."""
+        plaintext = (TestHackEngine.SAMPLE_TEXT + " caf\u00e9 ") * 30
+        ciphertext = vigenere.encrypt(plaintext, "LEMON")
+        assert hack.hack_vigenere(ciphertext, sample_size=1500) == (plaintext, "LEMON")
+
+
+class TestHackMany:
+    """Tests for batch cracking with a shared English model."""
+    
+    @pytest.mark.skipif(hack is None or caesar is None, reason="hack or caesar module not found")
+    def test_results_in_input_order(self):
+        """Test that parallel batch results come back in input order."""
+        plaintexts = [TestHackEngine.SAMPLE_TEXT[i:] for i in range(0, 100, 10)]
+        ciphertexts = [caesar.encrypt(text, shift) for shift, text in enumerate(plaintexts, 3)]
+        results = hack.hack_many(ciphertexts, workers=2, chunk_size=3, min_items=0)
+        assert [(r.plaintext, r.shift) for r in results] == [
+            (text, shift) for shift, text in enumerate(plaintexts, 3)
+        ]
+        assert results == hack.hack_many(ciphertexts, workers=1)
+    
+    @pytest.mark.skipif(hack is None or caesar is None, reason="hack or caesar module not found")
+    def test_confidence(self):
+        """Test that English decryptions get higher confidence than noise."""
+        english = hack.MODEL.crack(caesar.encrypt(TestHackEngine.SAMPLE_TEXT, 21))
+        noise = hack.MODEL.crack("Qz#8&kv@Lp(=]x_9%Rm^`w~3")
+        assert 0.0 <= noise.confidence < english.confidence <= 1.0
+        assert english.confidence > 0.5
+        assert hack.hack_many([]) == []
+    
+    @pytest.mark.skipif(hack is None, reason="hack module not found")
+    def test_model_is_compact_and_picklable(self):
+        """Test that the model uses arrays and survives pickling."""
+        import array
+        import pickle
+        model = pickle.loads(pickle.dumps(hack.MODEL))
+        assert isinstance(model.expected, array.array)
+        assert list(model.expected) == list(hack.MODEL.expected)
+        assert model.words == hack.MODEL.words
+        hist = hack.histogram(TestHackEngine.SAMPLE_TEXT)
+        assert model.best_shift(hist) == 0
+
+
+class TestHackStream:
+    """Tests for the early-exit streaming Caesar cracker."""
+    
+    @pytest.mark.skipif(hack is None or caesar is None, reason="hack or caesar module not found")
+    def test_early_exit(self):
+        """Test that the shift is found from a small prefix of a long stream."""
+        import io
+        plaintext = (TestHackEngine.SAMPLE_TEXT * 400).encode('ascii')
+        source = io.BytesIO(caesar.encrypt(plaintext, 61))
+        result = hack.hack_stream(source, chunk_size=256)
+        assert result.shift == 61
+        assert result.decided
+        assert result.bytes_examined < len(plaintext) // 50
+        output = io.BytesIO()
+        assert result.write_to(output) == len(plaintext)
+        assert output.getvalue() == plaintext
+    
+    @pytest.mark.skipif(hack is None or caesar is None, reason="hack or caesar module not found")
+    def test_read_limit_and_short_input(self):
+        """Test the read limit and streams shorter than the margin needs."""
+        import io
+        plaintext = TestHackEngine.SAMPLE_TEXT.encode('ascii')
+        ciphertext = caesar.encrypt(plaintext, 9)
+        result = hack.hack_stream(io.BytesIO(ciphertext), chunk_size=16, margin=1e9, max_bytes=64)
+        assert not result.decided
+        assert result.bytes_examined == 64
+        assert b''.join(result.chunks()) == caesar.decrypt(ciphertext, result.shift)
+        result = hack.hack_stream(io.BytesIO(ciphertext), margin=1e9)
+        assert not result.decided and result.shift == 9
+        assert hack.hack_stream(io.BytesIO(b'')).bytes_examined == 0
+
+
+class TestCommandLine:
+    """Tests for the streaming python -m lab1 pipeline."""
+    
+    TEXT = (TestHackEngine.SAMPLE_TEXT + " caf\u00e9 \u2603\n") * 40
+    
+    def run_cli(self, tmp_path, name, *args):
+        output = tmp_path / name
+        assert cli.main([*args, '-o', str(output), '--chunk-size', '97']) == 0
+        return output
+    
+    @pytest.fixture
+    def plain(self, tmp_path):
+        path = tmp_path / "plain.txt"
+        path.write_bytes(self.TEXT.encode('utf-8'))
+        return path
+    
+    @pytest.mark.skipif(cli is None, reason="cli module not found")
+    def test_caesar_and_vigenere_match_library(self, tmp_path, plain):
+        """Test that streamed output equals the library functions."""
+        out = self.run_cli(tmp_path, "c.txt", "caesar", "-s", "-7", str(plain))
+        assert out.read_text(encoding='utf-8') == caesar.encrypt(self.TEXT, -7)
+        back = self.run_cli(tmp_path, "c2.txt", "caesar", "-s", "-7", "-d", str(out))
+        assert back.read_bytes() == plain.read_bytes()
+        
+        out = self.run_cli(tmp_path, "v.txt", "vigenere", "-k", "LEMON", str(plain))
+        assert out.read_text(encoding='utf-8') == vigenere.encrypt(self.TEXT, "LEMON")
+        back = self.run_cli(tmp_path, "v2.txt", "vigenere", "-k", "LEMON", "-d", str(out))
+        assert back.read_bytes() == plain.read_bytes()
+    
+    @pytest.mark.skipif(cli is None, reason="cli module not found")
+    def test_rsa_roundtrip(self, tmp_path, plain):
+        """Test RSA key generation and both framings through files."""
+        key = self.run_cli(tmp_path, "key.json", "rsa", "keygen", "--bits", "256")
+        for extra in [[], ["--block"]]:
+            out = self.run_cli(tmp_path, "r.txt", "rsa", "encrypt", "--key-file", str(key),
+                               *extra, str(plain))
+            back = self.run_cli(tmp_path, "r2.txt", "rsa", "decrypt", "--key-file", str(key),
+                                str(out))
+            assert back.read_bytes() == plain.read_bytes()
+    
+    @pytest.mark.skipif(cli is None, reason="cli module not found")
+    def test_block_stream_decrypts_with_library(self, tmp_path, plain):
+        """Test that multi-chunk block-mode output decrypts through the library API."""
+        import json
+        key = self.run_cli(tmp_path, "key.json", "rsa", "keygen", "--bits", "256")
+        data = json.loads(key.read_text())
+        private_key = rsa.PrivateKey(data['d'], data['n'], data['p'], data['q'])
+        out = self.run_cli(tmp_path, "r.txt", "rsa", "encrypt", "--key-file", str(key),
+                           "--block", str(plain))
+        ciphertext = [int(value) for value in out.read_text().split()]
+        assert sum(value >= data['n'] for value in ciphertext) > 1
+        assert rsa.decrypt(private_key, ciphertext) == self.TEXT
+        assert rsa.decrypt_many(private_key, ciphertext, workers=2, min_items=1) == self.TEXT
+        with pytest.raises(ValueError):
+            rsa.decrypt(private_key, ciphertext[:-1])
+    
+    @pytest.mark.skipif(cli is None, reason="cli module not found")
+    def test_hack_and_stdin(self, tmp_path, plain, monkeypatch, capsys):
+        """Test cracking from stdin with a throughput summary."""
+        import io
+        ciphertext = caesar.encrypt(plain.read_bytes(), 40)
+        monkeypatch.setattr("sys.stdin", io.TextIOWrapper(io.BytesIO(ciphertext)))
+        out = tmp_path / "h.txt"
+        assert cli.main(["hack", "--stats", "-o", str(out)]) == 0
+        assert out.read_bytes() == plain.read_bytes()
+        err = capsys.readouterr().err
+        assert "shift 40" in err
+        assert f"read {len(ciphertext)} bytes" in err
+        
+        encrypted = self.run_cli(tmp_path, "v.txt", "vigenere", "-k", "CRYPTO", str(plain))
+        out = self.run_cli(tmp_path, "hv.txt", "hack", "--vigenere", str(encrypted))
+        assert out.read_bytes() == plain.read_bytes()
+
+
 class TestIntegration:
     """Integration tests across multiple modules."""
     
@@ -339,4 +1115,274 @@ class TestErrorHandling:
         assert encrypted == []
         
         decrypted = rsa.decrypt(private_key, [])
-        assert decrypted == ""
\ No newline at end of file
+        assert decrypted == ""
+
+
+# Performance tests
+class TestBenchmarkSuite:
+    """Tests for the throughput benchmark runner."""
+    
+    @pytest.mark.skipif(bench is None, reason="bench module not found")
+    def test_quick_run_covers_every_area(self):
+        """Test that a quick run measures each cipher, RSA and hack."""
+        results = bench.run(["caesar.encrypt bytes", "vigenere.encrypt str",
+                             "rsa.encrypt block 512", "hack.hack 1000"],
+                            quick=True, min_time=0.001, repeat=1)
+        assert list(results) == [name + bench.QUICK_SUFFIX for name in (
+            "caesar.encrypt bytes", "vigenere.encrypt str", "rsa.encrypt block 512",
+            "hack.hack 1000")]
+        assert [unit for _, unit in results.values()] == ["MB/s", "MB/s", "ops/s", "cracks/s"]
+        assert all(value > 0 for value, _ in results.values())
+    
+    @pytest.mark.skipif(bench is None, reason="bench module not found")
+    def test_filtered_run_skips_other_setups(self, monkeypatch):
+        """Test that benchmarks left out by the filter never prepare their inputs."""
+        def no_keys(*args, **kwargs):
+            raise AssertionError("RSA keys generated for a Caesar-only run")
+        monkeypatch.setattr(bench.rsa, "generate_keypair", no_keys)
+        assert len(bench.benchmarks()) > len(bench.cipher_benchmarks(1))
+        results = bench.run(["caesar"], quick=True, min_time=0.001, repeat=1)
+        assert results and all(name.startswith("caesar.") for name in results)
+    
+    @pytest.mark.skipif(bench is None, reason="bench module not found")
+    def test_compare_flags_regressions(self):
+        """Test that only slowdowns beyond the tolerance are flagged."""
+        results = {"a": (70.0, "MB/s"), "b": (80.0, "MB/s"), "c": (5.0, "ops/s")}
+        rows = bench.compare(results, {"a": 100.0, "b": 100.0}, tolerance=0.25)
+        assert [row.regression for row in rows] == [True, False, False]
+        assert rows[2].baseline is None and rows[2].ratio is None
+        report = bench.format_report(rows, tolerance=0.25)
+        assert "REGRESSION" in report.splitlines()[1]
+        assert "1 regression(s)" in report
+    
+    @pytest.mark.skipif(bench is None, reason="bench module not found")
+    def test_main_writes_report_history_and_baseline(self, tmp_path):
+        """Test the report file, JSON history and baseline round trip."""
+        import json
+        output = tmp_path / "bench_output.txt"
+        history = tmp_path / "history.json"
+        baseline = tmp_path / "baseline.json"
+        argv = ["--quick", "-k", "caesar.encrypt bytes", "--min-time", "0.001",
+                "--repeat", "1", "--output", str(output), "--history", str(history),
+                "--baseline", str(baseline)]
+        name = "caesar.encrypt bytes" + bench.QUICK_SUFFIX
+        baseline.write_text(json.dumps({"caesar.encrypt bytes": 1e12}))
+        assert bench.main(argv + ["--update-baseline"]) == 0
+        # A quick run adds its own entry and leaves the full-size one alone.
+        assert json.loads(baseline.read_text())["caesar.encrypt bytes"] == 1e12
+        assert name in json.loads(baseline.read_text())
+        assert name in output.read_text()
+        
+        baseline.write_text(json.dumps({name: 1e12}))
+        assert bench.main(argv) == 0
+        assert "REGRESSION" in output.read_text()
+        assert bench.main(argv + ["--check"]) == 1
+        runs = json.loads(history.read_text())
+        assert len(runs) == 3
+        assert runs[-1]["results"][name]["unit"] == "MB/s"
+    
+    @pytest.mark.skipif(bench is None, reason="bench module not found")
+    def test_history_is_bounded(self, tmp_path):
+        """Test that the JSON history keeps only the most recent runs."""
+        import json
+        history = tmp_path / "history.json"
+        for value in range(5):
+            bench.append_history(str(history), {"x": (float(value), "ops/s")}, limit=3)
+        runs = json.loads(history.read_text())
+        assert [run["results"]["x"]["value"] for run in runs] == [2.0, 3.0, 4.0]
+
+
+class TestPerformance:
+    """Test performance characteristics of the bulk cipher engines."""
+    
+    @pytest.mark.skipif(caesar is None, reason="caesar module not found")
+    def test_caesar_table_faster_than_per_character(self):
+        """Test that the table engine beats the per-character path."""
+        import time
+        
+        text = "Some printable log line, with numbers 12345!\n" * 20000
+        
+        start_time = time.perf_counter()
+        fast = caesar.encrypt(text, 17)
+        fast_time = time.perf_counter() - start_time
+        
+        start_time = time.perf_counter()
+        slow = caesar._encrypt_chars(text, 17)
+        slow_time = time.perf_counter() - start_time
+        
+        assert fast == slow
+        assert fast_time * 10 < slow_time, "Table engine should be much faster"
+    
+    @pytest.mark.skipif(vigenere is None, reason="vigenere module not found")
+    def test_vigenere_batched_faster_than_per_character(self):
+        """Test that the batched engine beats the per-character path."""
+        import time
+        
+        text = "Some printable log line, with numbers 12345!\n" * 20000
+        offsets = vigenere.clean_key("LEMON")
+        
+        start_time = time.perf_counter()
+        fast = vigenere.encrypt(text, "LEMON")
+        fast_time = time.perf_counter() - start_time
+        
+        start_time = time.perf_counter()
+        slow = vigenere._encrypt_chars(text, offsets)
+        slow_time = time.perf_counter() - start_time
+        
+        assert fast == slow
+        assert fast_time * 10 < slow_time, "Batched engine should be much faster"
+    
+    @pytest.mark.skipif(caesar is None or vigenere is None,
+                        reason="caesar or vigenere module not found")
+    def test_inplace_peak_memory(self):
+        """Test that the in-place path allocates far less than a new result."""
+        import tracemalloc
+        
+        size = 8 << 20
+        buf = bytearray(b"Some printable log line, with numbers 12345!\n" * (size // 46))
+        
+        for module, key in [(caesar, 17), (vigenere, "LEMON")]:
+            tracemalloc.start()
+            module.encrypt(buf, key)
+            _, copy_peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            
+            tracemalloc.start()
+            module.encrypt_inplace(buf, key)
+            _, inplace_peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            
+            assert copy_peak >= len(buf)
+            assert inplace_peak * 10 < copy_peak, "In-place path should not copy the buffer"
+    
+    @pytest.mark.skipif(keypool is None, reason="keypool module not found")
+    def test_warm_keypool_faster_than_generation(self):
+        """Test that a warm pool serves 1024-bit keys far faster than keygen."""
+        import time
+        
+        with keypool.KeyPool(size=4, workers=2, prefill=(1024,)) as pool:
+            assert pool.wait_ready(1024, timeout=60)
+            for _ in range(4):
+                pool.get_keypair(1024)
+            warm = pool.latency()['warm']
+        
+        start_time = time.perf_counter()
+        rsa.generate_keypair(bits=1024)
+        keygen_time = time.perf_counter() - start_time
+        
+        assert warm.count == 4
+        assert warm.max < 0.01, "Warm keypool requests should not wait for primes"
+        assert warm.p50 * 10 < keygen_time
+    
+    @pytest.mark.skipif(primes is None, reason="primes module not found")
+    def test_miller_rabin_faster_than_trial_division(self):
+        """Test that is_prime beats trial division on a 40-bit prime."""
+        import time
+        
+        n = 10**12 + 39
+        
+        start_time = time.perf_counter()
+        assert primes.is_prime(n)
+        fast_time = time.perf_counter() - start_time
+        
+        start_time = time.perf_counter()
+        assert primes._is_prime_trial(n)
+        slow_time = time.perf_counter() - start_time
+        
+        assert fast_time * 10 < slow_time, "Miller-Rabin should be much faster"
+    
+    @pytest.mark.skipif(rsa is None, reason="rsa module not found")
+    def test_rsa_block_mode_faster_than_char_mode(self):
+        """Test that block mode needs far fewer modexps than character mode."""
+        import time
+        
+        public_key, private_key = rsa.generate_keypair(bits=512)
+        # Distinct characters, so the character-mode cache cannot help
+        text = ''.join(chr(i) for i in range(0x100, 0x100 + 1000))
+        
+        start_time = time.perf_counter()
+        block = rsa.encrypt(public_key, text, mode=rsa.BLOCK_MODE)
+        assert rsa.decrypt(private_key, block) == text
+        block_time = time.perf_counter() - start_time
+        
+        start_time = time.perf_counter()
+        chars = rsa.encrypt(public_key, text)
+        rsa.cache_clear()
+        assert rsa.decrypt(private_key, chars) == text
+        char_time = time.perf_counter() - start_time
+        
+        assert len(block) * 30 < len(chars)
+        assert block_time * 10 < char_time, "Block mode should be much faster"
+    
+    @pytest.mark.skipif(rsa is None, reason="rsa module not found")
+    def test_rsa_crt_decrypt_faster(self):
+        """Test that CRT decryption beats the plain (d, n) path."""
+        import time
+        
+        public_key, private_key = rsa.generate_keypair(bits=1024, crt=True)
+        plain_key = tuple(private_key)
+        encrypted = rsa.encrypt(public_key, "CRT benchmark message. " * 40, mode=rsa.BLOCK_MODE)
+        
+        start_time = time.perf_counter()
+        fast = rsa.decrypt(private_key, encrypted)
+        crt_time = time.perf_counter() - start_time
+        
+        start_time = time.perf_counter()
+        slow = rsa.decrypt(plain_key, encrypted)
+        plain_time = time.perf_counter() - start_time
+        
+        assert fast == slow
+        assert crt_time * 2 < plain_time, "CRT decryption should be faster"
+    
+    @pytest.mark.skipif(rsa is None, reason="rsa module not found")
+    def test_rsa_char_cache_faster(self):
+        """Test that cached character mode beats per-character pow."""
+        import time
+        
+        public_key, private_key = rsa.generate_keypair(bits=512)
+        d, n = private_key
+        encrypted = rsa.encrypt(public_key, "The same few symbols, over and over. " * 100)
+        
+        start_time = time.perf_counter()
+        fast = rsa.decrypt(private_key, encrypted)
+        cached_time = time.perf_counter() - start_time
+        
+        start_time = time.perf_counter()
+        slow = ''.join(chr(pow(c, d, n)) for c in encrypted)
+        pow_time = time.perf_counter() - start_time
+        
+        assert fast == slow
+        assert cached_time * 10 < pow_time, "Cached lookups should be much faster"
+    
+    @pytest.mark.skipif(hack is None or caesar is None, reason="hack or caesar module not found")
+    def test_hack_histogram_faster_than_trial_decryption(self):
+        """Test that scoring one histogram beats 95 trial decryptions."""
+        import time
+        
+        ciphertext = caesar.encrypt(TestHackEngine.SAMPLE_TEXT * 300, 33)
+        
+        start_time = time.perf_counter()
+        fast = hack.hack(ciphertext)
+        fast_time = time.perf_counter() - start_time
+        
+        start_time = time.perf_counter()
+        slow = hack._hack_by_decryption(ciphertext)
+        slow_time = time.perf_counter() - start_time
+        
+        assert fast == slow
+        assert fast_time * 10 < slow_time, "Histogram cracker should be much faster"
+    
+    @pytest.mark.skipif(hack is None or vigenere is None, reason="hack or vigenere module not found")
+    def test_hack_vigenere_scales_linearly(self):
+        """Test that Vigenere key recovery stays fast on long texts."""
+        import time
+        
+        plaintext = TestHackEngine.SAMPLE_TEXT * 2000
+        ciphertext = vigenere.encrypt(plaintext, "LEMON")
+        
+        start_time = time.perf_counter()
+        result = hack.hack_vigenere(ciphertext)
+        elapsed = time.perf_counter() - start_time
+        
+        assert result == (plaintext, "LEMON")
+        assert elapsed < 2.0, "Vigenere key recovery took too long"
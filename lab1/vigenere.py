@@ -0,0 +1,184 @@
+"""Vigenere cipher over the printable ASCII range (32-126).
+
+The key is cleaned to its letters and read case-insensitively (``A`` = 0,
+``B`` = 1, ...).  Each character of the text is shifted like a Caesar
+cipher by the key letter at its position, the key cycling over the whole
+text; characters outside the printable range are passed through but still
+consume a key position.
+
+Whole buffers are processed at once: with a short key the text is split
+into one column per key letter and every column is translated with the
+cached Caesar table for that letter.  Long keys use NumPy when it is
+installed, tiling the key offsets against an array of code points.
+
+``encrypt_into``/``decrypt_into`` and the ``*_inplace`` variants write into
+a caller-supplied writable buffer, working through it in ``CHUNK_SIZE``
+pieces so no copy of the whole payload is ever made.
+"""
+
+import caesar
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+CHUNK_SIZE = caesar.CHUNK_SIZE
+
+# Above this key length the column engine degenerates towards one slice per
+# character, so the NumPy engine is preferred when it is available.
+COLUMN_KEY_LIMIT = 256
+
+
+def clean_key(key):
+    """Return the list of shifts for ``key``, ignoring non-letters."""
+    offsets = [ord(ch) - ord('A') for ch in key.upper() if 'A' <= ch <= 'Z']
+    if not offsets:
+        raise ValueError("key must contain at least one letter")
+    return offsets
+
+
+def _encrypt_chars(text, offsets, phase=0):
+    """Reference per-character path, also used for non-ASCII strings."""
+    period = len(offsets)
+    return ''.join(caesar._shift_char(ch, offsets[(phase + i) % period])
+                   for i, ch in enumerate(text))
+
+
+def _translate_columns(data, offsets, phase):
+    period = len(offsets)
+    out = bytearray(len(data))
+    for i in range(min(period, len(data))):
+        table = caesar.byte_table(offsets[(phase + i) % period])
+        out[i::period] = data[i::period].translate(table)
+    return out
+
+
+def _translate_numpy(data, offsets, phase):
+    codes = np.frombuffer(data, dtype=np.uint8)
+    rotated = offsets[phase:] + offsets[:phase]
+    shifts = np.resize(np.array(rotated, dtype=np.int16), codes.shape)
+    printable = (codes >= caesar.FIRST) & (codes <= caesar.LAST)
+    shifted = (codes.astype(np.int16) - caesar.FIRST + shifts) % caesar.RANGE + caesar.FIRST
+    return bytearray(np.where(printable, shifted, codes).astype(np.uint8).tobytes())
+
+
+def translate_bytes(data, offsets, phase=0):
+    """Shift bytes-like ``data`` by the cycled ``offsets`` starting at ``phase``.
+
+    Returns a new ``bytearray``.
+    """
+    if not isinstance(data, (bytes, bytearray)):
+        data = bytes(data)
+    if np is not None and len(offsets) > COLUMN_KEY_LIMIT:
+        return _translate_numpy(data, offsets, phase)
+    return _translate_columns(data, offsets, phase)
+
+
+def _translate(text, offsets):
+    if isinstance(text, str):
+        if not text.isascii():
+            return _encrypt_chars(text, offsets)
+        return translate_bytes(text.encode('ascii'), offsets).decode('ascii')
+    result = translate_bytes(text, offsets)
+    return result if isinstance(text, bytearray) else bytes(result)
+
+
+def encrypt(text, key):
+    """Encrypt ``text`` (``str`` or bytes-like) with the Vigenere ``key``."""
+    return _translate(text, clean_key(key))
+
+
+def decrypt(text, key):
+    """Decrypt ``text`` (``str`` or bytes-like) with the Vigenere ``key``."""
+    return _translate(text, [-offset for offset in clean_key(key)])
+
+
+def translate_into(src, dst, offsets, phase=0, chunk_size=CHUNK_SIZE):
+    """Write ``src`` shifted by the cycled ``offsets`` into the start of ``dst``.
+
+    ``src`` is any bytes-like object and ``dst`` a writable buffer at least
+    as long; they may be the same buffer.  Returns the number of bytes
+    written.
+    """
+    src, dst = caesar._buffers(src, dst)
+    size = len(src)
+    period = len(offsets)
+    for start in range(0, size, chunk_size):
+        end = min(start + chunk_size, size)
+        dst[start:end] = translate_bytes(src[start:end].tobytes(), offsets,
+                                         (phase + start) % period)
+    return size
+
+
+def encrypt_into(src, dst, key):
+    """Encrypt bytes-like ``src`` into the writable buffer ``dst``."""
+    return translate_into(src, dst, clean_key(key))
+
+
+def decrypt_into(src, dst, key):
+    """Decrypt bytes-like ``src`` into the writable buffer ``dst``."""
+    return translate_into(src, dst, [-offset for offset in clean_key(key)])
+
+
+def encrypt_inplace(buf, key):
+    """Encrypt the writable buffer ``buf`` in place; returns its length."""
+    return encrypt_into(buf, buf, key)
+
+
+def decrypt_inplace(buf, key):
+    """Decrypt the writable buffer ``buf`` in place; returns its length."""
+    return decrypt_into(buf, buf, key)
+
+
+class VigenereStream:
+    """Incremental Vigenere transform that carries the key phase across chunks.
+
+    Feeding a text to :meth:`update` in pieces of any size produces the same
+    bytes as a single :func:`encrypt` (or :func:`decrypt`) call.
+    """
+
+    def __init__(self, key, decrypt=False):
+        offsets = clean_key(key)
+        self.offsets = [-offset for offset in offsets] if decrypt else offsets
+        self.phase = 0
+
+    def update(self, chunk):
+        """Transform the next ``chunk`` and return it.
+
+        A ``str`` chunk gives a ``str`` and advances the key by characters;
+        a bytes-like chunk gives ``bytes`` and advances it by bytes.
+        """
+        if isinstance(chunk, str):
+            if chunk.isascii():
+                data = translate_bytes(chunk.encode('ascii'), self.offsets, self.phase)
+                result = data.decode('ascii')
+            else:
+                result = _encrypt_chars(chunk, self.offsets, self.phase)
+        else:
+            result = bytes(translate_bytes(chunk, self.offsets, self.phase))
+        self.phase = (self.phase + len(result)) % len(self.offsets)
+        return result
+
+
+def _translate_stream(src, dst, stream, chunk_size):
+    src = caesar.binary_stream(src)
+    dst = caesar.binary_stream(dst)
+    total = 0
+    while True:
+        chunk = src.read(chunk_size)
+        if not chunk:
+            break
+        dst.write(stream.update(chunk))
+        total += len(chunk)
+    return total
+
+
+def encrypt_stream(src, dst, key, chunk_size=CHUNK_SIZE):
+    """Encrypt ``src`` into ``dst`` in fixed memory; returns bytes processed."""
+    return _translate_stream(src, dst, VigenereStream(key), chunk_size)
+
+
+def decrypt_stream(src, dst, key, chunk_size=CHUNK_SIZE):
+    """Decrypt ``src`` into ``dst`` in fixed memory; returns bytes processed."""
+    return _translate_stream(src, dst, VigenereStream(key, decrypt=True), chunk_size)
@@ -0,0 +1,549 @@
+"""Minesweeper board, cells and game rules.
+
+A :class:`Board` stores each cell in a single byte of one ``bytearray``:
+
+    bits 0-3  adjacent_mines (0-8)
+    bit 4     is_mine
+    bit 5     is_revealed
+    bit 6     is_flagged
+
+so a board costs about one byte per cell, whatever its size.  The board
+still reads like a grid of cells: ``board[r][c]`` returns a :class:`Cell`,
+a small ``__slots__`` view onto that byte, and assigning to its attributes
+writes straight back into the board.  ``Cell()`` on its own owns a private
+byte, so standalone cells (and plain lists of them) keep working.
+"""
+
+import random
+import re
+from array import array
+from bisect import bisect_right
+from collections import namedtuple
+
+ADJACENT_MASK = 0x0F
+MINE = 0x10
+REVEALED = 0x20
+FLAGGED = 0x40
+
+PLAYING = 'playing'
+WON = 'won'
+LOST = 'lost'
+
+# Maps a cell byte to 1 when it holds a mine.
+_MINE_FLAG = bytes(int(bool(value & MINE)) for value in range(256))
+
+# Maps a cell byte to 1 when it is a safe cell that is still closed.
+_CLOSED_SAFE = bytes(int(not value & (MINE | REVEALED)) for value in range(256))
+
+# Swaps 0 and 1.
+_INVERT = bytes([1, 0]) + bytes(254)
+
+
+def _bit_property(bit, doc):
+    def get(self):
+        return bool(self._cells[self._index] & bit)
+
+    def set(self, value):
+        if value:
+            self._cells[self._index] |= bit
+        else:
+            self._cells[self._index] &= ~bit & 0xFF
+
+    return property(get, set, doc=doc)
+
+
+class Cell:
+    """One minesweeper cell: a view onto its byte in a board.
+
+    ``Cell()`` creates a detached cell with the usual defaults.
+    """
+
+    __slots__ = ('_cells', '_index')
+
+    def __init__(self, is_mine=False, is_revealed=False, is_flagged=False, adjacent_mines=0):
+        self._cells = bytearray(1)
+        self._index = 0
+        self.is_mine = is_mine
+        self.is_revealed = is_revealed
+        self.is_flagged = is_flagged
+        self.adjacent_mines = adjacent_mines
+
+    @classmethod
+    def _view(cls, cells, index):
+        cell = cls.__new__(cls)
+        cell._cells = cells
+        cell._index = index
+        return cell
+
+    is_mine = _bit_property(MINE, "Whether the cell holds a mine.")
+    is_revealed = _bit_property(REVEALED, "Whether the cell has been opened.")
+    is_flagged = _bit_property(FLAGGED, "Whether the player has flagged the cell.")
+
+    @property
+    def adjacent_mines(self):
+        """Number of mines in the eight neighbouring cells."""
+        return self._cells[self._index] & ADJACENT_MASK
+
+    @adjacent_mines.setter
+    def adjacent_mines(self, value):
+        if not 0 <= value <= 8:
+            raise ValueError("adjacent_mines must be between 0 and 8")
+        self._cells[self._index] = self._cells[self._index] & ~ADJACENT_MASK & 0xFF | value
+
+    def __repr__(self):
+        return (f"Cell(is_mine={self.is_mine}, is_revealed={self.is_revealed}, "
+                f"is_flagged={self.is_flagged}, adjacent_mines={self.adjacent_mines})")
+
+
+class _Row:
+    """One row of a :class:`Board`, indexable like a list of cells."""
+
+    __slots__ = ('_cells', '_start', '_cols')
+
+    def __init__(self, cells, start, cols):
+        self._cells = cells
+        self._start = start
+        self._cols = cols
+
+    def __len__(self):
+        return self._cols
+
+    def __getitem__(self, col):
+        if isinstance(col, slice):
+            return [self[c] for c in range(*col.indices(self._cols))]
+        if col < 0:
+            col += self._cols
+        if not 0 <= col < self._cols:
+            raise IndexError("column index out of range")
+        return Cell._view(self._cells, self._start + col)
+
+    def __iter__(self):
+        for index in range(self._start, self._start + self._cols):
+            yield Cell._view(self._cells, index)
+
+
+class Board:
+    """A ``rows`` x ``cols`` grid of cells packed into one ``bytearray``.
+
+    ``cells[row * cols + col]`` is the byte of cell ``(row, col)``; see the
+    module docstring for its layout.
+    """
+
+    __slots__ = ('rows', 'cols', 'cells')
+
+    def __init__(self, rows, cols):
+        if rows < 1 or cols < 1:
+            raise ValueError("a board needs at least one row and one column")
+        self.rows = rows
+        self.cols = cols
+        self.cells = bytearray(rows * cols)
+
+    @classmethod
+    def from_grid(cls, grid):
+        """Pack a list of lists of :class:`Cell` (or any grid) into a board."""
+        board = cls(len(grid), len(grid[0]))
+        for r, row in enumerate(grid):
+            for c, cell in enumerate(row):
+                board.cells[r * board.cols + c] = (
+                    cell.adjacent_mines | MINE * cell.is_mine
+                    | REVEALED * cell.is_revealed | FLAGGED * cell.is_flagged)
+        return board
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, row):
+        if row < 0:
+            row += self.rows
+        if not 0 <= row < self.rows:
+            raise IndexError("row index out of range")
+        return _Row(self.cells, row * self.cols, self.cols)
+
+    def __iter__(self):
+        for row in range(self.rows):
+            yield _Row(self.cells, row * self.cols, self.cols)
+
+    def cell(self, row, col):
+        """Return the :class:`Cell` view of ``(row, col)``."""
+        return self[row][col]
+
+    def _position(self, row, col):
+        """Return ``(row, col)`` with negative indexes counted from the end,
+        checked the same way as :meth:`cell`."""
+        if row < 0:
+            row += self.rows
+        if not 0 <= row < self.rows:
+            raise IndexError("row index out of range")
+        if col < 0:
+            col += self.cols
+        if not 0 <= col < self.cols:
+            raise IndexError("column index out of range")
+        return row, col
+
+    def neighbors(self, row, col):
+        """Return the in-bounds neighbours of ``(row, col)`` as flat indices."""
+        result = []
+        for r in range(max(0, row - 1), min(self.rows, row + 2)):
+            for c in range(max(0, col - 1), min(self.cols, col + 2)):
+                if r != row or c != col:
+                    result.append(r * self.cols + c)
+        return result
+
+    def mine_count(self):
+        return self.cells.translate(_MINE_FLAG).count(1)
+
+
+def _sample_mines(size, safe, num_mines, rng):
+    """Return a bytearray with ``1`` at ``num_mines`` distinct indices.
+
+    Rejection sampling straight into the bytearray takes expected
+    O(num_mines) draws and no index lists; above half density the free
+    cells are sampled instead and the result inverted.
+    """
+    free = size - 1
+    invert = num_mines > free // 2
+    wanted = free - num_mines if invert else num_mines
+    marks = bytearray(size)
+    marks[safe] = 1
+    randrange = rng.randrange
+    placed = 0
+    while placed < wanted:
+        index = randrange(size)
+        if not marks[index]:
+            marks[index] = 1
+            placed += 1
+    if invert:
+        return marks.translate(_INVERT)
+    marks[safe] = 0
+    return marks
+
+
+def neighbor_counts(mines, rows, cols):
+    """Return the number of mines around every cell of a 0/1 mine map.
+
+    All cells are counted at once: the map is read as one big integer with a
+    byte per cell, and the eight neighbours are added as shifted copies of
+    it (one byte to the left and right, masked at the row ends, then one row
+    up and down).  No lane ever exceeds 9, so nothing carries between cells.
+    """
+    size = rows * cols
+    m = int.from_bytes(mines, 'little')
+    not_first = int.from_bytes((b'\x00' + b'\xff' * (cols - 1)) * rows, 'little')
+    not_last = int.from_bytes((b'\xff' * (cols - 1) + b'\x00') * rows, 'little')
+    row_sums = m + ((m << 8) & not_first) + ((m >> 8) & not_last)
+    row = 8 * cols
+    block = (row_sums + (row_sums << row) + (row_sums >> row)) & ((1 << 8 * size) - 1)
+    return (block - m).to_bytes(size, 'little')
+
+
+def place_mines(board, num_mines, first_click, rng=None, seed=None):
+    """Lay ``num_mines`` mines on a fresh ``board`` and count neighbours.
+
+    The ``first_click`` cell is never a mine.  The board must not have
+    mines or counts yet; flags already on it are kept.  Pass ``seed`` (or
+    a ``random.Random`` as ``rng``) for a reproducible layout.  Raises
+    ``ValueError`` if the mines do not fit.
+    """
+    row, col = first_click
+    if not (0 <= row < board.rows and 0 <= col < board.cols):
+        raise ValueError("first click is outside the board")
+    size = board.rows * board.cols
+    if not 0 <= num_mines <= size - 1:
+        raise ValueError(f"between 0 and {size - 1} mines fit on this board")
+    if rng is None:
+        rng = random.Random(seed)
+    mines = _sample_mines(size, row * board.cols + col, num_mines, rng)
+    counts = neighbor_counts(mines, board.rows, board.cols)
+    # Flags, mine bits and counts occupy separate bits, so adding the three
+    # byte strings as big integers cannot carry between cells.
+    packed = (int.from_bytes(board.cells, 'little') + int.from_bytes(counts, 'little')
+              + (int.from_bytes(mines, 'little') << 4))
+    board.cells[:] = packed.to_bytes(size, 'little')
+
+
+def generate_board(rows, cols, num_mines, first_click, rng=None, seed=None):
+    """Return a new :class:`Board` with ``num_mines`` mines, none at ``first_click``.
+
+    Boards are reproducible with ``seed`` or a ``random.Random`` as ``rng``.
+    """
+    board = Board(rows, cols)
+    place_mines(board, num_mines, first_click, rng, seed)
+    return board
+
+
+class Changes:
+    """The cells opened by one reveal, as a sequence of ``(row, col)``.
+
+    Cells are recorded as runs of consecutive flat indices (one per row
+    segment opened), so opening millions of cells stores a few thousand
+    pairs rather than millions of tuples; :meth:`spans` and :meth:`indices`
+    expose them directly.  ``exploded`` is true when the reveal opened a
+    mine.
+    """
+
+    __slots__ = ('cols', 'starts', 'ends', 'exploded')
+
+    def __init__(self, cols):
+        self.cols = cols
+        self.starts = array('q')
+        # Running total of cells up to and including each span.
+        self.ends = array('q')
+        self.exploded = False
+
+    def add(self, start, stop):
+        """Record that the flat indices ``start <= i < stop`` were opened."""
+        self.starts.append(start)
+        self.ends.append((self.ends[-1] if self.ends else 0) + stop - start)
+
+    def spans(self):
+        """Yield ``(start, stop)`` flat index ranges in the order opened."""
+        previous = 0
+        for start, end in zip(self.starts, self.ends):
+            yield start, start + end - previous
+            previous = end
+
+    def indices(self):
+        """Yield the flat index of every opened cell."""
+        for start, stop in self.spans():
+            yield from range(start, stop)
+
+    def __len__(self):
+        return self.ends[-1] if self.ends else 0
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("change index out of range")
+        span = bisect_right(self.ends, i)
+        offset = i - (self.ends[span - 1] if span else 0)
+        return divmod(self.starts[span] + offset, self.cols)
+
+    def __iter__(self):
+        cols = self.cols
+        for index in self.indices():
+            yield divmod(index, cols)
+
+    def __repr__(self):
+        return f"Changes({list(self)!r}, exploded={self.exploded})"
+
+
+# Maps a cell byte to 0 for a closed, unflagged cell with no neighbouring
+# mines (exactly the byte 0) and to 1 for everything else.
+_BLOCKED = bytes([0]) + bytes([1]) * 255
+
+# Maps a cell byte to 1 when a cascade may open it (closed, unflagged, safe).
+_OPENABLE = bytes(int(not value & (REVEALED | FLAGGED | MINE)) for value in range(256))
+
+# Sets the revealed bit on every byte a cascade may open.
+_OPEN = bytes(value | REVEALED if not value & (REVEALED | FLAGGED | MINE) else value
+              for value in range(256))
+
+_RUN = re.compile(b'\x01+')
+_EMPTY_RUN = re.compile(b'\x00+')
+
+
+def _cascade(board, row, col, changes):
+    """Open the empty region around ``(row, col)`` and its numbered rim.
+
+    Works span by span: a seed grows to the whole run of empty cells in its
+    row, that run and the cells above, below and beside it are opened with
+    one ``translate`` per row, and every empty run found next to it becomes
+    a new seed.  ``blocked`` holds a 0/1 copy of each row touched, taken
+    before any of its cells are opened, marking the empty cells not yet
+    spanned.  Every run of opened cells is added to the ``changes``.
+    """
+    cells = board.cells
+    rows, cols = board.rows, board.cols
+    blocked = {}
+
+    def row_map(r):
+        mapped = blocked.get(r)
+        if mapped is None:
+            base = r * cols
+            mapped = blocked[r] = cells[base:base + cols].translate(_BLOCKED)
+        return mapped
+
+    seeds = [(row, col)]
+    while seeds:
+        r, c = seeds.pop()
+        mapped = row_map(r)
+        if mapped[c]:
+            continue
+        left = mapped.rfind(1, 0, c) + 1
+        right = mapped.find(1, c)
+        if right < 0:
+            right = cols
+        mapped[left:right] = bytes([1]) * (right - left)
+        lo, hi = max(left - 1, 0), min(right + 1, cols)
+        for rr in range(max(r - 1, 0), min(r + 2, rows)):
+            rr_map = row_map(rr)
+            start = rr * cols + lo
+            segment = cells[start:start + hi - lo]
+            for match in _RUN.finditer(segment.translate(_OPENABLE)):
+                changes.add(start + match.start(), start + match.end())
+            cells[start:start + hi - lo] = segment.translate(_OPEN)
+            if rr != r:
+                for match in _EMPTY_RUN.finditer(rr_map, lo, hi):
+                    seeds.append((rr, match.start()))
+
+
+def reveal_cell(board, row, col):
+    """Open ``(row, col)`` and return the :class:`Changes` it made.
+
+    Opening a cell with no neighbouring mines also opens the whole empty
+    region around it and the numbered cells bordering it, like the classic
+    game.  The cascade is iterative, so region size is not limited by the
+    recursion limit.  Flagged and already open cells are left alone (the
+    result is then empty).  Indexes are checked like :meth:`Board.cell`.
+    """
+    row, col = board._position(row, col)
+    changes = Changes(board.cols)
+    cells = board.cells
+    start = row * board.cols + col
+    value = cells[start]
+    if value & (REVEALED | FLAGGED):
+        return changes
+    if value == 0:
+        _cascade(board, row, col, changes)
+        return changes
+    cells[start] = value | REVEALED
+    changes.add(start, start + 1)
+    changes.exploded = bool(value & MINE)
+    return changes
+
+
+def toggle_flag(board, row, col):
+    """Flag or unflag a closed cell; returns whether it is now flagged."""
+    cell = board.cell(row, col)
+    if cell.is_revealed:
+        return False
+    cell.is_flagged = not cell.is_flagged
+    return cell.is_flagged
+
+
+Counts = namedtuple('Counts', 'revealed_safe flags correct_flags exploded')
+
+
+def _count_table(predicate):
+    return bytes(int(bool(predicate(value))) for value in range(256))
+
+
+_REVEALED_SAFE = _count_table(lambda v: v & REVEALED and not v & MINE)
+_FLAGS = _count_table(lambda v: v & FLAGGED)
+_CORRECT_FLAGS = _count_table(lambda v: v & FLAGGED and v & MINE)
+_EXPLODED = _count_table(lambda v: v & REVEALED and v & MINE)
+
+
+def scan_counts(board):
+    """Count revealed safe cells, flags, correct flags and exploded mines.
+
+    A full pass over the board; :class:`Game` keeps the same numbers up to
+    date incrementally.
+    """
+    cells = board.cells
+    return Counts(*(cells.translate(table).count(1)
+                    for table in (_REVEALED_SAFE, _FLAGS, _CORRECT_FLAGS, _EXPLODED)))
+
+
+def check_win(board):
+    """Return whether every cell without a mine has been revealed."""
+    if isinstance(board, Board):
+        return 1 not in board.cells.translate(_CLOSED_SAFE)
+    return all(cell.is_mine or cell.is_revealed for row in board for cell in row)
+
+
+class Game:
+    """A game of minesweeper; mines are laid on the first reveal.
+
+    ``rng`` or ``seed`` make the layout reproducible, as for
+    :func:`generate_board`.
+
+    ``state`` is :data:`PLAYING`, :data:`WON` or :data:`LOST`.  The game
+    keeps running counts of revealed safe cells, flags, correct flags and
+    exploded mines, updated from each reveal's :class:`Changes` and each
+    flag toggle, so :meth:`check_win` and the state never rescan the board.
+    With ``debug=True`` every move cross-checks the counts against
+    :func:`scan_counts` and raises ``AssertionError`` on a mismatch.
+    """
+
+    def __init__(self, rows, cols, num_mines, rng=None, seed=None, debug=False):
+        if not 0 <= num_mines <= rows * cols - 1:
+            raise ValueError(f"between 0 and {rows * cols - 1} mines fit on this board")
+        self.board = Board(rows, cols)
+        self.num_mines = num_mines
+        self.rng = rng
+        self.seed = seed
+        self.debug = debug
+        self.started = False
+        self.state = PLAYING
+        self.safe_cells = rows * cols - num_mines
+        self.revealed_safe = 0
+        self.flags = 0
+        self.correct_flags = 0
+        self.exploded = 0
+
+    @property
+    def rows(self):
+        return self.board.rows
+
+    @property
+    def cols(self):
+        return self.board.cols
+
+    @property
+    def mines_left(self):
+        """Mines not yet accounted for by a flag (may go negative)."""
+        return self.num_mines - self.flags
+
+    def counts(self):
+        """Return the running :data:`Counts`."""
+        return Counts(self.revealed_safe, self.flags, self.correct_flags, self.exploded)
+
+    def _verify(self):
+        scanned = scan_counts(self.board)
+        if scanned != self.counts():
+            raise AssertionError(f"game counters {self.counts()} disagree with the board {scanned}")
+
+    def reveal(self, row, col):
+        """Open ``(row, col)`` and return the :class:`Changes` it made.
+
+        ``state`` is updated; nothing changes once the game is over or if
+        the cell is flagged.
+        """
+        if self.state != PLAYING or self.board.cell(row, col).is_flagged:
+            return Changes(self.cols)
+        if not self.started:
+            place_mines(self.board, self.num_mines, (row, col), self.rng, self.seed)
+            self.started = True
+            # Flags placed before the mines existed may have become correct.
+            self.correct_flags = self.board.cells.translate(_CORRECT_FLAGS).count(1)
+        changes = reveal_cell(self.board, row, col)
+        if changes.exploded:
+            self.exploded += 1
+            self.state = LOST
+        else:
+            self.revealed_safe += len(changes)
+            if self.revealed_safe == self.safe_cells:
+                self.state = WON
+        if self.debug:
+            self._verify()
+        return changes
+
+    def toggle_flag(self, row, col):
+        """Flag or unflag ``(row, col)``; returns whether it is now flagged."""
+        cell = self.board.cell(row, col)
+        if self.state != PLAYING or cell.is_revealed:
+            return cell.is_flagged
+        flagged = toggle_flag(self.board, row, col)
+        step = 1 if flagged else -1
+        self.flags += step
+        if cell.is_mine:
+            self.correct_flags += step
+        if self.debug:
+            self._verify()
+        return flagged
+
+    def check_win(self):
+        """Return whether every safe cell is open (constant time)."""
+        return self.revealed_safe == self.safe_cells
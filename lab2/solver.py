@@ -0,0 +1,1398 @@
+"""Minesweeper solver: logical deductions plus a best guess.
+
+The solver only uses what a player can see: which cells are open, their
+numbers, and flags (which it takes to be mines).  Every open numbered cell
+with closed neighbours gives a constraint, ``remaining`` mines among a set
+of unknown cells, and together these constraints form the frontier.
+
+Deductions come from two rules.  A constraint that needs no more mines (or
+needs all of its cells) settles every cell in it.  Two constraints that
+share cells bound how many mines the shared part holds, and when those
+bounds force the cells only one of them covers, those are settled too
+(the classic subset rule is the case where one side is empty).
+``solve_step(mode=LINEAR_MODE)`` also reduces every changed component as a
+0/1 linear system (:func:`linear_deduce`), which catches what needs three
+or more constraints together, at some extra cost per step.
+
+When nothing is certain, :meth:`SolverSession.probabilities` works out the
+exact chance of a mine under every closed cell.  The frontier splits into
+components that share no cell; each is counted on its own by
+:func:`count_component` (solutions by mine total and by cell), and
+:func:`weigh_components` combines them, weighting a layout with ``m``
+frontier mines by the ways to place the remaining mines on the cells next
+to no number.  Counting is memoised on the residual counts of the open
+constraints, so it costs about (states x cells) rather than the number of
+solutions.  Measured timings are kept in ``BENCHMARKS.md`` next to this
+module rather than here, as they change with the code and the machine.
+
+A component that needs more than :data:`MAX_STATES` states at some cell is
+not enumerated but sampled (:func:`sample_component`): the same counting
+runs several times keeping a random subset of the states at each cell,
+weighted so the counts stay unbiased, and the spread between runs gives
+the standard error that :data:`Probabilities` reports.  Without a budget
+the runs stop before they would take longer than counting exactly.
+Counts are kept between moves in a :class:`ComponentCache`, keyed by the
+shape of each component, so a move only recounts the components it
+changed.
+
+``probabilities(budget_ms=...)`` makes a guess anytime, with one deadline
+for every step: deductions and finding the components stop where they
+are, exact counting gets part of the time left, smallest components
+first, the components left over get a quick estimate
+(:func:`estimate_component`) and are then sampled in rounds of growing
+size, and a share of the budget is kept for weighing them.  Cells whose
+chance is only estimated are listed in ``estimated``, and constraints not
+reached in time are left out, so the guess is rougher the larger the
+board but arrives on time.
+
+Constraints live in a :class:`ConstraintStore`: frozensets deduplicated by
+hash, with an index from every unknown cell to the constraints that
+mention it, so the pair rule only ever compares constraints that share a
+cell.
+
+:class:`SolverSession` keeps the frontier between moves.  :meth:`update`
+takes the :class:`minesweeper_engine.Changes` of a reveal, or flag toggles,
+and only touches the constraints around those cells; the next
+:meth:`~SolverSession.solve_step` only revisits constraints that changed.
+A step therefore costs the same on a huge board as on a small one.
+:meth:`Solver.solve_step` is the stateless form: it builds a session from
+the whole board every time.
+"""
+
+import random
+import re
+import time
+from collections import OrderedDict, namedtuple
+from fractions import Fraction
+from math import exp, gcd, lgamma, log, sqrt
+from operator import mul, sub
+
+from minesweeper_engine import ADJACENT_MASK, FLAGGED, MINE, REVEALED, Board
+
+# Mine density assumed away from the frontier when the mine total is unknown.
+DEFAULT_DENSITY = 0.2
+# Most partial solutions (distinct residual counts) one frontier component
+# may have at any cell while it is counted; past that the component is
+# sampled instead.
+MAX_STATES = 20000
+# Component counts kept between moves by a :class:`ComponentCache`.
+DEFAULT_CACHE_SIZE = 4096
+# Runs of :func:`sample_component` (at most, per component, when there is
+# no time budget) and the states each run keeps per cell.
+RUNS = 8
+SAMPLE_STATES = 1000
+# With a budget, ``WEIGH_SHARE`` of the time left once the components are
+# found is kept for weighing them, and ``EXACT_SHARE`` of the rest goes to
+# counting exactly; the first sampling runs keep ``FIRST_STATES`` states.
+WEIGH_SHARE = 0.3
+EXACT_SHARE = 0.5
+FIRST_STATES = 64
+# Scaling passes of :func:`estimate_component`.
+ESTIMATE_PASSES = 10
+
+# Deduction modes of :meth:`SolverSession.solve_step`.
+RULES_MODE = 'rules'
+LINEAR_MODE = 'linear'
+
+# ``totals[m]`` is how many solutions of a frontier component have ``m``
+# mines and ``per_cell[cell][m]`` how many of those put a mine on ``cell``.
+ComponentCounts = namedtuple('ComponentCounts', 'cells totals per_cell')
+# ``cells`` maps frontier cells to their chance of holding a mine and
+# ``outside`` is the chance for any other closed cell.  ``exact`` is False
+# when some components were sampled or estimated, or a time budget ran out
+# before every constraint was looked at; ``error`` is then the largest
+# standard error of a sampled cell, or None when it is unknown, and 0.0
+# otherwise.  ``estimated`` holds the cells whose chance is only a rough
+# estimate (see :func:`estimate_component`).
+Probabilities = namedtuple('Probabilities', 'cells outside exact error estimated')
+CacheInfo = namedtuple('CacheInfo', 'hits misses hit_rate entries max_entries '
+                                    'seconds_spent seconds_saved')
+
+# Maps a cell byte to 1 for an open cell that shows a number.
+_OPEN_NUMBER = bytes(int(bool(v & REVEALED and v & ADJACENT_MASK and not v & MINE))
+                     for v in range(256))
+_FLAG = bytes(int(bool(v & FLAGGED and not v & REVEALED)) for v in range(256))
+_CLOSED = bytes(int(not v & (REVEALED | FLAGGED)) for v in range(256))
+_ONE = re.compile(b'\x01')
+
+
+def as_board(board):
+    """Return ``board`` as a :class:`Board`, packing a list of lists of cells."""
+    return board if isinstance(board, Board) else Board.from_grid(board)
+
+
+def pair_rule(a, a_mines, b, b_mines):
+    """Return ``(safe, mines)`` forced by two constraints that share cells.
+
+    ``a`` and ``b`` are frozensets of cells needing ``a_mines`` and
+    ``b_mines`` mines.  Each side bounds the mines in ``a & b``; whatever
+    those bounds leave for ``a - b`` or ``b - a`` may settle them.
+    """
+    shared = len(a & b)
+    only_a = a - b
+    only_b = b - a
+    low = max(0, a_mines - len(only_a), b_mines - len(only_b))
+    high = min(shared, a_mines, b_mines)
+    safe = set()
+    mines = set()
+    for only, needed in ((only_a, a_mines), (only_b, b_mines)):
+        if not only:
+            continue
+        if needed - low == 0:
+            safe |= only
+        elif needed - high == len(only):
+            mines |= only
+    return safe, mines
+
+
+def linear_deduce(constraints):
+    """Return ``(safe, mines)`` forced by ``[(cells, remaining), ...]`` as a 0/1 system.
+
+    Each constraint is the equation ``sum(x[cell] for cell in cells) ==
+    remaining`` over 0/1 unknowns.  Fraction-free Gaussian elimination (rows
+    kept as sparse integer ``{cell: coefficient}`` maps, divided by their
+    gcd) reduces the system.  A cell is then forced when one of its values
+    would leave the rest of a row unable to reach the right-hand side; a
+    row at the least or the greatest value its left-hand side can take
+    fixes every cell in it.
+    """
+    rows = [[dict.fromkeys(cells, 1), remaining] for cells, remaining in constraints]
+    by_cell = {}
+    for i, (coefficients, _) in enumerate(rows):
+        for cell in coefficients:
+            by_cell.setdefault(cell, set()).add(i)
+    pivoted = set()
+    for column in sorted(by_cell):
+        candidates = [i for i in by_cell[column] if i not in pivoted]
+        if not candidates:
+            continue
+        pivot = min(candidates, key=lambda i: (abs(rows[i][0][column]), len(rows[i][0]), i))
+        pivoted.add(pivot)
+        pivot_row, pivot_value = rows[pivot]
+        lead = pivot_row[column]
+        for i in list(by_cell[column]):
+            if i == pivot:
+                continue
+            coefficients, value = rows[i]
+            factor = coefficients[column]
+            combined = {cell: a * lead for cell, a in coefficients.items()}
+            for cell, a in pivot_row.items():
+                combined[cell] = combined.get(cell, 0) - a * factor
+            combined = {cell: a for cell, a in combined.items() if a}
+            value = value * lead - pivot_value * factor
+            divisor = gcd(value, *combined.values())
+            if divisor > 1:
+                combined = {cell: a // divisor for cell, a in combined.items()}
+                value //= divisor
+            for cell in coefficients.keys() - combined.keys():
+                by_cell[cell].discard(i)
+            for cell in combined.keys() - coefficients.keys():
+                by_cell[cell].add(i)
+            rows[i] = [combined, value]
+    safe = set()
+    mines = set()
+    for coefficients, value in rows:
+        low = sum(a for a in coefficients.values() if a < 0)
+        high = sum(a for a in coefficients.values() if a > 0)
+        if not low <= value <= high:
+            continue  # contradicts the flags
+        for cell, a in coefficients.items():
+            # The rest of the row spans [low, high] less this cell's share.
+            if a > 0:
+                if value - a < low:
+                    safe.add(cell)
+                elif value > high - a:
+                    mines.add(cell)
+            elif value - a > high:
+                safe.add(cell)
+            elif value < low - a:
+                mines.add(cell)
+    return safe, mines
+
+
+class ConstraintStore:
+    """Frontier constraints, deduplicated and indexed by cell.
+
+    ``remaining`` maps each distinct frozenset of unknown cells to the mines
+    it needs; ``by_cell`` maps every unknown cell to the sets containing it.
+    Constraints are owned by the open cells that produced them (several
+    owners may share one set), so an owner can be rebuilt or dropped.
+    """
+
+    __slots__ = ('remaining', 'by_cell', '_owner', '_owners')
+
+    def __init__(self):
+        self.remaining = {}
+        self.by_cell = {}
+        self._owner = {}
+        self._owners = {}
+
+    def __len__(self):
+        return len(self.remaining)
+
+    def __contains__(self, key):
+        return key in self.remaining
+
+    def items(self):
+        return self.remaining.items()
+
+    def cells(self):
+        """Return the unknown cells mentioned by any constraint."""
+        return self.by_cell.keys()
+
+    def _link(self, key, remaining, owners):
+        """Attach ``owners`` to ``key``; returns whether ``key`` is new."""
+        if key in self.remaining:
+            self._owners[key] |= owners
+            for owner in owners:
+                self._owner[owner] = key
+            return False
+        self.remaining[key] = remaining
+        self._owners[key] = set(owners)
+        for owner in owners:
+            self._owner[owner] = key
+        for cell in key:
+            self.by_cell.setdefault(cell, set()).add(key)
+        return True
+
+    def _unlink(self, key):
+        del self.remaining[key]
+        for cell in key:
+            keys = self.by_cell[cell]
+            keys.discard(key)
+            if not keys:
+                del self.by_cell[cell]
+        return self._owners.pop(key)
+
+    def add(self, owner, key, remaining):
+        """Record the constraint of ``owner``; returns the key if it is new."""
+        self.discard(owner)
+        if key and self._link(key, remaining, {owner}):
+            return key
+        return None
+
+    def discard(self, owner):
+        key = self._owner.pop(owner, None)
+        if key is not None:
+            owners = self._owners[key]
+            owners.discard(owner)
+            if not owners:
+                self._unlink(key)
+
+    def settle(self, cell, is_mine):
+        """Remove ``cell`` from every constraint; returns the rewritten keys."""
+        changed = []
+        for key in list(self.by_cell.get(cell, ())):
+            remaining = self.remaining[key] - is_mine
+            owners = self._unlink(key)
+            smaller = key - {cell}
+            if smaller:
+                if self._link(smaller, remaining, owners):
+                    changed.append(smaller)
+            else:
+                for owner in owners:
+                    del self._owner[owner]
+        return changed
+
+    def related(self, key):
+        """Return the other constraints sharing a cell with ``key``."""
+        result = set()
+        for cell in key:
+            result |= self.by_cell[cell]
+        result.discard(key)
+        return result
+
+    def component(self, key):
+        """Return the constraints linked to ``key`` through shared cells, breadth first."""
+        seen = {key}
+        group = [key]
+        for current in group:
+            for other in self.related(current):
+                if other not in seen:
+                    seen.add(other)
+                    group.append(other)
+        return group
+
+
+def _accumulate(table, key, low, counts):
+    """Add the counts ``[low, counts]`` into ``table[key]`` (same layout)."""
+    entry = table.get(key)
+    if entry is None:
+        table[key] = [low, list(counts)]
+        return
+    base, total = entry
+    if low < base:
+        total[:0] = [0] * (base - low)
+        entry[0] = base = low
+    offset = low - base
+    if offset + len(counts) > len(total):
+        total.extend([0] * (offset + len(counts) - len(total)))
+    for j, count in enumerate(counts):
+        total[offset + j] += count
+
+
+def _convolve(a, b):
+    result = [0] * (len(a) + len(b) - 1)
+    for i, x in enumerate(a):
+        if x:
+            for j, y in enumerate(b):
+                result[i + j] += x * y
+    return result
+
+
+def _correlate(a, b, size, scale=1.0):
+    """Return ``[sum(a[i] * b[j + i] for i) / scale for j in range(size)]``."""
+    return [sum(x * y for x, y in zip(a, b[j:])) / scale for j in range(size)]
+
+
+def _support(poly):
+    """Return ``(low, poly[low:high])`` without the zeros at either end."""
+    nonzero = [m for m, count in enumerate(poly) if count]
+    if not nonzero:
+        return 0, None
+    return nonzero[0], poly[nonzero[0]:nonzero[-1] + 1]
+
+
+def frontier_components(store, deadline=None):
+    """Split the constraints of ``store`` into groups that share no cell.
+
+    Returns a list of ``[(cells, remaining), ...]`` lists, each in
+    breadth-first order from its first constraint.  Once
+    ``time.perf_counter()`` passes ``deadline`` only the groups found so
+    far are returned.
+    """
+    seen = set()
+    groups = []
+    for key in store.remaining:
+        if deadline is not None and time.perf_counter() > deadline:
+            break
+        if key not in seen:
+            group = store.component(key)
+            seen.update(group)
+            groups.append([(other, store.remaining[other]) for other in group])
+    return groups
+
+
+def _cell_order(constraints):
+    """Return the cells of ``constraints`` in the order the constraints list them."""
+    order = []
+    seen = set()
+    for cells, _ in constraints:
+        for cell in sorted(cells):
+            if cell not in seen:
+                seen.add(cell)
+                order.append(cell)
+    return order
+
+
+def _plans(constraints, order):
+    """Describe how the residual counts change as each cell is decided.
+
+    Before cell ``i`` the state holds the residual mines of every constraint
+    with cells on both sides of ``i``.  The state after it is the residuals
+    at the slots ``kept`` from before, followed by the ``opening`` counts of
+    the constraints that start at ``i``; ``used`` lists ``(slot, left)`` for
+    the ones among them that contain cell ``i``, with how many of their
+    cells are still undecided, and ``mask`` marks those slots.  ``closing``
+    lists ``(slot, initial)`` for the constraints whose last cell is ``i``
+    (slot -1 for one that also starts there).
+    """
+    position = {cell: i for i, cell in enumerate(order)}
+    touching = [[] for _ in order]
+    last = []
+    left = []
+    for c, (cells, _) in enumerate(constraints):
+        where = [position[cell] for cell in cells]
+        for i in where:
+            touching[i].append(c)
+        last.append(max(where))
+        left.append(len(where))
+    plans = []
+    active = []
+    for i, here in enumerate(touching):
+        slot = {c: k for k, c in enumerate(active)}
+        for c in here:
+            left[c] -= 1
+        here = set(here)
+        opening = [c for c in sorted(here) if c not in slot and last[c] > i]
+        keep = [c for c in active if last[c] > i] + opening
+        used = tuple((k, left[c]) for k, c in enumerate(keep) if c in here)
+        mask = tuple(int(c in here) for c in keep)
+        closing = tuple((slot.get(c, -1), constraints[c][1]) for c in here if last[c] == i)
+        plans.append(([slot[c] for c in keep if c in slot],
+                      tuple(constraints[c][1] for c in opening), used, mask, closing))
+        active = keep
+    return plans
+
+
+def _moves(plan, state):
+    """Return the states after deciding a cell safe and mined (None if impossible)."""
+    kept, opening, used, mask, closing = plan
+    base = tuple([state[slot] for slot in kept]) + opening
+    can_be_safe = can_be_mine = True
+    for slot, initial in closing:
+        end = state[slot] if slot >= 0 else initial
+        can_be_safe = can_be_safe and end == 0
+        can_be_mine = can_be_mine and end == 1
+    for k, left in used:
+        value = base[k]
+        if value <= 0:
+            can_be_mine = False
+            can_be_safe = can_be_safe and value == 0
+        elif value > left:
+            can_be_safe = False
+            can_be_mine = can_be_mine and value == left + 1
+    return (base if can_be_safe else None,
+            tuple(map(sub, base, mask)) if can_be_mine else None)
+
+
+def count_component(constraints, max_states=MAX_STATES, deadline=None):
+    """Count the mine layouts of one frontier component, by mine total and cell.
+
+    ``constraints`` is a list of ``(cells, remaining)`` that share cells.
+    Cells are decided one at a time in breadth-first order and partial
+    solutions are memoised on the residual counts of the constraints still
+    open, so the work grows with how many constraints are open at once
+    rather than with the number of solutions.  A forward pass counts the
+    ways to reach each state, a backward pass the ways to finish from it,
+    and the two combine into per-cell counts.
+
+    Returns a :data:`ComponentCounts`, or None if some cell has more than
+    ``max_states`` states or ``time.perf_counter()`` passes ``deadline``.
+    """
+    result = _count(constraints, max_states, deadline)
+    return result[0] if result is not None else None
+
+
+def _thin(table, limit, random_):
+    """Pick about ``limit`` keys of ``table`` at random, favouring heavy entries.
+
+    ``table`` maps keys to ``[low, counts]``.  Returns the chance each
+    kept key had of being kept.  Keys at least as heavy as the threshold
+    are always kept; the rest are drawn by systematic sampling with chances
+    proportional to their weight.
+    """
+    weights = {key: sum(counts) for key, (_, counts) in table.items()}
+    top = max(weights.values())
+    ranked = sorted(weights, key=weights.get, reverse=True)
+    total = sum(weights[key] / top for key in ranked)
+    chances = {}
+    for key in ranked:
+        weight = weights[key] / top
+        if len(chances) == limit or weight * (limit - len(chances)) < total:
+            break
+        chances[key] = 1.0
+        total -= weight
+    threshold = total / (limit - len(chances)) if len(chances) < limit else None
+    if threshold:
+        mark = random_() * threshold
+        for key in ranked[len(chances):]:
+            weight = weights[key] / top
+            mark -= weight
+            if mark <= 0:
+                chances[key] = weight / threshold
+                mark += threshold
+    return chances
+
+
+def _rescale(table, factors=None):
+    """Multiply each ``[low, counts]`` of ``table`` by ``factors[key]`` (if
+    given) and bring the largest weight to 1; return the log of the divisor."""
+    if not table:
+        # Every state was a dead end: the run found no solutions.
+        return 0.0
+    # Integer counts may be too large for floats, so divide before multiplying.
+    top = max(sum(counts) for _, counts in table.values())
+    for key, entry in table.items():
+        factor = 1.0 if factors is None else factors[key]
+        entry[1] = [count / top * factor for count in entry[1]]
+    scale = log(top)
+    if factors is not None:
+        scale += _rescale(table)
+    return scale
+
+
+def _count(constraints, max_states, deadline=None, random_=None):
+    """Run :func:`count_component`, thinning states at random if ``random_`` is given.
+
+    Without ``random_`` this counts exactly, with integers.  With it, a cell
+    that would have more than ``max_states`` states keeps a random subset
+    of them (see :func:`_thin`), each scaled by one over its chance of being
+    kept, so every count stays an unbiased estimate; the counts are then
+    floats, rescaled to stay in range.  Returns ``(counts, scale,
+    ratio)`` with the true counts ``exp(scale)`` times those returned and
+    ``ratio`` the states met over the states kept, a lower bound on how
+    many times more an exact count would carry (1.0 if none were
+    dropped), or None if a state limit or the deadline was hit.
+    """
+    order = _cell_order(constraints)
+    plans = _plans(constraints, order)
+    # Counts by mine total are kept as [low, coefficients]: the coefficient
+    # list starts at ``low`` mines, which skips the zeros below the fewest
+    # mines a partial solution can have.
+    layers = []
+    states = {(): [0, [1]]}
+    # When thinning, ``scales[i]`` is the log of what the states before cell
+    # i were divided by, and ``kept[i]`` the chances of those after it.
+    scales = [0.0]
+    kept = []
+    met = held = 0
+    for plan in plans:
+        moves = {}
+        following = {}
+        # Ways to reach each new state with this cell mined, less that mine.
+        arrivals = {}
+        for state, (low, counts) in states.items():
+            safe, mined = moves[state] = _moves(plan, state)
+            if safe is not None:
+                _accumulate(following, safe, low, counts)
+            if mined is not None:
+                _accumulate(arrivals, mined, low, counts)
+        for state, (low, counts) in arrivals.items():
+            _accumulate(following, state, low + 1, counts)
+        if deadline is not None and time.perf_counter() > deadline:
+            return None
+        chances = None
+        met += len(following)
+        if len(following) > max_states:
+            if random_ is None:
+                return None
+            chances = _thin(following, max_states, random_)
+            following = {state: following[state] for state in chances}
+            scales.append(scales[-1] + _rescale(following, {
+                state: 1 / chance for state, chance in chances.items()}))
+        else:
+            scales.append(scales[-1])
+        kept.append(chances)
+        layers.append((moves, arrivals))
+        states = following
+        held += len(states)
+    thinned = any(chances is not None for chances in kept)
+    finish = {state: [0, [1]] for state in states}
+    back = 0.0
+    mined_counts = []
+    for i in reversed(range(len(layers))):
+        if deadline is not None and time.perf_counter() > deadline:
+            return None
+        if thinned:
+            # Finish counts carry the chance of keeping their state too.
+            chances = kept[i]
+            back += _rescale(finish, None if chances is None else {
+                state: 1 / chances[state] for state in finish})
+        moves, arrivals = layers[i]
+        mined = {}
+        for state, (low, counts) in arrivals.items():
+            tail = finish.get(state)
+            if tail is not None:
+                _accumulate(mined, None, low + tail[0] + 1, _convolve(counts, tail[1]))
+        mined_counts.append((mined.get(None), scales[i] + back))
+        before = {}
+        for state, (safe, mine) in moves.items():
+            if safe in finish:
+                _accumulate(before, state, *finish[safe])
+            if mine in finish:
+                low, counts = finish[mine]
+                _accumulate(before, state, low + 1, counts)
+        finish = before
+    low, counts = finish.get((), (0, [0]))
+    totals = [0] * low + counts
+    per_cell = {}
+    for cell, (mined, scale) in zip(reversed(order), mined_counts):
+        row = [0] * len(totals)
+        if mined is not None:
+            low, counts = mined
+            if thinned:
+                # Bring the row to the scale of ``totals``.
+                counts = [exp(log(count) + scale - back) if count > 0 else 0.0
+                          for count in counts]
+            row[low:low + len(counts)] = counts
+        per_cell[cell] = row
+    return ComponentCounts(order, totals, per_cell), back, met / held if held else 1.0
+
+
+def sample_component(constraints, rng, runs=RUNS, max_states=SAMPLE_STATES, deadline=None):
+    """Estimate :func:`count_component` for a component too large to count.
+
+    Each run counts the component keeping at most ``max_states`` states per
+    cell, chosen at random (see :func:`_count`), so its counts are unbiased
+    estimates; ``runs`` runs (no limit if None, stopping early once
+    ``time.perf_counter()`` passes ``deadline``) are averaged.
+
+    Returns ``(counts, error)``, with float :data:`ComponentCounts` and the
+    largest standard error of a cell's mine chance, from the spread between
+    runs (0.0 if no states had to be dropped, None after a single run), or
+    None if no run finished.
+    """
+    results = []
+    while runs is None or len(results) < runs:
+        if results and deadline is not None and time.perf_counter() > deadline:
+            break
+        result = _count(constraints, max_states, deadline, rng.random)
+        if result is None:
+            break
+        if result[2] == 1.0:
+            return result[0], 0.0
+        results.append(result)
+    return _pool(results)
+
+
+def _pool(results):
+    """Average thinned :func:`_count` results into ``(counts, error)``."""
+    results = [(counts, scale) for counts, scale, _ in results if any(counts.totals)]
+    if not results:
+        return None
+    peak = max(scale + log(sum(counts.totals)) for counts, scale in results)
+    cells = results[0][0].cells
+    size = max(len(counts.totals) for counts, _ in results)
+    totals = [0.0] * size
+    per_cell = {cell: [0.0] * size for cell in cells}
+    chances = {cell: [] for cell in cells}
+    for counts, scale in results:
+        factor = exp(scale - peak)
+        total = sum(counts.totals)
+        for m, count in enumerate(counts.totals):
+            totals[m] += count * factor
+        for cell, row in counts.per_cell.items():
+            pooled = per_cell[cell]
+            for m, count in enumerate(row):
+                pooled[m] += count * factor
+            chances[cell].append(sum(row) / total)
+    error = None
+    if len(results) > 1:
+        error = 0.0
+        for values in chances.values():
+            mean = sum(values) / len(values)
+            variance = sum((p - mean) ** 2 for p in values) / (len(values) - 1)
+            error = max(error, sqrt(variance / len(values)))
+    return ComponentCounts(cells, totals, per_cell), error
+
+
+def estimate_component(constraints, passes=ESTIMATE_PASSES):
+    """Return rough :data:`ComponentCounts` for a component that was not counted.
+
+    Cells that :func:`linear_deduce` settles get 0 or 1.  Every other cell
+    starts at the average share of mines its constraints still need, and
+    the cells of each constraint are then scaled, ``passes`` times over, to
+    add up to its mines.  The component is taken to hold their sum
+    (rounded) in mines.
+    """
+    safe, mines = linear_deduce(constraints)
+    shares = {}
+    reduced = []
+    for cells, remaining in constraints:
+        free = cells - safe - mines
+        remaining -= len(cells & mines)
+        share = min(1.0, max(0.0, remaining / len(free))) if free else 0.0
+        for cell in free:
+            shares.setdefault(cell, []).append(share)
+        if free and 0 <= remaining <= len(free):
+            reduced.append((free, remaining))
+    risk = {cell: sum(values) / len(values) for cell, values in shares.items()}
+    for _ in range(passes):
+        for cells, remaining in reduced:
+            total = sum(risk[cell] for cell in cells)
+            if total:
+                factor = remaining / total
+                for cell in cells:
+                    risk[cell] = min(1.0, risk[cell] * factor)
+    risk.update(dict.fromkeys(safe, 0.0))
+    risk.update(dict.fromkeys(mines, 1.0))
+    mines = round(sum(risk.values()))
+    return ComponentCounts(list(risk), [0.0] * mines + [1.0],
+                           {cell: [0.0] * mines + [p] for cell, p in risk.items()})
+
+
+def component_signature(constraints):
+    """Return ``(base, signature)`` for a component, cells renumbered from ``base``.
+
+    ``base`` is the lowest cell.  Counting only depends on which constraints
+    share which cells, so components that are equal up to a shift of the
+    cell indices (the same pattern elsewhere on the board) share a signature.
+    """
+    base = min(min(cells) for cells, _ in constraints)
+    return base, frozenset((frozenset(cell - base for cell in cells), remaining)
+                           for cells, remaining in constraints)
+
+
+def _shifted(counts, offset):
+    return ComponentCounts([cell + offset for cell in counts.cells], counts.totals,
+                           {cell + offset: row for cell, row in counts.per_cell.items()})
+
+
+class ComponentCache:
+    """Bounded LRU cache of :func:`count_component` results.
+
+    Entries are keyed by :func:`component_signature`, so between moves only
+    the components a move actually changed are counted again.  Each entry
+    keeps the counts by mine total and by cell and how long they took to
+    count, which :meth:`info` adds up as ``seconds_saved`` for every hit.
+    A component that ran over the state limit is remembered as such, for
+    that limit or lower; one that ran out of time is not remembered.
+    Counts found elsewhere, such as an unthinned sampling run, can be
+    added with :meth:`put`.
+    """
+
+    def __init__(self, max_entries=DEFAULT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.seconds_spent = 0.0
+        self.seconds_saved = 0.0
+        self._entries = OrderedDict()
+
+    def count(self, constraints, max_states=MAX_STATES, deadline=None):
+        """Return :func:`count_component` of ``constraints``, cached."""
+        base, signature = component_signature(constraints)
+        entry = self._entries.get(signature)
+        if entry is not None and (entry[0] is not None or entry[2] >= max_states):
+            counts, seconds, _ = entry
+            self._entries.move_to_end(signature)
+            self.hits += 1
+            self.seconds_saved += seconds
+            return _shifted(counts, base) if counts is not None else None
+        start = time.perf_counter()
+        counts = count_component(constraints, max_states, deadline)
+        seconds = time.perf_counter() - start
+        self.misses += 1
+        if counts is not None or deadline is None or start + seconds <= deadline:
+            self.put(constraints, counts, seconds, max_states)
+        else:
+            self.seconds_spent += seconds
+        return counts
+
+    def put(self, constraints, counts, seconds, max_states=MAX_STATES):
+        """Remember ``counts`` (None: over ``max_states``) for ``constraints``,
+        found in ``seconds``."""
+        self.seconds_spent += seconds
+        if self.max_entries <= 0:
+            return
+        base, signature = component_signature(constraints)
+        stored = _shifted(counts, -base) if counts is not None else None
+        self._entries[signature] = (stored, seconds, max_states)
+        self._entries.move_to_end(signature)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def info(self):
+        """Return a :data:`CacheInfo` snapshot of the counters."""
+        lookups = self.hits + self.misses
+        return CacheInfo(self.hits, self.misses, self.hits / lookups if lookups else 0.0,
+                         len(self._entries), self.max_entries,
+                         self.seconds_spent, self.seconds_saved)
+
+    def clear(self):
+        """Drop every entry and reset the counters."""
+        self._entries.clear()
+        self.hits = self.misses = 0
+        self.seconds_spent = self.seconds_saved = 0.0
+
+
+def weigh_components(components, outside, mines_left=None, density=DEFAULT_DENSITY):
+    """Combine independent components into mine probabilities.
+
+    ``components`` are :data:`ComponentCounts`, exact or estimated by
+    :func:`sample_component`, and ``outside`` is the number
+    of closed cells next to no number.  With ``mines_left`` known, a layout
+    with ``m`` frontier mines is weighted by the ``comb(outside, mines_left -
+    m)`` ways to place the rest away from the frontier; otherwise every
+    closed cell is taken to hold a mine with chance ``density``.  Returns
+    ``(cells, outside_probability)``, or None if no layout fits.
+    """
+    if mines_left is None:
+        ratio = Fraction(density).limit_denominator(1000)
+        a, b = ratio.numerator, ratio.denominator - ratio.numerator
+        cells = {}
+        for component in components:
+            size = len(component.totals) - 1
+            if a and b and isinstance(component.totals[0], float):
+                # Sampled counts are floats: take the weights in logarithms,
+                # peaking at 1, so that neither side overflows.
+                tilt = log(a / b)
+                peak = max(m * tilt + log(count) for m, count in enumerate(component.totals)
+                           if count)
+                weights = [exp(m * tilt - peak) if count else 0.0
+                           for m, count in enumerate(component.totals)]
+            else:
+                weights = [a ** m * b ** (size - m) for m in range(size + 1)]
+            total = sum(map(mul, component.totals, weights))
+            if not total:
+                return None
+            for cell, counts in component.per_cell.items():
+                # Sampled counts can round a cell past its total.
+                cells[cell] = min(1.0, sum(map(mul, counts, weights)) / total)
+        return cells, density
+
+    frontier = sum(len(component.cells) for component in components)
+    if not 0 <= mines_left <= outside + frontier:
+        return None
+    # A layout with t frontier mines leaves comb(outside, mines_left - t)
+    # ways to place the rest.  Both that and the layout counts are huge, so
+    # they are kept as floats scaled to a peak of 1, after tilting both by
+    # odds**t (odds of a mine at the average density of the unknown cells)
+    # so that their peaks line up and neither side underflows the other.
+    tilt = log((mines_left + 0.5) / (outside + frontier - mines_left + 0.5))
+    logs = [lgamma(outside + 1) - lgamma(mines_left - t + 1)
+            - lgamma(outside - mines_left + t + 1) - t * tilt
+            if 0 <= mines_left - t <= outside else None for t in range(frontier + 1)]
+
+    def tilted(counts, low, peak):
+        return [exp(log(count) + (low + j) * tilt - peak) if count else 0.0
+                for j, count in enumerate(counts)]
+
+    # Multiply the components up a balanced tree, then push weights down
+    # it: the weights handed to a node give, for each j, the weight of
+    # everything outside it when it holds (its lowest count + j) mines.  Each product
+    # is rescaled to a peak of 1 (and the weights below it by the same
+    # factor) so nothing overflows; the ratios come out unchanged.
+    leaves = []
+    for component in components:
+        low, values = _support(component.totals)
+        if values is None:
+            return None
+        peak = max(log(count) + (low + j) * tilt for j, count in enumerate(values) if count)
+        leaves.append((low, tilted(values, low, peak), peak))
+    nodes = {}
+
+    def build(start, stop):
+        if stop - start == 0:
+            return 0, [1.0], 1.0
+        if stop - start == 1:
+            low, values, _ = leaves[start]
+            nodes[start, stop] = (low, values, 1.0)
+        else:
+            middle = (start + stop) // 2
+            left, right = build(start, middle), build(middle, stop)
+            values = _convolve(left[1], right[1])
+            peak = max(values)
+            nodes[start, stop] = (left[0] + right[0], [v / peak for v in values], peak)
+        return nodes[start, stop]
+
+    low, product, _ = build(0, len(leaves))
+    # Only the frontier totals the components allow count, so the room is
+    # scaled to its peak over those.
+    logs = logs[low:low + len(product)]
+    peak = max((value for value in logs if value is not None), default=None)
+    if peak is None:
+        return None
+    room = [exp(value - peak) if value is not None else 0.0 for value in logs]
+    weighted = list(map(mul, product, room))
+    total = sum(weighted)
+    if not total:
+        return None
+    cells = {}
+    below = [(0, len(leaves), room)] if leaves else []
+    while below:
+        start, stop, weights = below.pop()
+        if stop - start > 1:
+            middle = (start + stop) // 2
+            peak = nodes[start, stop][2]
+            left, right = nodes[start, middle], nodes[middle, stop]
+            below.append((start, middle, _correlate(right[1], weights, len(left[1]), peak)))
+            below.append((middle, stop, _correlate(left[1], weights, len(right[1]), peak)))
+            continue
+        first, values, peak = leaves[start]
+        for cell, counts in components[start].per_cell.items():
+            counts = tilted(counts[first:first + len(values)], first, peak)
+            cells[cell] = min(1.0, sum(map(float.__mul__, counts, weights)) / total)
+    # A given outside cell is a mine in (mines_left - t) / outside of the
+    # placements left over by a frontier layout with t mines.
+    share = 0.0
+    if outside:
+        share = sum(weight * (mines_left - low - j) / outside
+                    for j, weight in enumerate(weighted)) / total
+    return cells, share
+
+
+class SolverSession:
+    """Frontier and deductions for one board, kept up to date move by move.
+
+    Cells are flat indices (``row * cols + col``) internally; results are
+    ``(row, col)`` tuples.  ``store`` is the :class:`ConstraintStore` of
+    the frontier.  ``flags`` holds flagged cells, ``mines`` and ``safe`` the
+    closed cells deduced so far; all three are kept out of the constraints.
+    ``cache`` is the :class:`ComponentCache` used by :meth:`probabilities`
+    (a new one by default).  ``rng`` or ``seed`` make the sampled
+    probabilities reproducible, as for :func:`minesweeper_engine.place_mines`.
+    ``deadline`` is passed on to :meth:`rebuild`.
+    """
+
+    def __init__(self, board, total_mines=None, cache=None, rng=None, seed=None,
+                 deadline=None):
+        self.board = as_board(board)
+        self.total_mines = total_mines
+        self.cache = ComponentCache() if cache is None else cache
+        self.rng = random.Random(seed) if rng is None else rng
+        self.rebuild(deadline)
+
+    def rebuild(self, deadline=None):
+        """Rediscover the whole frontier from the board.
+
+        If ``time.perf_counter()`` passes ``deadline`` first, the scan stops
+        there and ``complete`` is False: the session then only knows part
+        of the frontier, which is enough for one quick guess but not for
+        playing on.
+        """
+        self.complete = True
+        self.store = ConstraintStore()
+        self.flags = set()
+        self.mines = set()
+        self.safe = set()
+        self._dirty = set()
+        self._unreduced = set()
+        cells = self.board.cells
+        for match in _ONE.finditer(cells.translate(_FLAG)):
+            self.flags.add(match.start())
+        for count, match in enumerate(_ONE.finditer(cells.translate(_OPEN_NUMBER))):
+            if deadline is not None and not count % 64 and time.perf_counter() > deadline:
+                self.complete = False
+                return
+            self._add_constraint(match.start())
+
+    def _neighbors(self, index):
+        return self.board.neighbors(*divmod(index, self.board.cols))
+
+    def _add_constraint(self, index):
+        cells = self.board.cells
+        remaining = cells[index] & ADJACENT_MASK
+        unknown = []
+        for neighbor in self._neighbors(index):
+            if cells[neighbor] & REVEALED or neighbor in self.safe:
+                continue
+            if neighbor in self.flags or neighbor in self.mines:
+                remaining -= 1
+            else:
+                unknown.append(neighbor)
+        key = self.store.add(index, frozenset(unknown), remaining)
+        if key is not None:
+            self._changed((key,))
+
+    def _remove_unknown(self, index, is_mine):
+        """Take the settled cell ``index`` out of every constraint."""
+        self._changed(self.store.settle(index, is_mine))
+
+    def _changed(self, keys):
+        """Queue new or rewritten constraints for the rules and the linear pass."""
+        self._dirty.update(keys)
+        unreduced = self._unreduced
+        unreduced.update(keys)
+        if len(unreduced) > 2 * len(self.store) + 64:
+            unreduced.intersection_update(self.store.remaining.keys())
+
+    def _resolve(self, index, is_mine):
+        (self.mines if is_mine else self.safe).add(index)
+        self._remove_unknown(index, is_mine)
+
+    def _unflag(self, index):
+        """Rebuild the constraints around a cell that lost its flag."""
+        cells = self.board.cells
+        for neighbor in self._neighbors(index):
+            if _OPEN_NUMBER[cells[neighbor]]:
+                self._add_constraint(neighbor)
+
+    def update(self, changes=(), flags=()):
+        """Apply the cells opened by a reveal and the cells whose flag toggled.
+
+        ``changes`` is a :class:`minesweeper_engine.Changes` (or any iterable
+        of ``(row, col)``) and ``flags`` an iterable of ``(row, col)``; the
+        board must already show the new state.
+        """
+        cells = self.board.cells
+        cols = self.board.cols
+        opened = changes.indices() if hasattr(changes, 'indices') else (
+            r * cols + c for r, c in changes)
+        for index in opened:
+            self.safe.discard(index)
+            self.mines.discard(index)
+            self.flags.discard(index)
+            self._remove_unknown(index, False)
+            if _OPEN_NUMBER[cells[index]]:
+                self._add_constraint(index)
+        for r, c in flags:
+            index = r * cols + c
+            if cells[index] & FLAGGED:
+                if index in self.mines:
+                    self.mines.discard(index)
+                    self.flags.add(index)
+                elif index not in self.flags and index not in self.safe:
+                    self.flags.add(index)
+                    self._remove_unknown(index, True)
+            elif index in self.flags:
+                self.flags.discard(index)
+                self._unflag(index)
+
+    def _settle(self, cells, is_mine):
+        for cell in cells:
+            if cell not in self.safe and cell not in self.mines:
+                self._resolve(cell, is_mine)
+
+    def _deduce(self, deadline=None):
+        store = self.store
+        dirty = self._dirty
+        steps = 0
+        while dirty:
+            steps += 1
+            if deadline is not None and not steps % 64 and time.perf_counter() > deadline:
+                return
+            key = dirty.pop()
+            if key not in store:
+                continue
+            remaining = store.remaining[key]
+            if remaining < 0 or remaining > len(key):
+                continue  # contradicts the flags; leave it alone
+            if remaining == 0:
+                self._settle(key, False)
+                continue
+            if remaining == len(key):
+                self._settle(key, True)
+                continue
+            for other in store.related(key):
+                other_remaining = store.remaining.get(other)
+                if other_remaining is None or not 0 <= other_remaining <= len(other):
+                    continue
+                safe, mines = pair_rule(key, remaining, other, other_remaining)
+                if safe or mines:
+                    self._settle(safe, False)
+                    self._settle(mines, True)
+                    if key in store:
+                        dirty.add(key)
+                    break
+
+    def _coords(self, cells):
+        cols = self.board.cols
+        return {divmod(index, cols) for index in cells}
+
+    def _reduce(self):
+        """Run Gaussian elimination over every component changed since the last run."""
+        store = self.store
+        while True:
+            self._deduce()
+            changed, self._unreduced = self._unreduced, set()
+            seen = set()
+            safe = set()
+            mines = set()
+            for key in changed:
+                if key in seen or key not in store:
+                    continue
+                group = store.component(key)
+                seen.update(group)
+                if len(group) > 1:
+                    found_safe, found_mines = linear_deduce(
+                        [(other, store.remaining[other]) for other in group])
+                    safe |= found_safe
+                    mines |= found_mines
+            if not safe and not mines:
+                return
+            self._settle(safe, False)
+            self._settle(mines, True)
+
+    def solve_step(self, mode=RULES_MODE):
+        """Return ``(safe_cells, mine_cells)`` deduced so far, as ``(row, col)`` sets.
+
+        Only constraints changed since the last step are re-examined.
+        Deduced cells stay in the result until they are opened or flagged.
+        :data:`RULES_MODE` applies the single and pair rules;
+        :data:`LINEAR_MODE` also reduces each changed frontier component as
+        a linear system (:func:`linear_deduce`), which catches deductions
+        that need three or more constraints at once.
+        """
+        if mode == LINEAR_MODE:
+            self._reduce()
+        elif mode == RULES_MODE:
+            self._deduce()
+        else:
+            raise ValueError(f"unknown mode {mode!r}")
+        return self._coords(self.safe), self._coords(self.mines)
+
+    def _closed_cells(self):
+        """Yield closed, unflagged cells that are neither settled nor on the frontier."""
+        frontier = self.store.cells()
+        cells = self.board.cells
+        for match in _ONE.finditer(cells.translate(_CLOSED)):
+            index = match.start()
+            if index in frontier or index in self.mines:
+                continue
+            # A partial scan may have missed the constraint of a neighbour.
+            if self.complete or not any(_OPEN_NUMBER[cells[neighbor]]
+                                        for neighbor in self._neighbors(index)):
+                yield index
+
+    def _estimate(self, outside):
+        """Rate each frontier cell by its most pessimistic constraint."""
+        risk = {}
+        for key, remaining in self.store.items():
+            if not 0 <= remaining <= len(key):
+                continue
+            share = remaining / len(key)
+            for cell in key:
+                risk[cell] = max(risk.get(cell, 0.0), share)
+        density = DEFAULT_DENSITY
+        if self.total_mines is not None:
+            left = self.total_mines - len(self.flags) - len(self.mines) - sum(risk.values())
+            density = min(1.0, max(0.0, left / outside)) if outside > 0 else 1.0
+        return Probabilities(risk, density, False, None, frozenset(risk))
+
+    def _probabilities(self, max_states=MAX_STATES, deadline=None):
+        self._deduce(deadline)
+        groups = frontier_components(self.store, deadline)
+        complete = self.complete and sum(map(len, groups)) == len(self.store)
+        stop = exact_stop = None
+        if deadline is not None:
+            now = time.perf_counter()
+            left = (1 - WEIGH_SHARE) * max(0.0, deadline - now)
+            stop = now + left
+            exact_stop = now + EXACT_SHARE * left
+        components = []
+        pending = []
+        # Small components first, so that when time is short the ones left
+        # over are those that would have been slow to count anyway.
+        for group in sorted(groups, key=len):
+            counts = None
+            if exact_stop is None or time.perf_counter() < exact_stop:
+                counts = self.cache.count(group, max_states, exact_stop)
+            if counts is None:
+                pending.append(group)
+            else:
+                components.append(counts)
+        # With a budget, every leftover component first gets the quick
+        # estimate, which sampling then replaces while time is left.
+        estimates = []
+        for group in pending:
+            if stop is not None and time.perf_counter() > stop:
+                break
+            estimates.append(estimate_component(group))
+        exact = complete
+        error = 0.0 if complete else None
+        estimated = set()
+        for i, result in enumerate(self._sample(pending, min(max_states, SAMPLE_STATES), stop)):
+            if result is None:
+                if stop is None:
+                    estimates.append(estimate_component(pending[i]))
+                if i >= len(estimates):
+                    # Not even estimated in time: its cells count as
+                    # unconstrained, like those of constraints never reached.
+                    exact = False
+                    error = None
+                    continue
+                result = estimates[i], None, False
+                estimated.update(cell for cell, row in result[0].per_cell.items()
+                                 if 0 < row[-1] < 1)
+            components.append(result[0])
+            exact = exact and result[2]
+            error = None if error is None or result[1] is None else max(error, result[1])
+        cells = self.board.cells
+        closed = cells.translate(_CLOSED).count(1)
+        # Deduced mines are closed until opened or flagged, and then leave
+        # ``mines``; a safe cell can be flagged and stay in ``safe``, the
+        # only flagged cell kept out of ``flags``.
+        flagged_safe = cells.translate(_FLAG).count(1) - len(self.flags)
+        settled = len(self.mines) + len(self.safe) - flagged_safe
+        outside = closed - settled - sum(len(counts.cells) for counts in components)
+        mines_left = None
+        if self.total_mines is not None:
+            mines_left = self.total_mines - len(self.flags) - len(self.mines)
+        result = weigh_components(components, outside, mines_left)
+        if result is None:
+            return self._estimate(outside)
+        return Probabilities(result[0], result[1], exact, error, frozenset(estimated))
+
+    def _sample(self, groups, max_states, deadline):
+        """Return ``(counts, error, exact)`` for each of ``groups``, or None for
+        those not sampled before ``deadline``.
+
+        Without a deadline each group gets up to :data:`RUNS` runs, but no
+        more than the first run says an exact count would take.  With
+        one, the groups take turns, a run each, until the deadline passes:
+        the first two rounds keep :data:`FIRST_STATES` states per cell and
+        every later round doubles that (up to ``max_states``), so as many
+        groups as possible get the two runs an error estimate needs when
+        time is short, and the rest are refined (or counted exactly, and
+        cached) while time is left.
+        """
+        random_ = self.rng.random
+        if deadline is None:
+            results = []
+            for group in groups:
+                start = time.perf_counter()
+                runs = [_count(group, max_states, None, random_)]
+                # An exact count carries at least ``ratio`` times the states
+                # of a run, so the runs stop before taking ``ratio`` times as
+                # long as the first.
+                limit = runs[0][2] * (time.perf_counter() - start)
+                while len(runs) < RUNS:
+                    spent = time.perf_counter() - start
+                    if spent * (len(runs) + 1) / len(runs) > limit:
+                        break
+                    runs.append(_count(group, max_states, None, random_))
+                result = _pool(runs)
+                results.append(result and result + (False,))
+            return results
+        runs = [[] for _ in groups]
+        done = [None] * len(groups)
+        states = min(FIRST_STATES, max_states)
+        rounds = 0
+        while None in done and time.perf_counter() < deadline:
+            for i, group in enumerate(groups):
+                if done[i] is not None:
+                    continue
+                start = time.perf_counter()
+                result = _count(group, states, deadline, random_)
+                if result is None:
+                    break
+                if result[2] > 1:
+                    runs[i].append(result)
+                else:
+                    self.cache.put(group, result[0], time.perf_counter() - start)
+                    done[i] = result[0], 0.0, True
+            rounds += 1
+            if rounds > 1:
+                states = min(2 * states, max_states)
+        results = []
+        for result, group_runs in zip(done, runs):
+            if result is None:
+                result = _pool(group_runs)
+                result = result and result + (False,)
+            results.append(result)
+        return results
+
+    def probabilities(self, max_states=MAX_STATES, budget_ms=None):
+        """Return the :data:`Probabilities` of a mine under each closed cell.
+
+        The frontier is split into components that share no cell; each is
+        counted exactly by :func:`count_component` (or found in ``cache``
+        when a previous move already counted it) and they are combined by
+        :func:`weigh_components`.  A component with more than
+        ``max_states`` partial solutions at some cell is sampled instead,
+        as by :func:`sample_component` but for no longer than the first
+        run shows an exact count would take, and the result has ``exact``
+        False and the sampling ``error`` (None after a single run).
+
+        With ``budget_ms``, one deadline covers every step, so the answer
+        comes back within about ``budget_ms`` milliseconds however large
+        the frontier: deductions and finding components stop where they
+        are, components are counted exactly for part of the time left and
+        sampled or estimated for the rest, and :data:`WEIGH_SHARE` of it is
+        kept for combining them.  Cells of constraints not reached in time
+        are left out and weighed like any closed cell off the frontier.  If
+        the constraints contradict each other, the per-constraint estimate
+        is returned, with ``error`` None.
+        """
+        result = self._probabilities(max_states, _deadline(budget_ms))
+        cols = self.board.cols
+        cells = {divmod(cell, cols): p for cell, p in result.cells.items()}
+        estimated = frozenset(divmod(cell, cols) for cell in result.estimated)
+        return result._replace(cells=cells, estimated=estimated)
+
+    def make_probabilistic_move(self, budget_ms=None):
+        """Return the ``(row, col)`` to open next, or None if no cell is closed.
+
+        A deduced safe cell when there is one; otherwise the closed cell
+        least likely to be a mine according to :meth:`probabilities`, within
+        ``budget_ms`` milliseconds if given.  On equal chances a counted
+        cell goes before an estimated one.
+        """
+        return self._move(_deadline(budget_ms))
+
+    def _move(self, deadline=None):
+        self._deduce(deadline)
+        cols = self.board.cols
+        if self.safe:
+            return divmod(min(self.safe), cols)
+        result = self._probabilities(deadline=deadline)
+        risk, density, estimated = result.cells, result.outside, result.estimated
+        other = next(self._closed_cells(), None)
+        best = min(risk, key=lambda cell: (risk[cell], cell in estimated, cell), default=None)
+        if best is None or (other is not None and density < risk[best]):
+            best = other
+        if best is None:
+            return None
+        return divmod(best, cols)
+
+
+def _deadline(budget_ms):
+    """Return the :func:`time.perf_counter` value ``budget_ms`` from now, or None."""
+    return None if budget_ms is None else time.perf_counter() + budget_ms / 1000
+
+
+class Solver:
+    """Stateless entry points; see :class:`SolverSession` for the incremental form.
+
+    ``total_mines`` (if known) sharpens the guesses of
+    :meth:`make_probabilistic_move`.  Sessions share one
+    :class:`ComponentCache` of ``cache_size`` components, so repeated calls
+    on a board that changed a little only count the components that changed,
+    and one random generator, seeded by ``rng`` or ``seed``.
+    """
+
+    def __init__(self, total_mines=None, cache_size=DEFAULT_CACHE_SIZE, rng=None, seed=None):
+        self.total_mines = total_mines
+        self.cache = ComponentCache(cache_size)
+        self.rng = random.Random(seed) if rng is None else rng
+
+    def session(self, board):
+        """Start a :class:`SolverSession` on ``board``."""
+        return SolverSession(board, self.total_mines, self.cache, self.rng)
+
+    def stats(self):
+        """Return the :data:`CacheInfo` of the component cache."""
+        return self.cache.info()
+
+    def solve_step(self, board, mode=RULES_MODE):
+        """Return ``(safe_cells, mine_cells)`` deducible on ``board`` right now.
+
+        ``board`` is a :class:`Board` or a list of lists of cells; the whole
+        frontier is rebuilt on every call.  ``mode`` is as for
+        :meth:`SolverSession.solve_step`.
+        """
+        return self.session(board).solve_step(mode)
+
+    def make_probabilistic_move(self, board, budget_ms=None):
+        """Return the ``(row, col)`` of the best cell to open on ``board``, or None.
+
+        ``budget_ms`` bounds the whole call, rebuilding the frontier from
+        ``board`` included, as for :meth:`SolverSession.probabilities`.
+        """
+        deadline = _deadline(budget_ms)
+        session = SolverSession(board, self.total_mines, self.cache, self.rng,
+                                deadline=deadline)
+        return session._move(deadline)
+
+
+def _pairwise_deduce(constraints):
+    """Reference deduction over ``[(cells, remaining), ...]``: every pair, every pass.
+
+    Applies the same rules as :class:`SolverSession` but compares all pairs
+    of constraints until nothing changes (O(C**2) per pass).  Returns the
+    ``(safe, mines)`` sets of cells.
+    """
+    constraints = [(frozenset(cells), remaining) for cells, remaining in constraints]
+    safe = set()
+    mines = set()
+    changed = True
+    while changed:
+        changed = False
+        live = []
+        for cells, remaining in constraints:
+            remaining -= len(cells & mines)
+            cells = cells - safe - mines
+            if cells and 0 <= remaining <= len(cells):
+                live.append((cells, remaining))
+        constraints = live
+        for cells, remaining in constraints:
+            if remaining == 0 and not cells <= safe:
+                safe |= cells
+                changed = True
+            elif remaining == len(cells) and not cells <= mines:
+                mines |= cells
+                changed = True
+        if changed:
+            continue
+        for i, (a, a_mines) in enumerate(constraints):
+            for b, b_mines in constraints[i + 1:]:
+                if a.isdisjoint(b):
+                    continue
+                new_safe, new_mines = pair_rule(a, a_mines, b, b_mines)
+                if new_safe - safe or new_mines - mines:
+                    safe |= new_safe
+                    mines |= new_mines
+                    changed = True
+    return safe, mines
@@ -155,6 +155,291 @@ class TestMinesweeperEngine:
         assert not board[1][1].is_mine  # First click should be safe
 
 
+class TestCompactBoard:
+    """Tests for the byte-packed Board and its Cell views."""
+    
+    @pytest.mark.skipif(minesweeper_engine is None, reason="minesweeper_engine module not found")
+    def test_views_write_through(self):
+        """Test that assigning through board[r][c] updates the packed byte."""
+        board = minesweeper_engine.Board(3, 4)
+        cell = board[1][2]
+        cell.is_flagged = True
+        cell.adjacent_mines = 7
+        assert board[1][2].is_flagged and board[1][2].adjacent_mines == 7
+        assert not board[1][2].is_mine and not board[1][2].is_revealed
+        cell.is_flagged = False
+        assert board.cells[1 * 4 + 2] == 7
+        assert board[-1][-1] is not board[-1][-1]
+        assert len(board[0][1:3]) == 2
+        with pytest.raises(IndexError):
+            board[3]
+        with pytest.raises(IndexError):
+            board[0][4]
+        with pytest.raises(ValueError):
+            cell.adjacent_mines = 9
+    
+    @pytest.mark.skipif(minesweeper_engine is None, reason="minesweeper_engine module not found")
+    def test_standalone_cells(self):
+        """Test that detached cells are independent and mutable."""
+        a = minesweeper_engine.Cell()
+        b = minesweeper_engine.Cell(is_mine=True, adjacent_mines=3)
+        a.is_revealed = True
+        assert a.is_revealed and not b.is_revealed
+        assert b.is_mine and b.adjacent_mines == 3
+        assert not hasattr(a, '__dict__')
+        with pytest.raises(AttributeError):
+            a.colour = "red"
+    
+    @pytest.mark.skipif(minesweeper_engine is None, reason="minesweeper_engine module not found")
+    def test_from_grid_roundtrip(self):
+        """Test packing a list of lists of Cell into a Board."""
+        grid = [[minesweeper_engine.Cell() for _ in range(3)] for _ in range(2)]
+        grid[0][1].is_mine = True
+        grid[1][2].is_revealed = True
+        grid[1][2].adjacent_mines = 1
+        board = minesweeper_engine.Board.from_grid(grid)
+        for r in range(2):
+            for c in range(3):
+                assert repr(board[r][c]) == repr(grid[r][c])
+    
+    @pytest.mark.skipif(minesweeper_engine is None, reason="minesweeper_engine module not found")
+    def test_game_plays_to_completion(self):
+        """Test that a game is won by revealing every safe cell."""
+        import random
+        game = minesweeper_engine.Game(6, 6, 5, rng=random.Random(3))
+        assert game.reveal(0, 0)
+        assert game.state in (minesweeper_engine.PLAYING, minesweeper_engine.WON)
+        for r in range(6):
+            for c in range(6):
+                if not game.board[r][c].is_mine:
+                    game.reveal(r, c)
+        assert game.state == minesweeper_engine.WON
+        assert game.check_win()
+    
+    @pytest.mark.skipif(minesweeper_engine is None, reason="minesweeper_engine module not found")
+    def test_game_lost_on_mine(self):
+        """Test that revealing a mine loses and flagged cells are protected."""
+        import random
+        game = minesweeper_engine.Game(5, 5, 10, rng=random.Random(1))
+        game.reveal(2, 2)
+        r, c = next((r, c) for r in range(5) for c in range(5) if game.board[r][c].is_mine)
+        assert game.toggle_flag(r, c)
+        assert not game.reveal(r, c)
+        assert game.state == minesweeper_engine.PLAYING
+        assert not game.toggle_flag(r, c)
+        changes = game.reveal(r, c)
+        assert changes.exploded and list(changes) == [(r, c)]
+        assert game.state == minesweeper_engine.LOST
+
+
+class TestCascadeReveal:
+    """Tests for the iterative span-based cascade and its change lists."""
+    
+    @staticmethod
+    def naive_reveal(board, row, col):
+        """Reference breadth-first cascade over Cell views."""
+        first = board[row][col]
+        if first.is_revealed or first.is_flagged:
+            return set()
+        opened = {(row, col)}
+        queue = deque([(row, col)]) if first.adjacent_mines == 0 and not first.is_mine else deque()
+        while queue:
+            r, c = queue.popleft()
+            for nr in range(max(0, r - 1), min(board.rows, r + 2)):
+                for nc in range(max(0, c - 1), min(board.cols, c + 2)):
+                    cell = board[nr][nc]
+                    if (nr, nc) in opened or cell.is_revealed or cell.is_flagged:
+                        continue
+                    opened.add((nr, nc))
+                    if cell.adjacent_mines == 0:
+                        queue.append((nr, nc))
+        return opened
+    
+    @pytest.mark.skipif(minesweeper_engine is None, reason="minesweeper_engine module not found")
+    def test_matches_naive_cascade(self):
+        """Test the cascade against a reference flood fill on random boards."""
+        import random
+        rng = random.Random(5)
+        for trial in range(40):
+            rows, cols = rng.randint(1, 25), rng.randint(1, 25)
+            mines = rng.randint(0, rows * cols // 6)
+            board = minesweeper_engine.generate_board(rows, cols, mines, (0, 0), seed=trial)
+            for _ in range(rng.randint(0, 10)):
+                board[rng.randrange(rows)][rng.randrange(cols)].is_flagged = True
+            for _ in range(3):
+                r, c = rng.randrange(rows), rng.randrange(cols)
+                expected = self.naive_reveal(board, r, c)
+                changes = minesweeper_engine.reveal_cell(board, r, c)
+                assert len(changes) == len(expected) == len(set(changes))
+                assert set(changes) == expected
+                assert all(board[r][c].is_revealed for r, c in changes)
+                assert changes.exploded == (bool(expected) and board[r][c].is_mine)
+    
+    @pytest.mark.skipif(minesweeper_engine is None, reason="minesweeper_engine module not found")
+    def test_snake_region_without_recursion_limit(self):
+        """Test a long winding corridor that would overflow a recursive fill."""
+        import sys
+        rows, cols = 43, 40
+        mines = bytearray(rows * cols)
+        # Every fourth row is a wall with a three-cell gap at alternating
+        # ends, leaving one snake-shaped corridor of empty cells.
+        for r in range(3, rows, 4):
+            gap = range(cols - 3, cols) if (r // 4) % 2 == 0 else range(0, 3)
+            for c in range(cols):
+                if c not in gap:
+                    mines[r * cols + c] = 1
+        counts = minesweeper_engine.neighbor_counts(mines, rows, cols)
+        board = minesweeper_engine.Board(rows, cols)
+        board.cells[:] = bytes(count | minesweeper_engine.MINE * mine
+                               for count, mine in zip(counts, mines))
+        expected = self.naive_reveal(board, 1, 1)
+        limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(100)
+        try:
+            changes = minesweeper_engine.reveal_cell(board, 1, 1)
+        finally:
+            sys.setrecursionlimit(limit)
+        assert len(expected) == rows * cols - sum(mines)
+        assert set(changes) == expected
+    
+    @pytest.mark.skipif(minesweeper_engine is None, reason="minesweeper_engine module not found")
+    def test_changes_sequence(self):
+        """Test the Changes sequence interface."""
+        board = minesweeper_engine.generate_board(3, 4, 0, (0, 0))
+        changes = minesweeper_engine.reveal_cell(board, 1, 1)
+        assert len(changes) == 12 and not changes.exploded
+        assert sorted(changes) == [(r, c) for r in range(3) for c in range(4)]
+        assert [changes[i] for i in range(-12, 12)] == list(changes) * 2
+        assert sum(stop - start for start, stop in changes.spans()) == 12
+        assert sorted(changes.indices()) == list(range(12))
+        with pytest.raises(IndexError):
+            changes[12]
+        assert not minesweeper_engine.reveal_cell(board, 2, 3)
+    
+    @pytest.mark.skipif(minesweeper_engine is None, reason="minesweeper_engine module not found")
+    def test_out_of_range_cells_are_rejected(self):
+        """Test that reveal_cell checks its indexes like Board.cell and opens nothing."""
+        board = minesweeper_engine.generate_board(3, 3, 0, (0, 0), seed=0)
+        for row, col in [(0, 3), (0, 4), (3, 0), (-4, 1), (1, -4)]:
+            with pytest.raises(IndexError) as expected:
+                board.cell(row, col)
+            with pytest.raises(IndexError) as raised:
+                minesweeper_engine.reveal_cell(board, row, col)
+            assert str(raised.value) == str(expected.value)
+        assert not any(cell & minesweeper_engine.REVEALED for cell in board.cells)
+    
+    @pytest.mark.skipif(minesweeper_engine is None, reason="minesweeper_engine module not found")
+    def test_negative_indexes_count_from_the_end(self):
+        """Test that negative indexes open the same cell as Board.cell views."""
+        board = minesweeper_engine.Board(3, 3)
+        board.cells[:] = bytes([1] * 9)
+        changes = minesweeper_engine.reveal_cell(board, -1, -2)
+        assert list(changes) == [(2, 1)]
+        assert board.cell(-1, -2).is_revealed
+
+
+class TestGameCounters:
+    """Tests for the incremental win/loss counters of Game."""
+    
+    @pytest.mark.skipif(minesweeper_engine is None, reason="minesweeper_engine module not found")
+    def test_counters_match_full_scan(self):
+        """Test the running counters against a scan through random games."""
+        import random
+        rng = random.Random(11)
+        for seed in range(30):
+            rows, cols = rng.randint(2, 15), rng.randint(2, 15)
+            game = minesweeper_engine.Game(rows, cols, rng.randint(0, rows * cols // 4),
+                                           seed=seed, debug=True)
+            game.toggle_flag(rng.randrange(rows), rng.randrange(cols))
+            while game.state == minesweeper_engine.PLAYING:
+                r, c = rng.randrange(rows), rng.randrange(cols)
+                if rng.random() < 0.3:
+                    game.toggle_flag(r, c)
+                else:
+                    game.reveal(r, c)
+                assert game.counts() == minesweeper_engine.scan_counts(game.board)
+                assert game.check_win() == minesweeper_engine.check_win(game.board)
+            won = game.state == minesweeper_engine.WON
+            assert won == minesweeper_engine.check_win(game.board)
+            assert game.exploded == (0 if won else 1)
+            assert game.mines_left == game.num_mines - game.flags
+    
+    @pytest.mark.skipif(minesweeper_engine is None, reason="minesweeper_engine module not found")
+    def test_flags_before_first_reveal_are_scored(self):
+        """Test that flags placed before the mines exist are counted correctly."""
+        game = minesweeper_engine.Game(8, 8, 40, seed=2, debug=True)
+        for c in range(8):
+            game.toggle_flag(7, c)
+        game.reveal(0, 0)
+        assert game.flags == 8
+        assert game.correct_flags == sum(game.board[7][c].is_mine for c in range(8))
+    
+    @pytest.mark.skipif(minesweeper_engine is None, reason="minesweeper_engine module not found")
+    def test_debug_mode_detects_drift(self):
+        """Test that debug mode notices edits made behind the game's back."""
+        game = minesweeper_engine.Game(6, 6, 3, seed=4, debug=True)
+        game.reveal(0, 0)
+        closed = [(r, c) for r in range(6) for c in range(6) if not game.board[r][c].is_revealed]
+        (r1, c1), (r2, c2) = closed[:2]
+        game.board[r1][c1].is_flagged = True
+        with pytest.raises(AssertionError):
+            game.toggle_flag(r2, c2)
+
+
+class TestBoardGeneration:
+    """Tests for sampled mine placement and bulk neighbour counting."""
+    
+    @staticmethod
+    def naive_counts(board):
+        counts = []
+        for r in range(board.rows):
+            for c in range(board.cols):
+                counts.append(sum(board[nr][nc].is_mine
+                                  for nr in range(max(0, r - 1), min(board.rows, r + 2))
+                                  for nc in range(max(0, c - 1), min(board.cols, c + 2))
+                                  if (nr, nc) != (r, c)))
+        return counts
+    
+    @pytest.mark.skipif(minesweeper_engine is None, reason="minesweeper_engine module not found")
+    def test_counts_match_naive_scan(self):
+        """Test bulk neighbour counts on odd shapes and densities."""
+        for rows, cols, mines in [(1, 1, 0), (1, 9, 4), (9, 1, 8), (7, 11, 30),
+                                  (8, 8, 63), (13, 5, 50)]:
+            board = minesweeper_engine.generate_board(rows, cols, mines, (0, 0), seed=rows * cols)
+            assert board.mine_count() == mines
+            assert not board[0][0].is_mine
+            counts = [cell.adjacent_mines for row in board for cell in row]
+            assert counts == self.naive_counts(board)
+    
+    @pytest.mark.skipif(minesweeper_engine is None, reason="minesweeper_engine module not found")
+    def test_seeded_boards_are_reproducible(self):
+        """Test that a seed fixes the layout and different seeds differ."""
+        def layout(seed):
+            return bytes(minesweeper_engine.generate_board(30, 30, 150, (5, 5), seed=seed).cells)
+        assert layout(42) == layout(42)
+        assert layout(42) != layout(43)
+        import random
+        board = minesweeper_engine.generate_board(30, 30, 150, (5, 5), rng=random.Random(42))
+        assert bytes(board.cells) == layout(42)
+    
+    @pytest.mark.skipif(minesweeper_engine is None, reason="minesweeper_engine module not found")
+    def test_flags_survive_mine_placement(self):
+        """Test that a game keeps flags placed before the first reveal."""
+        game = minesweeper_engine.Game(10, 10, 20, seed=7)
+        game.toggle_flag(9, 9)
+        game.reveal(0, 0)
+        assert game.board[9][9].is_flagged
+        assert game.board.mine_count() == 20
+        assert [cell.adjacent_mines for row in game.board for cell in row] == \
+            self.naive_counts(game.board)
+    
+    @pytest.mark.skipif(minesweeper_engine is None, reason="minesweeper_engine module not found")
+    def test_rejects_bad_first_click(self):
+        """Test that a first click off the board is rejected."""
+        with pytest.raises(ValueError):
+            minesweeper_engine.generate_board(3, 3, 1, (3, 0))
+
+
 class TestGameLogic:
     """Tests for game logic functions."""
     
@@ -333,6 +618,419 @@ class TestSolver:
         assert True  # Pass for now, actual CSP logic tested in integration
 
 
+def dense_frontier(board, fraction, seed=0):
+    """Open ``fraction`` of the safe cells of ``board`` at random, without cascading."""
+    import random
+    rng = random.Random(seed)
+    cells = board.cells
+    for index in range(len(cells)):
+        if not cells[index] & minesweeper_engine.MINE and rng.random() < fraction:
+            cells[index] |= minesweeper_engine.REVEALED
+
+
+def play_with_session(game, session, max_steps=100000):
+    """Play ``game`` with ``session``, yielding after every deduction step."""
+    steps = 0
+    while game.state == minesweeper_engine.PLAYING and steps < max_steps:
+        safe, mines = session.solve_step()
+        yield safe, mines
+        steps += 1
+        if mines:
+            r, c = min(mines)
+            game.toggle_flag(r, c)
+            session.update(flags=[(r, c)])
+        elif safe:
+            session.update(game.reveal(*min(safe)))
+        else:
+            session.update(game.reveal(*session.make_probabilistic_move()))
+
+
+class TestSolverSession:
+    """Tests for the incremental solver session."""
+    
+    @pytest.mark.skipif(solver is None or minesweeper_engine is None,
+                        reason="solver or minesweeper_engine module not found")
+    def test_subset_rule(self):
+        """Test the 1-1-1 pattern: both ends are safe and the middle is a mine."""
+        grid = [[minesweeper_engine.Cell() for _ in range(3)] for _ in range(2)]
+        for c, count in enumerate([1, 1, 1]):
+            grid[1][c].is_revealed = True
+            grid[1][c].adjacent_mines = count
+        safe_cells, mine_cells = solver.Solver().solve_step(grid)
+        assert safe_cells == {(0, 0), (0, 2)} and mine_cells == {(0, 1)}
+    
+    @pytest.mark.skipif(solver is None or minesweeper_engine is None,
+                        reason="solver or minesweeper_engine module not found")
+    def test_single_unknown_is_mine(self):
+        """Test that a number with one closed neighbour marks it as a mine."""
+        grid = [[minesweeper_engine.Cell(is_revealed=True) for _ in range(3)] for _ in range(3)]
+        grid[0][0].is_revealed = False
+        for r, c in [(0, 1), (1, 0), (1, 1)]:
+            grid[r][c].adjacent_mines = 1
+        assert solver.Solver().solve_step(grid) == (set(), {(0, 0)})
+    
+    @pytest.mark.skipif(solver is None or minesweeper_engine is None,
+                        reason="solver or minesweeper_engine module not found")
+    def test_session_matches_full_rebuild(self):
+        """Test incremental steps against a full rebuild and the hidden mines."""
+        import random
+        for seed in range(15):
+            rng = random.Random(seed)
+            rows, cols = rng.randint(5, 20), rng.randint(5, 20)
+            mines = rng.randint(1, rows * cols // 5)
+            game = minesweeper_engine.Game(rows, cols, mines, seed=seed)
+            session = solver.Solver(mines).session(game.board)
+            session.update(game.reveal(rows // 2, cols // 2))
+            for safe, found in play_with_session(game, session):
+                assert (safe, found) == solver.Solver(mines).solve_step(game.board)
+                assert not any(game.board[r][c].is_mine for r, c in safe)
+                assert all(game.board[r][c].is_mine for r, c in found)
+    
+    @pytest.mark.skipif(solver is None or minesweeper_engine is None,
+                        reason="solver or minesweeper_engine module not found")
+    def test_flag_and_unflag_updates(self):
+        """Test that flags count as mines and unflagging restores the constraints."""
+        game = minesweeper_engine.Game(12, 12, 20, seed=8)
+        game.reveal(6, 6)
+        session = solver.SolverSession(game.board, total_mines=20)
+        before = dict(session.store.items())
+        r, c = divmod(min(session.store.cells()), 12)
+        game.toggle_flag(r, c)
+        session.update(flags=[(r, c)])
+        assert session.flags == {r * 12 + c}
+        assert r * 12 + c not in session.store.cells()
+        game.toggle_flag(r, c)
+        session.update(flags=[(r, c)])
+        assert dict(session.store.items()) == before
+    
+    @pytest.mark.skipif(solver is None or minesweeper_engine is None,
+                        reason="solver or minesweeper_engine module not found")
+    def test_store_deduplicates_and_indexes_cells(self):
+        """Test that equal constraints are stored once and every cell is indexed."""
+        board = minesweeper_engine.generate_board(30, 30, 150, (0, 0), seed=2)
+        dense_frontier(board, 0.5, seed=2)
+        store = solver.SolverSession(board).store
+        assert len(store) > 100
+        keys = [key for key, _ in store.items()]
+        assert len(keys) == len(set(keys))
+        for key in keys:
+            assert all(key in store.by_cell[cell] for cell in key)
+        assert set(store.by_cell) == set().union(*keys)
+    
+    @pytest.mark.skipif(solver is None or minesweeper_engine is None,
+                        reason="solver or minesweeper_engine module not found")
+    def test_store_matches_naive_pairwise_pass(self):
+        """Test that the indexed deduction finds exactly what the all-pairs pass finds."""
+        for seed in range(20):
+            board = minesweeper_engine.generate_board(25, 25, 60 + 5 * seed, (0, 0), seed=seed)
+            dense_frontier(board, 0.3 + seed % 5 / 10, seed=seed)
+            session = solver.SolverSession(board)
+            expected = solver._pairwise_deduce(session.store.items())
+            session.solve_step()
+            assert (session.safe, session.mines) == expected
+            assert not any(board.cells[i] & minesweeper_engine.MINE for i in session.safe)
+            assert all(board.cells[i] & minesweeper_engine.MINE for i in session.mines)
+    
+    @pytest.mark.skipif(solver is None, reason="solver module not found")
+    def test_linear_deduce_combines_three_constraints(self):
+        """Test a deduction that no pair of constraints gives on its own."""
+        constraints = [(frozenset('ab'), 1), (frozenset('bc'), 1), (frozenset('acd'), 2)]
+        for a, a_mines in constraints:
+            for b, b_mines in constraints:
+                if a != b:
+                    assert solver.pair_rule(a, a_mines, b, b_mines) == (set(), set())
+        assert solver.linear_deduce(constraints) == ({'b'}, {'a', 'c'})
+    
+    @pytest.mark.skipif(solver is None or minesweeper_engine is None,
+                        reason="solver or minesweeper_engine module not found")
+    def test_linear_mode_is_sound_and_extends_rules(self):
+        """Test that linear mode finds everything the rules find, and only forced cells."""
+        extra = 0
+        for seed in range(10):
+            board = minesweeper_engine.generate_board(25, 25, 60 + 5 * seed, (0, 0), seed=seed)
+            dense_frontier(board, 0.3 + seed % 5 / 10, seed=seed)
+            rules = solver.SolverSession(board)
+            rules_safe, rules_mines = rules.solve_step()
+            linear_safe, linear_mines = solver.SolverSession(board).solve_step(solver.LINEAR_MODE)
+            assert rules_safe <= linear_safe and rules_mines <= linear_mines
+            forced = rules.safe | rules.mines
+            for group in solver.frontier_components(rules.store):
+                counts = solver.count_component(group, 10 ** 6)
+                for cell, row in counts.per_cell.items():
+                    if sum(row) in (0, sum(counts.totals)):
+                        forced.add(cell)
+            assert rules._coords(forced) >= linear_safe | linear_mines
+            extra += len(linear_safe | linear_mines) - len(rules_safe | rules_mines)
+        assert extra > 0
+    
+    @pytest.mark.skipif(solver is None or minesweeper_engine is None,
+                        reason="solver or minesweeper_engine module not found")
+    def test_unknown_mode_raises(self):
+        """Test that solve_step rejects a mode it does not know."""
+        board = minesweeper_engine.generate_board(9, 9, 10, (0, 0), seed=0)
+        with pytest.raises(ValueError):
+            solver.Solver().solve_step(board, mode='guess')
+
+
+class TestSolverProbabilities:
+    """Tests for exact mine probabilities over frontier components."""
+    
+    @staticmethod
+    def partly_open(rows, cols, num_mines, seed, fraction=0.25):
+        """Return a board with random safe cells opened as a player would."""
+        import random
+        rng = random.Random(seed)
+        board = minesweeper_engine.generate_board(rows, cols, num_mines, (0, 0), seed=seed)
+        for index in range(rows * cols):
+            cell = board.cells[index]
+            if not cell & minesweeper_engine.MINE and rng.random() < fraction:
+                minesweeper_engine.reveal_cell(board, *divmod(index, cols))
+        return board
+    
+    @staticmethod
+    def brute_probabilities(board, num_mines):
+        """Chance of a mine per closed cell, over every layout of ``num_mines`` mines."""
+        import itertools
+        cells, cols = board.cells, board.cols
+        closed = [i for i in range(len(cells)) if not cells[i] & minesweeper_engine.REVEALED]
+        numbers = [([n for n in board.neighbors(*divmod(i, cols))
+                     if not cells[n] & minesweeper_engine.REVEALED],
+                    cells[i] & minesweeper_engine.ADJACENT_MASK)
+                   for i in range(len(cells)) if cells[i] & minesweeper_engine.REVEALED]
+        hits = dict.fromkeys(closed, 0)
+        layouts = 0
+        for layout in itertools.combinations(closed, num_mines):
+            mines = set(layout)
+            if all(sum(n in mines for n in near) == count for near, count in numbers):
+                layouts += 1
+                for index in mines:
+                    hits[index] += 1
+        return {divmod(i, cols): hits[i] / layouts for i in closed}
+    
+    @pytest.mark.skipif(solver is None or minesweeper_engine is None,
+                        reason="solver or minesweeper_engine module not found")
+    def test_probabilities_match_brute_force(self):
+        """Test frontier and outside probabilities against enumerating every layout."""
+        import random
+        for seed in range(40):
+            rng = random.Random(seed)
+            rows, cols = rng.randint(3, 5), rng.randint(3, 5)
+            num_mines = rng.randint(2, rows * cols // 3)
+            board = self.partly_open(rows, cols, num_mines, seed)
+            expected = self.brute_probabilities(board, num_mines)
+            session = solver.SolverSession(board, num_mines)
+            result = session.probabilities()
+            assert result.exact
+            for cell, p in result.cells.items():
+                assert p == pytest.approx(expected[cell], abs=1e-9)
+            settled = session._coords(session.safe | session.mines)
+            for cell, p in expected.items():
+                if cell not in result.cells and cell not in settled:
+                    assert result.outside == pytest.approx(p, abs=1e-9)
+    
+    @pytest.mark.skipif(solver is None or minesweeper_engine is None,
+                        reason="solver or minesweeper_engine module not found")
+    def test_components_share_no_cell(self):
+        """Test that the frontier splits into disjoint components covering every constraint."""
+        board = self.partly_open(40, 40, 300, seed=4, fraction=0.1)
+        store = solver.SolverSession(board).store
+        groups = solver.frontier_components(store)
+        cells = [set().union(*(key for key, _ in group)) for group in groups]
+        assert len(groups) > 1
+        assert sum(map(len, cells)) == len(set().union(*cells)) == len(store.cells())
+        assert sum(map(len, groups)) == len(store)
+    
+    @pytest.mark.skipif(solver is None or minesweeper_engine is None,
+                        reason="solver or minesweeper_engine module not found")
+    def test_component_counts(self):
+        """Test counts by mine total for a 1-2-1 row over three closed cells."""
+        counts = solver.count_component([(frozenset({0, 1}), 1), (frozenset({0, 1, 2}), 2),
+                                         (frozenset({1, 2}), 1)])
+        # Only the layouts {0, 2} fit.
+        assert counts.totals == [0, 0, 1]
+        assert counts.per_cell == {0: [0, 0, 1], 1: [0, 0, 0], 2: [0, 0, 1]}
+    
+    @pytest.mark.skipif(solver is None or minesweeper_engine is None,
+                        reason="solver or minesweeper_engine module not found")
+    def test_state_limit_falls_back_to_estimate(self):
+        """Test that a component over the state limit gives an inexact estimate."""
+        board = self.partly_open(30, 30, 150, seed=5, fraction=0.1)
+        session = solver.SolverSession(board, 150)
+        estimate = session.probabilities(max_states=1)
+        assert not estimate.exact
+        assert all(0.0 <= p <= 1.0 for p in estimate.cells.values())
+        assert session.probabilities().exact
+    
+    @staticmethod
+    def chances(counts):
+        """Chance of a mine per cell of a component, over all its solutions."""
+        total = sum(counts.totals)
+        return {cell: sum(row) / total for cell, row in counts.per_cell.items()}
+    
+    @pytest.mark.skipif(solver is None or minesweeper_engine is None,
+                        reason="solver or minesweeper_engine module not found")
+    def test_sampled_counts_match_exact_counts(self):
+        """Test thinned sampling against exact counts, and that it is exact when nothing is thinned."""
+        import random
+        board = self.partly_open(30, 30, 150, seed=5, fraction=0.1)
+        session = solver.SolverSession(board, 150)
+        session.solve_step()
+        group = max(solver.frontier_components(session.store), key=len)
+        expected = self.chances(solver.count_component(group))
+        assert solver.count_component(group, max_states=4) is None
+        
+        counts, error = solver.sample_component(group, random.Random(0), runs=32, max_states=4)
+        chances = self.chances(counts)
+        assert 0 < error < 0.1
+        assert max(abs(chances[cell] - p) for cell, p in expected.items()) < 4 * error
+        
+        counts, error = solver.sample_component(group, random.Random(0), max_states=16)
+        assert error == 0.0
+        assert self.chances(counts) == expected
+    
+    @pytest.mark.skipif(solver is None or minesweeper_engine is None,
+                        reason="solver or minesweeper_engine module not found")
+    def test_budget_reports_exactness_and_error(self):
+        """Test that budgeted probabilities say whether they are exact and how far off they may be."""
+        board = self.partly_open(30, 30, 150, seed=5, fraction=0.1)
+        exact = solver.SolverSession(board, 150).probabilities()
+        assert exact.exact and exact.error == 0.0
+        
+        ample = solver.SolverSession(board, 150, seed=0).probabilities(budget_ms=60000)
+        assert ample == exact
+        
+        assert not solver.SolverSession(board, 150, seed=0).probabilities(max_states=4).exact
+        sampled = solver.SolverSession(board, 150, seed=0).probabilities(max_states=4, budget_ms=200)
+        assert not sampled.exact and 0 < sampled.error < 0.2
+        
+        hurried = solver.SolverSession(board, 150, seed=0).probabilities(budget_ms=0)
+        assert not hurried.exact and hurried.error is None
+        assert hurried.cells.keys() <= exact.cells.keys()
+        assert all(0.0 <= p <= 1.0 for p in hurried.cells.values())
+    
+    @pytest.mark.skipif(solver is None or minesweeper_engine is None,
+                        reason="solver or minesweeper_engine module not found")
+    def test_estimate_settles_forced_cells(self):
+        """Test that the quick estimate gives deduced cells their known state."""
+        group = [(frozenset({0, 1}), 1), (frozenset({1, 2}), 1),
+                 (frozenset({0, 2, 3}), 2), (frozenset({3, 4, 5}), 1)]
+        chances = self.chances(solver.estimate_component(group))
+        assert chances == pytest.approx({0: 1.0, 1: 0.0, 2: 1.0, 3: 0.0, 4: 0.5, 5: 0.5})
+    
+    @pytest.mark.skipif(solver is None or minesweeper_engine is None,
+                        reason="solver or minesweeper_engine module not found")
+    def test_flagged_safe_cell_leaves_outside_unchanged(self):
+        """Test that flagging a cell already known safe does not shift the outside chance."""
+        board = self.partly_open(16, 16, 40, seed=3, fraction=0.2)
+        session = solver.SolverSession(board, 40)
+        session.solve_step()
+        assert session.safe
+        before = session.probabilities()
+        row, col = divmod(min(session.safe), board.cols)
+        minesweeper_engine.toggle_flag(board, row, col)
+        session.update(flags=[(row, col)])
+        after = session.probabilities()
+        assert after.outside == pytest.approx(before.outside)
+    
+    @pytest.mark.skipif(solver is None or minesweeper_engine is None,
+                        reason="solver or minesweeper_engine module not found")
+    def test_no_guess_on_an_open_board(self):
+        """Test that make_probabilistic_move returns None when no cell is left closed."""
+        board = minesweeper_engine.generate_board(4, 4, 0, (0, 0), seed=0)
+        minesweeper_engine.reveal_cell(board, 0, 0)
+        assert solver.SolverSession(board, 0).make_probabilistic_move() is None
+        assert solver.Solver(0).make_probabilistic_move(board) is None
+    
+    @pytest.mark.skipif(solver is None or minesweeper_engine is None,
+                        reason="solver or minesweeper_engine module not found")
+    def test_guess_picks_least_likely_cell(self):
+        """Test that make_probabilistic_move opens the lowest-probability cell."""
+        guesses = 0
+        for seed in range(5):
+            game = minesweeper_engine.Game(16, 30, 99, seed=seed)
+            session = solver.Solver(99).session(game.board)
+            session.update(game.reveal(8, 15))
+            for safe, mines in play_with_session(game, session):
+                if safe or mines:
+                    continue
+                result = session.probabilities()
+                move = session.make_probabilistic_move()
+                choices = list(result.cells.values())
+                if next(session._closed_cells(), None) is not None:
+                    choices.append(result.outside)
+                assert result.cells.get(move, result.outside) == min(choices)
+                guesses += 1
+        assert guesses
+
+
+class TestComponentCache:
+    """Tests for the cross-move cache of component counts."""
+    
+    @pytest.mark.skipif(solver is None, reason="solver module not found")
+    def test_signature_ignores_position(self):
+        """Test that a shifted copy of a component has the same signature."""
+        here = [(frozenset({10, 11}), 1), (frozenset({11, 12}), 1)]
+        there = [(frozenset({511, 512}), 1), (frozenset({510, 511}), 1)]
+        assert solver.component_signature(here) == (10, solver.component_signature(there)[1])
+        other = [(frozenset({10, 11}), 1), (frozenset({11, 12}), 2)]
+        assert solver.component_signature(other)[1] != solver.component_signature(here)[1]
+    
+    @pytest.mark.skipif(solver is None, reason="solver module not found")
+    def test_hits_return_shifted_counts(self):
+        """Test that a hit gives the same counts as counting, on the new cells."""
+        cache = solver.ComponentCache()
+        cache.count([(frozenset({0, 1, 2}), 1), (frozenset({2, 3}), 1)])
+        shifted = [(frozenset({100, 101, 102}), 1), (frozenset({102, 103}), 1)]
+        counts = cache.count(shifted)
+        expected = solver.count_component(shifted)
+        assert counts.totals == expected.totals and counts.per_cell == expected.per_cell
+        info = cache.info()
+        assert (info.hits, info.misses, info.hit_rate, info.entries) == (1, 1, 0.5, 1)
+        assert info.seconds_saved > 0
+    
+    @pytest.mark.skipif(solver is None, reason="solver module not found")
+    def test_least_recently_used_entries_are_evicted(self):
+        """Test the entry limit and that a failed count is retried with a higher limit."""
+        cache = solver.ComponentCache(max_entries=2)
+        groups = [[(frozenset({0, 1}), count)] for count in (0, 1, 2)]
+        cache.count(groups[0])
+        cache.count(groups[1])
+        cache.count(groups[0])
+        cache.count(groups[2])
+        assert cache.info().entries == 2
+        cache.count(groups[0])
+        cache.count(groups[1])
+        assert (cache.hits, cache.misses) == (2, 4)
+        wide = [(frozenset({0, 1, 2}), 1), (frozenset({2, 3, 4}), 1), (frozenset({4, 5, 6}), 1)]
+        assert cache.count(wide, max_states=1) is None
+        assert cache.count(wide, max_states=1) is None
+        assert cache.count(wide).totals == solver.count_component(wide).totals
+    
+    @pytest.mark.skipif(solver is None or minesweeper_engine is None,
+                        reason="solver or minesweeper_engine module not found")
+    def test_move_recounts_only_changed_components(self):
+        """Test that a guess only misses on components it changed, with unchanged results."""
+        board = TestSolverProbabilities.partly_open(60, 60, 720, seed=3, fraction=0.3)
+        cached = solver.Solver(720)
+        session = cached.session(board)
+        session.probabilities()
+        before = {solver.component_signature(group)
+                  for group in solver.frontier_components(session.store)}
+        r, c = move = session.make_probabilistic_move()
+        if board.cells[r * 60 + c] & minesweeper_engine.MINE:
+            minesweeper_engine.toggle_flag(board, r, c)
+            session.update(flags=[move])
+        else:
+            session.update(minesweeper_engine.reveal_cell(board, r, c))
+        misses = cached.stats().misses
+        result = session.probabilities()
+        after = [solver.component_signature(group)
+                 for group in solver.frontier_components(session.store)]
+        changed = {signature for _, signature in after} - {signature for _, signature in before}
+        assert cached.stats().misses - misses == len(changed) < len(after)
+        assert result == solver.Solver(720, cache_size=0).session(board).probabilities()
+
+
 class TestPlayMinesweeper:
     """Tests for play_minesweeper.py command-line interface."""
     
@@ -501,4 +1199,212 @@ class TestPerformance:
         
         # Should complete quickly (basic solver should be fast)
         assert end_time - start_time < 0.5, "Basic solver took too long"
-        assert isinstance(safe_cells, set) and isinstance(mine_cells, set)
\ No newline at end of file
+        assert isinstance(safe_cells, set) and isinstance(mine_cells, set)
+    
+    @pytest.mark.skipif(minesweeper_engine is None, reason="minesweeper_engine module not found")
+    def test_board_memory_per_cell(self):
+        """Test that a large board costs about one byte per cell."""
+        import tracemalloc
+        
+        tracemalloc.start()
+        board = minesweeper_engine.Board(1000, 1000)
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        
+        assert len(board) == 1000
+        assert size < 2 * 1000 * 1000, "Board should use about one byte per cell"
+    
+    @pytest.mark.skipif(minesweeper_engine is None, reason="minesweeper_engine module not found")
+    def test_million_cell_generation(self):
+        """Test that a 1000x1000 board with 160k mines is generated quickly."""
+        import time
+        
+        start_time = time.perf_counter()
+        board = minesweeper_engine.generate_board(1000, 1000, 160000, (500, 500), seed=1)
+        elapsed = time.perf_counter() - start_time
+        
+        assert board.mine_count() == 160000
+        assert elapsed < 1.0, "Million-cell board generation took too long"
+    
+    @pytest.mark.skipif(minesweeper_engine is None, reason="minesweeper_engine module not found")
+    def test_large_empty_region_reveal(self):
+        """Test that one click opens a 1000x1000 empty board quickly."""
+        import time
+        
+        game = minesweeper_engine.Game(1000, 1000, 0)
+        start_time = time.perf_counter()
+        changes = game.reveal(500, 500)
+        elapsed = time.perf_counter() - start_time
+        
+        assert len(changes) == 1000 * 1000
+        assert game.state == minesweeper_engine.WON
+        assert elapsed < 1.0, "Opening a large empty region took too long"
+    
+    @pytest.mark.skipif(minesweeper_engine is None, reason="minesweeper_engine module not found")
+    def test_win_check_is_constant_time(self):
+        """Test that Game.check_win does not rescan a large board."""
+        import time
+        
+        game = minesweeper_engine.Game(2000, 2000, 400000, seed=3)
+        game.reveal(1000, 1000)
+        
+        start_time = time.perf_counter()
+        for _ in range(1000):
+            game.check_win()
+        counter_time = time.perf_counter() - start_time
+        
+        start_time = time.perf_counter()
+        for _ in range(10):
+            minesweeper_engine.check_win(game.board)
+        scan_time = (time.perf_counter() - start_time) * 100
+        
+        assert counter_time * 100 < scan_time, "Counter-based win check should be much faster"
+    
+    @pytest.mark.skipif(solver is None or minesweeper_engine is None,
+                        reason="solver or minesweeper_engine module not found")
+    def test_session_step_independent_of_board_area(self):
+        """Test that incremental steps on a huge board stay far below a rebuild."""
+        import time
+        
+        game = minesweeper_engine.Game(1000, 1000, 150000, seed=1)
+        session = solver.Solver(150000).session(game.board)
+        session.update(game.reveal(500, 500))
+        
+        times = []
+        start_time = time.perf_counter()
+        for _ in play_with_session(game, session, max_steps=300):
+            times.append(time.perf_counter() - start_time)
+            start_time = time.perf_counter()
+        step_time = sorted(times)[len(times) // 2]
+        
+        start_time = time.perf_counter()
+        solver.Solver(150000).solve_step(game.board)
+        rebuild_time = time.perf_counter() - start_time
+        
+        assert step_time < 0.005, "Incremental solver step took too long"
+        assert step_time * 10 < rebuild_time
+    
+    @pytest.mark.skipif(solver is None or minesweeper_engine is None,
+                        reason="solver or minesweeper_engine module not found")
+    def test_indexed_store_beats_pairwise_pass(self):
+        """Test the cell-indexed deduction against the all-pairs pass on a dense frontier."""
+        import time
+        
+        board = minesweeper_engine.generate_board(100, 100, 2000, (0, 0), seed=1)
+        dense_frontier(board, 0.5, seed=1)
+        
+        start_time = time.perf_counter()
+        session = solver.SolverSession(board)
+        session.solve_step()
+        store_time = time.perf_counter() - start_time
+        
+        start_time = time.perf_counter()
+        expected = solver._pairwise_deduce(solver.SolverSession(board).store.items())
+        naive_time = time.perf_counter() - start_time
+        
+        assert (session.safe, session.mines) == expected
+        assert store_time * 5 < naive_time, "Indexed deduction is not faster than all pairs"
+    
+    @pytest.mark.skipif(solver is None or minesweeper_engine is None,
+                        reason="solver or minesweeper_engine module not found")
+    def test_linear_mode_latency_and_yield(self):
+        """Test that linear mode deduces more on a dense frontier within a bounded cost."""
+        import time
+        
+        board = minesweeper_engine.generate_board(100, 100, 2000, (0, 0), seed=0)
+        dense_frontier(board, 0.3, seed=0)
+        results = {}
+        for mode in (solver.RULES_MODE, solver.LINEAR_MODE):
+            session = solver.SolverSession(board)
+            start_time = time.perf_counter()
+            safe, mines = session.solve_step(mode)
+            results[mode] = (time.perf_counter() - start_time, len(safe) + len(mines))
+        
+        rules_time, rules_found = results[solver.RULES_MODE]
+        linear_time, linear_found = results[solver.LINEAR_MODE]
+        assert linear_found > rules_found * 1.05, "Linear mode adds too few deductions"
+        assert linear_time < 2.0, f"Linear mode too slow: {linear_time:.2f}s"
+    
+    @pytest.mark.skipif(solver is None or minesweeper_engine is None,
+                        reason="solver or minesweeper_engine module not found")
+    def test_exact_probabilities_on_expert_games(self):
+        """Test that exact guesses on expert boards stay well under real-time limits."""
+        import time
+        
+        times = []
+        for seed in range(20):
+            game = minesweeper_engine.Game(16, 30, 99, seed=seed)
+            session = solver.Solver(99).session(game.board)
+            session.update(game.reveal(8, 15))
+            for safe, mines in play_with_session(game, session):
+                if not safe and not mines:
+                    start_time = time.perf_counter()
+                    assert session.probabilities().exact
+                    times.append(time.perf_counter() - start_time)
+        
+        assert times
+        assert max(times) < 0.1, "Exact probabilities on an expert board took too long"
+    
+    @pytest.mark.skipif(solver is None or minesweeper_engine is None,
+                        reason="solver or minesweeper_engine module not found")
+    def test_cached_counts_speed_up_the_next_guess(self):
+        """Test that probabilities after one move reuse the unchanged components."""
+        import time
+        
+        board = TestSolverProbabilities.partly_open(150, 150, 4500, seed=1, fraction=0.3)
+        session = solver.Solver(4500).session(board)
+        session.solve_step()
+        start_time = time.perf_counter()
+        session.probabilities()
+        first_time = time.perf_counter() - start_time
+        
+        r, c = session.make_probabilistic_move()
+        if board.cells[r * 150 + c] & minesweeper_engine.MINE:
+            minesweeper_engine.toggle_flag(board, r, c)
+            session.update(flags=[(r, c)])
+        else:
+            session.update(minesweeper_engine.reveal_cell(board, r, c))
+        start_time = time.perf_counter()
+        session.probabilities()
+        next_time = time.perf_counter() - start_time
+        
+        assert session.cache.info().hit_rate > 0.5
+        assert next_time * 3 < first_time, "Cached components did not speed up the next guess"
+    
+    @pytest.mark.skipif(solver is None or minesweeper_engine is None,
+                        reason="solver or minesweeper_engine module not found")
+    def test_budgeted_guess_stays_near_budget(self):
+        """Test that a time budget bounds a guess on a board too large to count quickly."""
+        import time
+        
+        board = TestSolverProbabilities.partly_open(200, 200, 8000, seed=1, fraction=0.3)
+        session = solver.SolverSession(board, 8000, seed=0)
+        session.solve_step()
+        start_time = time.perf_counter()
+        budgeted = session.probabilities(budget_ms=50)
+        budget_time = time.perf_counter() - start_time
+        
+        session = solver.SolverSession(board, 8000)
+        session.solve_step()
+        start_time = time.perf_counter()
+        exact = session.probabilities()
+        exact_time = time.perf_counter() - start_time
+        
+        assert exact.exact and not budgeted.exact
+        assert budget_time < 0.05 + 0.25, f"Budgeted guess took {budget_time:.2f}s"
+        assert budget_time * 3 < exact_time
+    
+    @pytest.mark.skipif(solver is None or minesweeper_engine is None,
+                        reason="solver or minesweeper_engine module not found")
+    def test_budget_covers_the_whole_guess(self):
+        """Test that a budgeted guess from a bare board, rebuild included, keeps to the budget."""
+        import time
+        
+        board = TestSolverProbabilities.partly_open(300, 300, 18000, seed=1, fraction=0.3)
+        guesser = solver.Solver(18000)
+        start_time = time.perf_counter()
+        move = guesser.make_probabilistic_move(board, budget_ms=50)
+        guess_time = time.perf_counter() - start_time
+        
+        assert move is not None
+        assert guess_time < 0.05 + 0.1, f"Budgeted guess took {guess_time:.2f}s"